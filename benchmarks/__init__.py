@@ -0,0 +1,44 @@
+"""
+    Benchmarks
+    ----------
+
+    Timing scripts for the parts of Polyglot that run on every keystroke.
+    Run them from the root of the repository, e.g.
+
+        python -m benchmarks.bulk_paste
+
+"""
+
+from __future__ import print_function
+
+import time
+
+clock = getattr(time, "perf_counter", time.time)
+
+def timed(func, repeat=5, number=1):
+    """ Calls `func` `number` times for each of `repeat` runs and returns a list
+        of the average time per call, in milliseconds, for each run """
+    times = []
+    for _ in range(repeat):
+        start = clock()
+        for _ in range(number):
+            func()
+        times.append((clock() - start) * 1000.0 / number)
+    return times
+
+def report(name, times):
+    """ Prints the best, mean and worst of a list of times in milliseconds """
+    print("{:<48} best {:>9.3f} ms   mean {:>9.3f} ms   worst {:>9.3f} ms".format(
+        name, min(times), sum(times) / len(times), max(times)))
+    return
+
+def foxdot_code(size):
+    """ Returns roughly `size` characters of FoxDot code """
+    block = (
+        "Clock.bpm = var([120, 140], 8)\n"
+        "p1 >> pluck([0, 2, 4, [5, 7]], dur=[1, 1/2, 1/2], amp=0.8).every(4, 'reverse')\n"
+        "d1 >> play(\"x-o-[--]-x-o-\", sample=var([0, 2]), pan=[-1, 1])\n"
+        "b1 >> bass(var([0, 3, 5, 4], 4), dur=PDur(3, 8), oct=4) # bass line\n"
+        "\n"
+    )
+    return (block * (size // len(block) + 1))[:size]
@@ -0,0 +1,143 @@
+"""
+    Matching brackets in a 5,000 line document
+    ------------------------------------------
+
+    Compares finding the opening bracket for a closing bracket typed near
+    the end of the document by scanning backwards through the text, as
+    highlight_brackets used to, with the bracket index, and times keeping
+    the index up to date as brackets and lines are typed. Then applies
+    random operations that each make several edits, as composed or undo
+    operations do, and checks every match and enclosing pair against a
+    scan of the whole document.
+
+        python -m benchmarks.brackets
+
+"""
+
+from __future__ import absolute_import, print_function
+
+from . import timed, report, foxdot_code
+
+import random
+
+from src.document import BracketIndex, brackets
+from src.utils import new_operation
+from src.ot.text_operation import TextOperation
+
+LINES = 5000
+
+def scan_back(text, index, left_bracket, right_bracket):
+    """ Backwards scan, as find_starting_bracket used to work """
+    nests = 0
+    for i in range(index, -1, -1):
+        if text[i] == left_bracket:
+            if nests > 0:
+                nests -= 1
+            else:
+                return i
+        elif text[i] == right_bracket:
+            nests += 1
+    return
+
+def scan_pairs(text, comment):
+    """ Returns a dictionary of offset -> offset of its matching bracket, and the list of
+        (start, end) pairs, found by reading the whole document """
+    reader = BracketIndex(comment=comment)
+    stacks = dict((kind, []) for kind in brackets.PAIRS)
+    matches, pairs, start = {}, [], 0
+    for line in text.split("\n"):
+        for col, char in reader.read_line(line):
+            kind = brackets.KINDS[char]
+            if char == kind:
+                stacks[kind].append(start + col)
+            elif stacks[kind]:
+                left = stacks[kind].pop()
+                matches[left], matches[start + col] = start + col, left
+                pairs.append((left, start + col))
+        start += len(line) + 1
+    return matches, pairs
+
+def random_operation(rnd, text):
+    """ Returns an operation that makes a few inserts and deletes across `text` """
+    op, pos = TextOperation(), 0
+    for _ in range(rnd.randint(1, 6)):
+        if pos >= len(text):
+            break
+        skip = rnd.randint(0, (len(text) - pos) // 2)
+        op.retain(skip)
+        pos += skip
+        if rnd.random() < 0.5 and pos < len(text):
+            size = rnd.randint(1, min(200, len(text) - pos))
+            op.delete(size)
+            pos += size
+        else:
+            op.insert("".join(rnd.choice("ab ()[]{}\n\n\n'#") for _ in range(rnd.randint(1, 120))))
+    op.retain(len(text) - pos)
+    return op
+
+def check(seed, block, documents=100, edits=20):
+    """ Applies random operations to random documents and returns the number of
+        documents where the index disagrees with a scan """
+    rnd = random.Random(seed)
+    default, brackets.BLOCK = brackets.BLOCK, block
+    failed = 0
+    try:
+        for _ in range(documents):
+            text  = "".join(rnd.choice("ab ()[]{}\n'#") for _ in range(rnd.randint(0, 3000)))
+            index = BracketIndex(text, comment="#")
+            wrong = False
+            for _ in range(edits):
+                op = random_operation(rnd, text)
+                text = op(text)
+                index.apply(op.ops, text)
+                matches, pairs = scan_pairs(text, "#")
+                for offset, char in enumerate(text):
+                    if char in brackets.KINDS and index.bracket_at(offset) is not None:
+                        wrong = wrong or index.match(offset) != matches.get(offset)
+                for offset in rnd.sample(range(len(text) + 1), min(20, len(text) + 1)):
+                    around = [pair for pair in pairs if pair[0] < offset <= pair[1]]
+                    wrong = wrong or index.enclosing(offset) != (max(around) if around else None)
+            failed += wrong
+    finally:
+        brackets.BLOCK = default
+    return failed
+
+def main():
+
+    # An unclosed bracket at the top so the scan has to reach the start
+
+    text  = "Group(\n" + "\n".join(foxdot_code(LINES * 60).split("\n")[:LINES]) + "\n)"
+    index = BracketIndex(text, comment="#")
+
+    end = len(text) - 1
+
+    print("{} characters, {} lines".format(len(text), len(index)))
+
+    report("match ')' at the end: scan back", timed(lambda: scan_back(text, end - 1, "(", ")"), number=10))
+    report("match ')' at the end: bracket index", timed(lambda: index.match(end), number=100))
+    report("enclosing brackets in the middle: bracket index", timed(lambda: index.enclosing(len(text) // 2), number=100))
+
+    for name, string in (("bracket", "("), ("line", "\n")):
+
+        state = {"size": len(text), "text": text}
+
+        def keystroke():
+            pos = state["size"] // 2
+            for ops in (new_operation(pos, string, state["size"]), new_operation(pos, -1, state["size"] + 1)):
+                state["text"] = TextOperation(ops)(state["text"])
+                index.apply(ops, state["text"])
+            index.match(end)
+
+        report("type and delete a {}, then match".format(name), timed(keystroke, number=20))
+
+    report("bracket index: build from the document", timed(lambda: BracketIndex(text, comment="#"), number=5))
+
+    for block in (brackets.BLOCK, 4):
+
+        print("random multi-edit operations, {} line blocks: {} of 100 documents wrong".format(block, check(block, block)))
+
+    return
+
+if __name__ == "__main__":
+
+    main()
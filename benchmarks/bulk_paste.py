@@ -0,0 +1,221 @@
+"""
+    Pasting a 200 KB FoxDot file while three peers are typing
+    ----------------------------------------------------------
+
+    Times the parts of a large paste that don't need a display: sending
+    the operation through the message reader, transforming it on the
+    server against the typing peers' concurrent operations, and applying
+    it to the text and authorship of the document. Then pastes and opens
+    the file through headless clients connected to a server while three
+    other clients type, with the bulk path that rebuilds the line and
+    bracket indices and with the indices updated edit by edit.
+
+        python -m benchmarks.bulk_paste
+
+"""
+
+from __future__ import absolute_import, print_function
+
+import random
+import threading
+import time
+
+from . import timed, report, foxdot_code, clock
+
+from src.network.message import MSG_OPERATION, NetworkMessageReader
+from src.network.network_utils import TextHandler
+from src.ot.text_operation import TextOperation
+from src.network.server import PolyServer
+from src.network.headless import HeadlessClient
+from src import utils
+from src.utils import new_operation, get_peer_char
+
+PASTE_SIZE = 200 * 1024
+TYPISTS    = (1, 2, 3)
+PORT       = 57998
+
+def typing_session(handler, keystrokes=300, lag=3):
+    """ Each typing peer inserts a character at its own cursor, using a revision up
+        to `lag` operations behind the server so that operations are concurrent """
+    cursors = {peer: 0 for peer in TYPISTS}
+    for n in range(keystrokes):
+        peer = TYPISTS[n % len(TYPISTS)]
+        revision = max(0, len(handler.backend.operations) - random.randint(0, lag))
+        doc_size = len(replay(handler, revision))
+        index = min(cursors[peer], doc_size)
+        op = new_operation(index, "x", doc_size)
+        handler.receive_message(MSG_OPERATION(peer, op, revision))
+        cursors[peer] = index + 1
+    return
+
+def replay(handler, revision):
+    """ Returns the document at a revision """
+    doc = ""
+    for op in handler.backend.get_operations(0, revision):
+        doc = op(doc)
+    return doc
+
+def main():
+
+    random.seed(0)
+
+    text = foxdot_code(PASTE_SIZE)
+
+    # Wire format: encoding and reading the paste in socket-sized chunks
+
+    message = MSG_OPERATION(0, [text], 0)
+    data    = message.bytes()
+
+    report("encode 200 KB MSG_OPERATION", timed(message.bytes))
+
+    for size in (2048, 65536):
+
+        def read(size=size):
+            reader = NetworkMessageReader()
+            for i in range(0, len(data), size):
+                reader.feed(data[i:i + size])
+
+        report("read 200 KB message in {} byte chunks".format(size), timed(read))
+
+    # Server: paste while three peers type
+
+    handler = TextHandler()
+    typing_session(handler)
+    start_doc   = handler.document
+    start_tags  = handler.peer_tags.runs()
+    revision    = len(handler.backend.operations)
+
+    def paste():
+        server = TextHandler()
+        server.document = start_doc
+        server.peer_tags = server.peer_tags.from_runs(start_tags)
+        server.backend.operations = list(handler.backend.operations)
+        # Paste is 3 operations behind the typing peers
+        op = new_operation(len(start_doc) // 2, text, len(replay(handler, revision - 3)))
+        server.receive_message(MSG_OPERATION(0, op, revision - 3))
+        return server
+
+    report("server: transform and apply 200 KB paste", timed(paste))
+
+    # Authorship of a keystroke once the paste has landed: run-length index
+    # compared to rewriting a string of peer chars as long as the document
+
+    server = paste()
+
+    peer_tags    = server.peer_tags
+    peer_tag_doc = "".join(get_peer_char(peer) * length for peer, length in peer_tags.runs())
+    keystroke_op = TextOperation(new_operation(len(server.document) // 3, "x", len(server.document)))
+
+    def tags_as_string():
+        TextOperation([get_peer_char(1) * len(val) if isinstance(val, str) else val for val in keystroke_op.ops])(peer_tag_doc)
+
+    def tags_as_runs():
+        peer_tags.apply(keystroke_op.ops, 1)
+        peer_tags.apply([len(server.document) // 3, -1, len(server.document) - len(server.document) // 3], 1)
+
+    report("authorship: per-character string", timed(tags_as_string, number=50))
+    report("authorship: run-length index (insert + delete)", timed(tags_as_runs, number=50))
+
+    # Keystrokes from the typing peers after the paste has landed
+
+    def keystroke():
+        size = len(server.document)
+        rev  = len(server.backend.operations)
+        server.receive_message(MSG_OPERATION(1, new_operation(size // 3, "x", size), rev))
+
+    report("server: keystroke in 200 KB document", timed(keystroke, number=50))
+
+    # Through the client: the bulk path and the indices updated edit by edit
+
+    server = PolyServer(port=PORT)
+    server.running = True
+    server.daemon_threads = True
+
+    for thread in (server.server_thread, server.msg_queue_thread):
+        thread.daemon = True
+        thread.start()
+
+    for bulk in (True, False):
+
+        utils.BULK_EDIT_SIZE = 4096 if bulk else float("inf")
+
+        name = "bulk" if bulk else "per edit"
+
+        paste_times, open_times, applied = client_session(server, text, name)
+
+        report("client: apply 200 KB paste ({})".format(name), paste_times)
+        report("client: apply 200 KB file open ({})".format(name), open_times)
+        report("paste reaches all 4 clients ({})".format(name), applied)
+
+    return
+
+def client_session(server, text, name, pastes=5):
+    """ Connects four headless clients. Three type at the start of the document while
+        the fourth pastes `text` at the end and then replaces the document with it, as
+        opening a file does, `pastes` times. Returns the time the pasting client took to apply each
+        paste and file open, and how long each paste took to reach every client. """
+
+    clients = [HeadlessClient("localhost", PORT, "{} {}".format(name, n)) for n in range(4)]
+
+    for client in clients:
+        client.wait_until(lambda: not client.block_messages)
+
+    # The server ignores edits until every client has acknowledged the last one to connect
+
+    while server.waiting_for_ack:
+        time.sleep(0.01)
+
+    paster, typists = clients[0], clients[1:]
+
+    typing = [True]
+
+    def type_keys(client):
+        while typing[0]:
+            client.wait_until(lambda: not client.block_messages)
+            client.insert("x", index=0)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=type_keys, args=(client,)) for client in typists]
+
+    for thread in threads:
+        thread.start()
+
+    paste_times, open_times, applied = [], [], []
+
+    for n in range(pastes):
+
+        # Each paste starts with a different line so it can be told apart from the last
+
+        pasted = "# paste {}\n{}".format(n, text)
+
+        paster.wait_until(lambda: not paster.block_messages)
+
+        start = clock()
+        paster.insert(pasted, index=len(paster.buffers[0].document))
+        paste_times.append((clock() - start) * 1000.0)
+
+        for client in clients:
+            client.wait_until(lambda: pasted in client.buffers[0].document, timeout=30)
+
+        applied.append((clock() - start) * 1000.0)
+
+        with paster.lock:
+            start = clock()
+            paster.edit([-len(paster.buffers[0].document), "# file {}\n{}".format(n, text)], 0)
+            open_times.append((clock() - start) * 1000.0)
+
+        paster.wait_until(paster.is_synchronised, timeout=30)
+
+    typing[0] = False
+
+    for thread in threads:
+        thread.join()
+
+    for client in clients:
+        client.kill()
+
+    return paste_times, open_times, applied
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,84 @@
+"""
+    Streaming interpreter output into the console
+    ---------------------------------------------
+
+    Compares writing 10,000 lines of sclang-like output to a console one
+    line at a time, with a `see` and `update_idletasks` after every line as
+    the console used to, against adding each frame's worth of lines with a
+    single insert, trimming the scrollback to 5,000 lines and scrolling
+    once. Needs a display.
+
+        python -m benchmarks.console
+
+"""
+
+from __future__ import absolute_import, print_function
+
+from . import timed, report
+
+from src.interface.tkimport import Tk
+
+LINES     = 10000
+MAX_LINES = 5000
+BATCH     = 1000
+
+def sclang_output(n):
+    block = [
+        "-> a Synth",
+        "<colour=\"Red\">ERROR:</colour> Message 'ar' not understood.",
+        "RECEIVER:",
+        "   Instance of Nil {    (0x0, gc=00, fmt=00, flg=00, set=00)",
+        "-> Routine",
+        "Booting server 'localhost' on address 127.0.0.1:57110.",
+    ]
+    return [block[i % len(block)] for i in range(n)]
+
+def main():
+
+    try:
+
+        root = Tk.Tk()
+
+    except Tk.TclError as e:
+
+        print("Unable to open a Tk window: {}".format(e))
+
+        return
+
+    text = Tk.Text(root, width=100, height=10)
+    text.pack()
+    text.tag_config("tag_Red", foreground="Red")
+    root.update()
+
+    lines = sclang_output(LINES)
+
+    def per_line():
+        text.delete("1.0", Tk.END)
+        for line in lines:
+            text.insert(Tk.END, line + "\n")
+            text.see(Tk.END)
+            text.update_idletasks()
+
+    def batched():
+        text.delete("1.0", Tk.END)
+        for i in range(0, LINES, BATCH):
+            args = []
+            for line in lines[i:i + BATCH]:
+                args.extend((line + "\n", ()))
+            text.insert(Tk.END, *args)
+            num_lines = int(text.index("end-1c").split(".")[0])
+            if num_lines > MAX_LINES:
+                text.delete("1.0", "{}.0".format(num_lines - MAX_LINES + 1))
+            text.see(Tk.END)
+            text.update_idletasks()
+
+    report("one insert, see and redraw per line", timed(per_line, repeat=1))
+    report("one insert per {} lines, {} line scrollback".format(BATCH, MAX_LINES), timed(batched, repeat=3))
+
+    root.destroy()
+
+    return
+
+if __name__ == "__main__":
+
+    main()
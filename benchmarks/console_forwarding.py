@@ -0,0 +1,84 @@
+"""
+    Forwarding noisy console output
+    -------------------------------
+
+    Feeds a second of interpreter output, a chunk every 5 ms with an
+    error repeated in a loop, to the console forwarder used by language
+    leaders. Compares the messages and bytes sent with sending one
+    MSG_CONSOLE per chunk. Then queues an operation behind a backlog of
+    console messages and reports how many messages go out before it.
+    Doesn't need a display.
+
+        python -m benchmarks.console_forwarding
+
+"""
+
+from __future__ import absolute_import, print_function
+
+import time
+
+from src.network.forwarding import ConsoleForwarder
+from src.network.message import MSG_CONSOLE, MSG_OPERATION, MessageQueue
+
+DURATION = 1.0
+PERIOD   = 0.005
+
+def chunk(i):
+    if i % 10 < 8:
+        return "ERROR: Message 'ar' not understood.\nRECEIVER: nil"
+    return "-> a Synth ({})".format(i)
+
+def main():
+
+    sent = []
+
+    forwarder = ConsoleForwarder(sent.append)
+
+    chunks = []
+
+    start = time.time()
+
+    while time.time() - start < DURATION:
+
+        text = chunk(len(chunks))
+
+        chunks.append(text)
+
+        forwarder.write(text)
+
+        time.sleep(PERIOD)
+
+    time.sleep(forwarder.interval * 2)
+
+    forwarder.close()
+
+    def size(texts):
+        return sum(len(MSG_CONSOLE(0, text).bytes()) for text in texts)
+
+    print("one message per chunk    {:>6} messages {:>9} bytes".format(len(chunks), size(chunks)))
+    print("coalesced                {:>6} messages {:>9} bytes".format(len(sent), size(sent)))
+    print("first coalesced message:\n    " + sent[0].replace("\n", "\n    "))
+
+    # Priority of operations over console output
+
+    queue = MessageQueue()
+
+    for i in range(1000):
+
+        queue.put(MSG_CONSOLE(0, chunk(i)))
+
+    queue.put(MSG_OPERATION(0, ["a"], 0))
+
+    position = 0
+
+    while not isinstance(queue.get_nowait(), MSG_OPERATION):
+
+        position += 1
+
+    print("operation queued behind 1000 console messages is sent after {}".format(position))
+
+    return
+
+if __name__ == "__main__":
+
+    main()
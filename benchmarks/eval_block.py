@@ -0,0 +1,208 @@
+"""
+    Finding the block of code to evaluate with Ctrl+Return
+    -------------------------------------------------------
+
+    Compares finding the block of code around the cursor in a 3,000 line
+    SuperCollider buffer (and a 3,000 line FoxDot buffer) by reading the
+    Tk text widget, as get_block_of_code used to, with using the in-memory
+    document, line index and bracket index. The Tk versions need a display
+    and are skipped without one. Then checks that after random operations
+    that each add and remove several blocks, the bracket index finds the
+    same block as the old search, run on a plain string.
+
+        python -m benchmarks.eval_block
+
+"""
+
+from __future__ import absolute_import, print_function
+
+from . import timed, report, foxdot_code
+
+import random
+
+from src.document import LineIndex, BracketIndex, blank_line_block, bracket_block, brackets
+from src.ot.text_operation import TextOperation
+from src.interface.tkimport import Tk
+
+LINES = 3000
+
+def supercollider_code(lines):
+    """ Returns `lines` lines of SuperCollider code in bracketed blocks """
+    block = [
+        "(",
+        "SynthDef(\\sine, { |freq=440, amp=0.2|",
+        "    var env = EnvGen.kr(Env.perc(0.01, 1), doneAction: 2); // envelope",
+        "    Out.ar(0, SinOsc.ar(freq) * amp * env)",
+        "}).add;",
+        "Pbind(\\instrument, \\sine, \\degree, Pseq([0, 2, 4, 7], inf), \\dur, 0.25).play;",
+        ")",
+        "",
+    ]
+    return "\n".join((block * (lines // len(block) + 1))[:lines])
+
+# Tk versions, as they used to be in Interpreter.py
+
+def tk_blank_line_block(text, row):
+    lastline = int(text.index("end").split('.')[0]) + 1
+    block = [0, 0]
+    for line in range(row, 0, -1):
+        if not text.get("%d.0" % line, "%d.end" % line).strip():
+            break
+    block[0] = line
+    for line in range(row, lastline):
+        if not text.get("%d.0" % line, "%d.end" % line).strip():
+            break
+    block[1] = line
+    return block
+
+def tk_get_left_bracket(text, cur_y, cur_x):
+    count = 0
+    line_text = text.get("{}.{}".format(cur_y, 0), "{}.{}".format(cur_y, "end"))
+    for line_num in range(cur_y, 0, -1):
+        for char_num in range(cur_x - 1, -1, -1):
+            char = line_text[char_num]
+            if char == ")":
+                count += 1
+            elif char == "(":
+                if count == 0:
+                    return line_num, char_num
+                else:
+                    count -= 1
+        line_text = text.get("{}.{}".format(line_num - 1, 0), "{}.{}".format(line_num - 1, "end"))
+        cur_x     = len(line_text)
+    return None, None
+
+def tk_get_right_bracket(text, cur_y, cur_x):
+    num_lines = int(text.index("end").split(".")[0]) + 1
+    count = 0
+    for line_num in range(cur_y, num_lines):
+        line_text = text.get("{}.{}".format(line_num, 0), "{}.{}".format(line_num, "end"))
+        for char_num in range(cur_x, len(line_text)):
+            char = line_text[char_num]
+            if char == "(":
+                count += 1
+            if char == ")":
+                if count == 0:
+                    return line_num, char_num + 1
+                else:
+                    count -= 1
+        cur_x = 0
+    return None, None
+
+def tk_bracket_block(text, row, col):
+    left, right = (row, col), (row, col)
+    while True:
+        new_left  = tk_get_left_bracket(text, *left)
+        new_right = tk_get_right_bracket(text, *right)
+        if new_left[0] is None or new_right[0] is None:
+            return [left[0], right[0] + 1]
+        left, right = new_left, new_right
+
+class StringText:
+    """ Answers the `get` and `index("end")` calls the old search makes from a string """
+    def __init__(self, document):
+        self.rows = document.split("\n")
+
+    def index(self, index):
+        return "{}.0".format(len(self.rows) + 1)
+
+    def get(self, start, end):
+        row, col = start.split(".")
+        line = self.rows[int(row) - 1] if 0 < int(row) <= len(self.rows) else ""
+        end = end.split(".")[1]
+        return line[int(col):] if end == "end" else line[int(col):int(end)]
+
+def check(seed, block, edits=50):
+    """ Applies random operations that add and remove whole blocks of SuperCollider
+        code and returns the number of cursor positions where bracket_block and the
+        old search disagree """
+    rnd = random.Random(seed)
+    chunks = [
+        "(\nSynthDef(\\sine, { |freq=440|\n    Out.ar(0, SinOsc.ar(freq))\n}).add;\n)\n\n",
+        "(\nPbind(\\dur, 0.25).play;\n)\n\n",
+        "x.play;\n\n",
+    ]
+    default, brackets.BLOCK = brackets.BLOCK, block
+    wrong = 0
+    try:
+        parts = [rnd.choice(chunks) for _ in range(200)]
+        text  = "".join(parts)
+        index = BracketIndex(text, comment="//")
+        for _ in range(edits):
+            # Several edits in one operation, as composed or undo operations make
+            op, new_parts = TextOperation(), []
+            for part in parts:
+                if rnd.random() < 0.1:
+                    op.delete(len(part))
+                else:
+                    op.retain(len(part))
+                    new_parts.append(part)
+                if rnd.random() < 0.1:
+                    part = rnd.choice(chunks) * rnd.randint(1, 3)
+                    op.insert(part)
+                    new_parts.append(part)
+            parts = new_parts
+            text = op(text)
+            index.apply(op.ops, text)
+            old = StringText(text)
+            for _ in range(40):
+                row = rnd.randint(1, len(old.rows))
+                col = rnd.randint(0, len(old.rows[row - 1]))
+                wrong += bracket_block(index, row, col) != tk_bracket_block(old, row, col)
+    finally:
+        brackets.BLOCK = default
+    return wrong
+
+def main():
+
+    sc_code = supercollider_code(LINES)
+    fd_code = "\n".join(foxdot_code(LINES * 60).split("\n")[:LINES])
+
+    lines    = LineIndex(fd_code)
+    sc_index = BracketIndex(sc_code, comment="//")
+
+    rows = (10, LINES // 2, LINES - 10)
+
+    # The cursor is in the middle of the SynthDef in each block
+
+    for row in rows:
+        row = row - row % 8 + 3
+        report("SuperCollider, line {}: bracket index".format(row), timed(lambda: bracket_block(sc_index, row, 8), number=100))
+
+    for row in rows:
+        report("FoxDot, line {}: line index".format(row), timed(lambda: blank_line_block(fd_code, lines, row), number=100))
+
+    for block in (brackets.BLOCK, 4):
+
+        print("random multi-edit operations, {} line blocks: {} of 2000 blocks differ from the old search".format(block, check(block, block)))
+
+    try:
+
+        root = Tk.Tk()
+
+    except Tk.TclError as e:
+
+        print("Unable to open a Tk window, skipping the Tk versions: {}".format(e))
+
+        return
+
+    text = Tk.Text(root)
+    text.insert("1.0", sc_code)
+
+    for row in rows:
+        row = row - row % 8 + 3
+        report("SuperCollider, line {}: read from Tk".format(row), timed(lambda: tk_bracket_block(text, row, 8), number=10))
+
+    text.delete("1.0", Tk.END)
+    text.insert("1.0", fd_code)
+
+    for row in rows:
+        report("FoxDot, line {}: read from Tk".format(row), timed(lambda: tk_blank_line_block(text, row), number=10))
+
+    root.destroy()
+
+    return
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,85 @@
+"""
+    Evaluating code while the interpreter is busy
+    ---------------------------------------------
+
+    Runs a stand-in interpreter (this Python) that takes 50 ms to run
+    each line it is sent, and evaluates 20 blocks of 100 kB, more than
+    a pipe holds, as fast as possible. Reports how long each call to
+    `evaluate` takes on the calling thread (the Tk thread in the client)
+    compared with writing straight to the pipe as evaluations used to,
+    then how long the queued code waited to be written. Doesn't need a
+    display.
+
+        python -m benchmarks.evaluate_queue
+
+"""
+
+from __future__ import absolute_import, print_function
+
+import sys
+
+from . import report, clock
+
+from src.interpreter import Interpreter
+
+CHILD = (
+    "import sys, time\n"
+    "for line in iter(sys.stdin.readline, ''):\n"
+    "    time.sleep(0.05)\n"
+)
+
+BLOCKS = 20
+SIZE   = 100000
+
+class Console:
+    root = None
+
+    def write(self, string):
+        return
+
+    def flush(self):
+        return
+
+class StandIn(Interpreter):
+    name = "StandIn"
+
+    def __repr__(self):
+        return self.name
+
+    @staticmethod
+    def format(string):
+        return string + "\n"
+
+def main():
+
+    code = "x" * SIZE
+
+    for name, call in (("write to the pipe", "write_stdout"), ("evaluate (queued)", "evaluate")):
+
+        lang = StandIn('"{}" -u -c "{}"'.format(sys.executable, CHILD))
+
+        lang.start(out=Console())
+
+        lang.ready.wait(5)
+
+        times = []
+
+        for _ in range(BLOCKS):
+
+            start = clock()
+
+            getattr(lang, call)(code)
+
+            times.append((clock() - start) * 1000.0)
+
+        report(name, times)
+
+        lang.kill()
+
+    print("queued code waited: {}".format(lang.write_latency.summary()))
+
+    return
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,99 @@
+"""
+    Round trip latency with many headless clients
+    ---------------------------------------------
+
+    Starts a server in this process, connects headless clients to it and
+    has each of them type characters at random places in the same buffer.
+    Reports how long the server takes to acknowledge each keystroke and
+    checks that every client ends up with the same document. Doesn't need
+    a display.
+
+        python -m benchmarks.headless [clients] [keystrokes]
+
+"""
+
+from __future__ import absolute_import, print_function
+
+import random
+import sys
+import threading
+import time
+
+from . import report, clock
+
+from src.network.server import PolyServer
+from src.network.headless import HeadlessClient
+
+PORT = 57999
+
+def main():
+
+    num_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    keystrokes  = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    server = PolyServer(port=PORT)
+    server.running = True
+    server.daemon_threads = True # Don't wait for the connection threads on exit
+
+    for thread in (server.server_thread, server.msg_queue_thread):
+        thread.daemon = True
+        thread.start()
+
+    start = clock()
+
+    clients = [HeadlessClient("localhost", PORT, "bot{}".format(n)) for n in range(num_clients)]
+
+    for client in clients:
+        client.wait_until(lambda: not client.block_messages)
+
+    # The server ignores edits until every client has acknowledged the last one to connect
+
+    while server.waiting_for_ack:
+        time.sleep(0.01)
+
+    print("{} clients connected in {:.3f} s".format(num_clients, clock() - start))
+
+    latency = []
+
+    def type_keys(client):
+        rnd = random.Random(client.id)
+        for _ in range(keystrokes):
+            client.wait_until(lambda: not client.block_messages)
+            sent = clock()
+            client.insert(rnd.choice("abc()\n"), index=rnd.randint(0, len(client.buffers[0].document)))
+            client.wait_until(client.is_synchronised)
+            latency.append((clock() - sent) * 1000.0)
+
+    start = clock()
+
+    threads = [threading.Thread(target=type_keys, args=(client,)) for client in clients]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    # Wait for every operation to reach every client
+
+    size = num_clients * keystrokes
+
+    for client in clients:
+        client.wait_until(lambda: len(client.buffers[0].document) == size, timeout=10)
+
+    print("{} keystrokes in {:.3f} s".format(size, clock() - start))
+
+    report("keystroke acknowledged by the server", latency)
+
+    documents = set(client.buffers[0].document for client in clients)
+
+    print("clients have {} the same document".format("all" if len(documents) == 1 else "NOT"))
+
+    for client in clients:
+        client.kill()
+
+    return
+
+if __name__ == "__main__":
+
+    main()
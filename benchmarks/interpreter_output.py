@@ -0,0 +1,110 @@
+"""
+    Reading interpreter output
+    --------------------------
+
+    Runs a stand-in interpreter (this Python) that prints a burst of
+    lines followed by a prompt with no newline, as ghci does, then echoes
+    each line it is sent. Reports how long the burst takes to reach the
+    console, whether any lines were lost, and the time from evaluating
+    a line to its reply and the next prompt being shown. Doesn't need a
+    display.
+
+        python -m benchmarks.interpreter_output [lines]
+
+"""
+
+from __future__ import absolute_import, print_function
+
+import re
+import sys
+import threading
+
+from . import report, clock
+
+from src.interpreter import Interpreter
+
+CHILD = (
+    "import sys\n"
+    "for i in range({}): sys.stdout.write('-> a Synth %d\\n' % i)\n"
+    "sys.stdout.write('ready> '); sys.stdout.flush()\n"
+    "for line in iter(sys.stdin.readline, ''):\n"
+    "    sys.stdout.write('echo ' + line + 'ready> '); sys.stdout.flush()\n"
+)
+
+class Leader:
+    """ Stands in for the buffer, counting console messages sent to other users """
+    def __init__(self):
+        self.messages = 0
+
+    def send_console_message(self, response):
+        self.messages += 1
+
+class Console:
+    """ Stands in for the console, noting when a line arrives. A reply sent less than
+        `partial_line_delay` after a prompt is shown on the same line as it. """
+    def __init__(self):
+        self.root  = Leader()
+        self.lines = []
+        self.event = threading.Event()
+        self.wait_for = None
+
+    def write(self, string):
+        self.lines.append(string)
+        if self.wait_for is not None and string.endswith(self.wait_for):
+            self.event.set()
+
+    def flush(self):
+        return
+
+class StandIn(Interpreter):
+    name = "StandIn"
+    ready_pattern = re.compile(r"ready>")
+
+    @staticmethod
+    def format(string):
+        return string + "\n"
+
+def main():
+
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    console = Console()
+
+    lang = StandIn('"{}" -u -c "{}"'.format(sys.executable, CHILD.format(num_lines).replace('"', '\\"')))
+
+    start = clock()
+
+    lang.start(out=console)
+
+    lang.ready.wait(60)
+
+    elapsed = (clock() - start) * 1000.0
+
+    received = sum(1 for line in console.lines if line.startswith("-> a Synth"))
+
+    print("{} of {} lines shown in {:.1f} ms, {} console messages sent".format(received, num_lines, elapsed, console.root.messages))
+
+    times = []
+
+    for i in range(20):
+
+        console.event.clear()
+        console.wait_for = "echo {}".format(i)
+
+        start = clock()
+
+        lang.write_stdout(str(i))
+
+        console.event.wait(5)
+
+        times.append((clock() - start) * 1000.0)
+
+    report("evaluate to reply", times)
+
+    lang.kill()
+
+    return
+
+if __name__ == "__main__":
+
+    main()
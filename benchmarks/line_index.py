@@ -0,0 +1,84 @@
+"""
+    Converting between offsets and Tk indices in a 5,000 line document
+    ------------------------------------------------------------------
+
+    Compares the old conversions, which scanned or split the whole
+    document, with a binary search of the line index, and times keeping
+    the line index up to date after a keystroke.
+
+        python -m benchmarks.line_index
+
+"""
+
+from __future__ import absolute_import, print_function
+
+import random
+
+from . import timed, report, foxdot_code
+
+from src.document import LineIndex
+from src.utils import new_operation
+
+LINES = 5000
+
+def walk_to_tcl(text, number):
+    """ Character by character conversion, as number_index_to_tcl used to work """
+    row, col = 1, 0
+    for char in text[:number]:
+        if char == "\n":
+            row, col = row + 1, 0
+        else:
+            col += 1
+    return "{}.{}".format(row, col)
+
+def count_to_tcl(text, number):
+    """ Newline counting conversion """
+    row = text.count("\n", 0, number) + 1
+    col = number - (text.rfind("\n", 0, number) + 1)
+    return "{}.{}".format(row, col)
+
+def split_to_number(text, row, col):
+    """ Split and sum conversion, as tcl_index_to_number used to work """
+    return sum([len(line) + 1 for line in text.split("\n")[:row-1]]) + col
+
+def main():
+
+    text  = "\n".join(foxdot_code(LINES * 60).split("\n")[:LINES])
+    index = LineIndex(text)
+
+    print("{} characters, {} lines".format(len(text), len(index)))
+
+    offsets = [random.randint(0, len(text)) for _ in range(200)]
+    rows    = [index.row_col(offset) for offset in offsets]
+
+    def run(func, values):
+        return lambda: [func(*value) for value in values]
+
+    report("offset -> tcl: walk each character", timed(run(lambda n: walk_to_tcl(text, n), [(n,) for n in offsets[:20]])))
+    report("offset -> tcl: count newlines", timed(run(lambda n: count_to_tcl(text, n), [(n,) for n in offsets])))
+    report("offset -> tcl: line index", timed(run(index.tcl_index, [(n,) for n in offsets])))
+    report("tcl -> offset: split document", timed(run(lambda r, c: split_to_number(text, r, c), rows[:20])))
+    report("tcl -> offset: line index", timed(run(index.offset, rows)))
+
+    print("(times are for {} conversions, or 20 for the whole-document scans)".format(len(offsets)))
+
+    # Keeping the index up to date as peers type
+
+    for name, where in (("start", 0.0), ("middle", 0.5), ("end", 1.0)):
+
+        state = {"size": len(text)}
+
+        def keystroke():
+            pos = int(state["size"] * where)
+            index.apply(new_operation(pos, "x\n", state["size"]))
+            index.apply(new_operation(pos, -2, state["size"] + 2))
+
+        report("line index: type and delete a line at the {}".format(name), timed(keystroke, number=50))
+
+    report("line index: rebuild from the document", timed(lambda: LineIndex(text), number=10))
+
+    return
+
+if __name__ == "__main__":
+
+    main()
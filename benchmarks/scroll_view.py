@@ -0,0 +1,66 @@
+"""
+    Restoring the scroll position in a long buffer
+    ----------------------------------------------
+
+    Compares restoring the view after an operation by scrolling down one
+    line at a time from the top, as reset_view used to, with scrolling
+    straight to the stored top line, at different depths in a 10,000
+    line document. Needs a display.
+
+        python -m benchmarks.scroll_view
+
+"""
+
+from __future__ import absolute_import, print_function
+
+from . import timed, report, foxdot_code
+
+from src.interface.tkimport import Tk
+
+LINES = 10000
+
+def main():
+
+    try:
+
+        root = Tk.Tk()
+
+    except Tk.TclError as e:
+
+        print("Unable to open a Tk window: {}".format(e))
+
+        return
+
+    text = Tk.Text(root, width=100, height=40)
+    text.pack()
+    text.insert("1.0", "\n".join(foxdot_code(LINES * 60).split("\n")[:LINES]))
+    root.update()
+
+    def top_row():
+        return int(text.index("@0,0").split(".")[0])
+
+    for target in (100, 1000, 5000, 9000):
+
+        def scroll_loop():
+            text.yview("moveto", 0.0)
+            for n in range(LINES):
+                if top_row() >= target:
+                    break
+                text.yview("scroll", 1, "units")
+            root.update_idletasks()
+
+        def scroll_direct():
+            text.yview("moveto", 0.0)
+            text.yview("{}.0".format(target))
+            root.update_idletasks()
+
+        report("scroll one line at a time to line {}".format(target), timed(scroll_loop, repeat=3))
+        report("scroll directly to line {}".format(target), timed(scroll_direct, number=20))
+
+    root.destroy()
+
+    return
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,73 @@
+"""
+    Start-up time and memory
+    ------------------------
+
+    Times a fresh Python process importing what `run-server.py` and
+    `run-client.py` import, and reports its peak resident memory (on
+    Unix) and how many modules it loaded. The server should not load
+    Tk, the interface or the OSC library. Nothing is started, so no
+    display or open port is needed.
+
+        python -m benchmarks.startup
+
+"""
+
+from __future__ import absolute_import, print_function
+
+from . import clock, report
+
+import os
+import subprocess
+import sys
+
+RUNS = 10
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = [
+    ("python", "pass"),
+    ("run-server.py", "from src.network.server import PolyServer"),
+    ("src.network", "from src.network import PolyServer"),
+    ("run-client.py", "from src.network.client import Client"),
+]
+
+PROBE = """
+import sys
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss = rss // 1024
+except ImportError:
+    rss = -1
+loaded = [name for name in sys.modules if name.split(".")[0] in ("tkinter", "Tkinter") or name.endswith("OSC3")]
+print(rss, len(sys.modules), ",".join(sorted(loaded)) or "-")
+"""
+
+def run(statement):
+    """ Runs `statement` in a new interpreter and returns (ms, rss kB, modules, heavy modules) """
+    start = clock()
+    output = subprocess.check_output([sys.executable, "-c", statement + "\n" + PROBE], cwd=ROOT)
+    elapsed = (clock() - start) * 1000.0
+    rss, modules, loaded = output.decode().split()
+    return elapsed, int(rss), int(modules), loaded
+
+def main():
+
+    print("{} runs each".format(RUNS))
+
+    for name, statement in ENTRY_POINTS:
+
+        results = [run(statement) for _ in range(RUNS)]
+
+        report("{} start-up".format(name), [result[0] for result in results])
+
+        elapsed, rss, modules, loaded = results[-1]
+
+        print("    peak RSS {} kB, {} modules, Tk/OSC modules: {}".format(rss if rss >= 0 else "n/a", modules, loaded))
+
+    return
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,90 @@
+"""
+    Syntax highlighting per keystroke for FoxDot, Tidal and SuperCollider
+    ---------------------------------------------------------------------
+
+    Times finding the highlighting tags for a 2,000 line buffer in each
+    language: for every line of the document, for the lines in view
+    (plus a margin) when scrolling to a new part of the document, and for
+    the single line a keystroke edits, which is the only line the
+    highlighter re-reads. The Tk tagging itself needs a display and is not
+    included.
+
+        python -m benchmarks.syntax
+
+"""
+
+from __future__ import absolute_import, print_function
+
+from . import timed, report, foxdot_code
+
+from src.document import SyntaxCache
+from src.interpreter import FoxDotInterpreter, TidalInterpreter, SuperColliderInterpreter
+
+LINES    = 2000
+VIEWPORT = 40 + 2 * 50 # visible lines plus the highlighter's margin
+
+def tidal_code(size):
+    block = (
+        "d1 $ sound \"bd*2 [~ bd] sn:3 ~\" # speed \"[1 2]\" -- kick and snare\n"
+        "d2 $ every 4 (fast 2) $ n \"0 .. 7\" # sound \"arpy\" # cutoff (range 200 2000 sine)\n"
+        "d3 $ slow 2 $ sound \"hh*8\" # gain \"0.8 1\"\n"
+        "hush\n"
+        "\n"
+    )
+    return (block * (size // len(block) + 1))[:size]
+
+def supercollider_code(size):
+    block = (
+        "SynthDef(\\sine, { |freq=440, amp=0.2| Out.ar(0, SinOsc.ar(freq) * amp) }).add; // tone\n"
+        "Pbind(\\instrument, \\sine, \\degree, Pseq([0, 2, 4, 7], inf), \\dur, 0.25).play;\n"
+        "s.latency = 0.2; \"a // string\".postln;\n"
+        "\n"
+    )
+    return (block * (size // len(block) + 1))[:size]
+
+def finders(interpreter_class):
+    """ Returns the highlighting functions of an interpreter without starting it """
+    interpreter = interpreter_class.__new__(interpreter_class)
+    interpreter.setup()
+    return {"tag_bold": interpreter.find_keyword, "tag_italic": interpreter.find_comment}
+
+def main():
+
+    for name, cls, code in (("FoxDot", FoxDotInterpreter, foxdot_code),
+                            ("Tidal", TidalInterpreter, tidal_code),
+                            ("SuperCollider", SuperColliderInterpreter, supercollider_code)):
+
+        lines = code(LINES * 80).split("\n")[:LINES]
+        find  = finders(cls)
+
+        def tag_lines(lines):
+            for line in lines:
+                for find_tags in find.values():
+                    find_tags(line)
+
+        def whole_document():
+            tag_lines(lines)
+
+        def viewport():
+            tag_lines(lines[1000:1000 + VIEWPORT])
+
+        cache = SyntaxCache(find)
+
+        for line in lines:
+            cache.tokens(line)
+
+        state = {"line": lines[1000]}
+
+        def keystroke():
+            state["line"] += "x"
+            cache.tokens(state["line"])
+
+        report("{}: every line".format(name), timed(whole_document))
+        report("{}: lines in view".format(name), timed(viewport))
+        report("{}: keystroke (edited line only)".format(name), timed(keystroke, number=100))
+
+    return
+
+if __name__ == "__main__":
+
+    main()
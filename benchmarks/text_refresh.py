@@ -0,0 +1,87 @@
+"""
+    Frame time for a keystroke in a 2,000 line buffer
+    --------------------------------------------------
+
+    Compares re-inserting the whole document into a Tk Text widget after
+    each operation with inserting only the typed character, including
+    the time Tk takes to redisplay the widget. Needs a display.
+
+        python -m benchmarks.text_refresh
+
+"""
+
+from __future__ import absolute_import, print_function
+
+from . import timed, report, foxdot_code
+
+from src.interface.tkimport import Tk
+from src.ot.text_operation import TextOperation
+from src.utils import new_operation
+
+LINES = 2000
+PEERS = 4
+
+def main():
+
+    try:
+
+        root = Tk.Tk()
+
+    except Tk.TclError as e:
+
+        print("Unable to open a Tk window: {}".format(e))
+
+        return
+
+    text = Tk.Text(root, width=100, height=40)
+    text.pack()
+
+    tags = ["text_{}".format(n) for n in range(PEERS)]
+
+    for n, tag in enumerate(tags):
+
+        text.tag_config(tag, foreground=["red", "green", "blue", "orange"][n])
+
+    document = foxdot_code(LINES * 60)
+    state    = {"document": document}
+
+    def tag_runs():
+        """ Gives each 500 character run of the document to a different peer """
+        size = len(state["document"])
+        for n, start in enumerate(range(0, size, 500)):
+            text.tag_add(tags[n % PEERS], "1.0+{}c".format(start), "1.0+{}c".format(min(size, start + 500)))
+
+    text.insert("1.0", document)
+    tag_runs()
+    text.see("1000.0")
+    root.update()
+
+    def keystroke():
+        size = len(state["document"])
+        pos  = size // 2
+        state["document"] = TextOperation(new_operation(pos, "x", size))(state["document"])
+        return pos
+
+    def full_refresh():
+        keystroke()
+        text.delete("1.0", Tk.END)
+        text.insert("1.0", state["document"])
+        tag_runs()
+        text.see("1000.0")
+        root.update_idletasks()
+
+    def incremental():
+        pos = keystroke()
+        text.insert("1.0+{}c".format(pos), "x", (tags[0],))
+        root.update_idletasks()
+
+    report("full refresh per keystroke", timed(full_refresh, number=20))
+    report("incremental insert per keystroke", timed(incremental, number=20))
+
+    root.destroy()
+
+    return
+
+if __name__ == "__main__":
+
+    main()
@@ -10,7 +10,7 @@
     server. 
 
 """
-from src.network import PolyServer
+from src.network.server import PolyServer
 from getpass import getpass
 
 try:
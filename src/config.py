@@ -85,6 +85,25 @@ tag_descriptions = {
     "tag_italic"    : {"font": "ItalicFont"}
     }
 
+# Maximum number of times per second the interface redraws peer labels, line numbers etc
+
+RENDER_FPS = 60
+
+# Number of lines of output kept in each console (0 keeps everything)
+
+CONSOLE_MAX_LINES = 5000
+
+# Console output is forwarded to other users at most once per interval (in seconds),
+# with at most this many lines in each message
+
+CONSOLE_SEND_INTERVAL  = 0.25
+CONSOLE_SEND_MAX_LINES = 200
+
+# Operations that edit at least this many characters, and at least half as many as are
+# in the resulting document, rebuild the document's indices instead of updating them
+
+BULK_EDIT_SIZE = 4096
+
 
 # Public server
 
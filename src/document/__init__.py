@@ -0,0 +1,10 @@
+from __future__ import absolute_import
+
+from .undo import *
+from .authorship import *
+from .cursors import *
+from .line_index import *
+from .syntax import *
+from .brackets import *
+from .blocks import *
+from .edits import *
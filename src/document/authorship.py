@@ -0,0 +1,267 @@
+"""
+    Document/authorship.py
+    ----------------------
+
+    Stores which peer wrote each character of a document as runs of
+    (peer_id, length) instead of one character per character of text.
+    Runs are kept in an implicit treap ordered by their position in the
+    document, so inserting, deleting and finding the run at an offset
+    are O(log n) in the number of runs. Listing the runs in a range is
+    O(log n + k) for k runs, but listing everything one peer wrote walks
+    every run, as runs are not indexed by peer.
+
+"""
+
+from __future__ import absolute_import
+
+from itertools import groupby
+
+import random
+
+from ..utils import _is_retain, _is_insert, get_peer_id_from_char
+
+__all__ = ["AuthorshipIndex"]
+
+class _Run(object):
+    """ Node in the treap: a run of `length` characters written by `author` """
+    __slots__ = ("author", "length", "total", "priority", "left", "right")
+    def __init__(self, author, length, priority=None):
+        self.author   = author
+        self.length   = length
+        self.total    = length
+        self.priority = random.random() if priority is None else priority
+        self.left     = None
+        self.right    = None
+
+def _total(node):
+    return node.total if node is not None else 0
+
+def _update(node):
+    node.total = _total(node.left) + node.length + _total(node.right)
+    return node
+
+def _merge(a, b):
+    """ Joins two treaps where every run in `a` comes before every run in `b` """
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.priority > b.priority:
+        a.right = _merge(a.right, b)
+        return _update(a)
+    else:
+        b.left = _merge(a, b.left)
+        return _update(b)
+
+def _split(node, pos):
+    """ Splits a treap into the runs covering the first `pos` characters and the rest,
+        dividing a run in two if `pos` falls inside it """
+    if node is None:
+        return None, None
+    left_total = _total(node.left)
+    if pos <= left_total:
+        left, right = _split(node.left, pos)
+        node.left = right
+        return left, _update(node)
+    elif pos >= left_total + node.length:
+        left, right = _split(node.right, pos - left_total - node.length)
+        node.right = left
+        return _update(node), right
+    else:
+        offset = pos - left_total
+        tail = _Run(node.author, node.length - offset, node.priority)
+        tail.right, node.right = node.right, None
+        node.length = offset
+        return _update(node), _update(tail)
+
+def _first(node):
+    while node is not None and node.left is not None:
+        node = node.left
+    return node
+
+def _last(node):
+    while node is not None and node.right is not None:
+        node = node.right
+    return node
+
+def _extend_first(node, amount):
+    """ Adds `amount` to the length of the first run """
+    while node is not None:
+        node.total += amount
+        if node.left is None:
+            node.length += amount
+        node = node.left
+    return
+
+def _extend_last(node, amount):
+    """ Adds `amount` to the length of the last run """
+    while node is not None:
+        node.total += amount
+        if node.right is None:
+            node.length += amount
+        node = node.right
+    return
+
+def _pop_first(node):
+    """ Removes the first run and returns it along with the remaining treap """
+    if node.left is None:
+        rest, node.right = node.right, None
+        return node, rest
+    first, node.left = _pop_first(node.left)
+    return first, _update(node)
+
+def _iter_runs(node, offset=0):
+    """ Yields (author, start, end) for each run in order """
+    stack = []
+    while stack or node is not None:
+        if node is not None:
+            stack.append(node)
+            node = node.left
+        else:
+            node = stack.pop()
+            yield node.author, offset, offset + node.length
+            offset += node.length
+            node = node.right
+    return
+
+class AuthorshipIndex:
+    """ Run-length record of which peer wrote each character in a document """
+    def __init__(self):
+        self.root   = None
+        self.counts = {} # peer_id -> number of characters
+
+    @classmethod
+    def from_runs(cls, runs):
+        """ Creates an index from a list of (peer_id, length) pairs """
+        index = cls()
+        for author, length in runs:
+            index.insert(len(index), int(author), int(length))
+        return index
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """ Creates an index from the authorship sent in MSG_SET_ALL / MSG_RESET. This is
+            a list of (peer_id, length) pairs, or from older servers a string with the
+            character of the peer that wrote each character of the document. """
+        if isinstance(snapshot, (list, tuple)):
+            return cls.from_runs(snapshot)
+        return cls.from_runs((get_peer_id_from_char(char), len(list(chars))) for char, chars in groupby(snapshot))
+
+    def __len__(self):
+        return _total(self.root)
+
+    def __iter__(self):
+        return _iter_runs(self.root)
+
+    def runs(self):
+        """ Returns a list of (peer_id, length) pairs that can be sent to clients """
+        return [(author, end - start) for author, start, end in self]
+
+    def authors(self):
+        """ Returns the set of peer ids that have written any part of the document """
+        return set(author for author, count in self.counts.items() if count > 0)
+
+    def count(self, author):
+        """ Returns the number of characters written by a peer """
+        return self.counts.get(author, 0)
+
+    def _add_count(self, author, amount):
+        self.counts[author] = self.counts.get(author, 0) + amount
+        return
+
+    def author_at(self, pos):
+        """ Returns the peer id of the character at `pos` """
+        node = self.root
+        while node is not None:
+            left_total = _total(node.left)
+            if pos < left_total:
+                node = node.left
+            elif pos < left_total + node.length:
+                return node.author
+            else:
+                pos  -= left_total + node.length
+                node = node.right
+        raise IndexError("Authorship index out of range")
+
+    def ranges(self, author):
+        """ Returns a list of (start, end) tuples of the text written by a peer. This visits
+            every run in the document, so is O(n) in the number of runs. """
+        return [(start, end) for run_author, start, end in self if run_author == author]
+
+    def runs_in(self, start, end):
+        """ Yields (peer_id, start, end) for runs overlapping the range, clipped to it, in
+            O(log n + k) for k runs """
+        node, offset, stack = self.root, 0, []
+        # Descend to the first run overlapping `start`, keeping the nodes still to visit
+        while node is not None:
+            left_total = _total(node.left)
+            if start < offset + left_total:
+                stack.append((node, offset + left_total))
+                node = node.left
+            elif start < offset + left_total + node.length:
+                stack.append((node, offset + left_total))
+                node = None
+            else:
+                offset += left_total + node.length
+                node = node.right
+        while stack:
+            node, node_start = stack.pop()
+            if node_start >= end:
+                break
+            node_end = node_start + node.length
+            yield node.author, max(start, node_start), min(end, node_end)
+            # Queue the left spine of the right subtree
+            child, child_offset = node.right, node_end
+            while child is not None:
+                stack.append((child, child_offset + _total(child.left)))
+                child = child.left
+        return
+
+    def insert(self, pos, author, length):
+        """ Records `length` characters inserted by `author` at `pos` """
+        if length <= 0:
+            return
+        left, right = _split(self.root, pos)
+        before, after = _last(left), _first(right)
+        if before is not None and before.author == author:
+            _extend_last(left, length)
+            # Re-join a run that was split to make the insertion
+            if after is not None and after.author == author:
+                first, right = _pop_first(right)
+                _extend_last(left, first.length)
+        elif after is not None and after.author == author:
+            _extend_first(right, length)
+        else:
+            left = _merge(left, _Run(author, length))
+        self.root = _merge(left, right)
+        self._add_count(author, length)
+        return
+
+    def delete(self, pos, length):
+        """ Removes `length` characters starting at `pos` """
+        if length <= 0:
+            return
+        left, rest = _split(self.root, pos)
+        middle, right = _split(rest, length)
+        for author, start, end in _iter_runs(middle):
+            self._add_count(author, start - end)
+        # Join runs by the same peer either side of the deleted text
+        before, after = _last(left), _first(right)
+        if before is not None and after is not None and before.author == after.author:
+            first, right = _pop_first(right)
+            _extend_last(left, first.length)
+        self.root = _merge(left, right)
+        return
+
+    def apply(self, ops, author):
+        """ Applies a list of text operation ops, attributing any inserted text to `author` """
+        pos = 0
+        for op in ops:
+            if _is_retain(op):
+                pos += op
+            elif _is_insert(op):
+                self.insert(pos, author, len(op))
+                pos += len(op)
+            else:
+                self.delete(pos, -op)
+        return
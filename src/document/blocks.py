@@ -0,0 +1,58 @@
+"""
+    Document/blocks.py
+    ------------------
+
+    Finds the block of code to evaluate around a position in a document
+    using the document's line and bracket indices, so no Tk calls are
+    needed. Blocks are returned as [start, end] rows, in the same way as
+    Interpreter.get_block_of_code, where the code is the lines from
+    "start.0" up to (not including) "end.0".
+
+"""
+
+from __future__ import absolute_import
+
+__all__ = ["blank_line_block", "bracket_block"]
+
+def is_blank(document, lines, row):
+    """ Returns True if `row` only contains whitespace or is past the end of the document """
+    if row > len(lines):
+        return True
+    return not document[lines.line_start(row):lines.line_end(row)].strip()
+
+def blank_line_block(document, lines, row):
+    """ Returns the block of lines around `row` that are between blank lines """
+
+    start = row
+
+    while start > 1 and not is_blank(document, lines, start):
+
+        start -= 1
+
+    end = row
+
+    while not is_blank(document, lines, end):
+
+        end += 1
+
+    return [start, end]
+
+def bracket_block(brackets, row, col):
+    """ Returns the lines spanned by the outermost pair of round brackets around (row, col),
+        or just `row` if it is not inside any brackets. `brackets` is a BracketIndex. """
+
+    lines = brackets.lines
+
+    pair, outer = brackets.enclosing(lines.offset(row, col), "("), None
+
+    while pair is not None:
+
+        outer = pair
+
+        pair = brackets.enclosing(pair[0], "(")
+
+    if outer is None:
+
+        return [row, row + 1]
+
+    return [lines.row_col(outer[0])[0], lines.row_col(outer[1])[0] + 1]
@@ -0,0 +1,440 @@
+"""
+    Document/brackets.py
+    --------------------
+
+    Index of the brackets in a document that are not inside a string or a
+    comment, used for finding matching brackets and the brackets that
+    enclose a position without scanning the document.
+
+    The brackets of each line are kept in blocks of about 64 lines. For
+    each kind of bracket, a block stores the sum of its brackets (opening
+    brackets count +1, closing brackets -1) along with the largest suffix
+    sum and smallest prefix sum, and a segment tree over the blocks is
+    descended to find the block that holds a matching bracket in
+    O(log n). Lines are re-read only when an operation edits them, and
+    adding or removing lines only changes the blocks they are in.
+
+    Strings and comments end at the end of a line.
+
+"""
+
+from __future__ import absolute_import
+
+from bisect import bisect_left, bisect_right
+
+import re
+
+from ..utils import _is_retain, _is_insert
+from .line_index import LineIndex
+
+__all__ = ["BracketIndex"]
+
+PAIRS = {"(": ")", "[": "]", "{": "}"}
+
+KINDS = dict(list((left, left) for left in PAIRS) + list((right, left) for left, right in PAIRS.items()))
+
+EMPTY = (0, 0, 0) # sum, largest suffix sum, smallest prefix sum
+
+BLOCK = 64 # Number of lines in a block
+
+def combine(a, b):
+    """ Joins the values of two adjacent line ranges, `a` before `b` """
+    return (a[0] + b[0], max(b[1], b[0] + a[1]), min(a[2], a[0] + b[2]))
+
+class BracketIndex:
+    """ Positions of the brackets outside of strings and comments in a document.
+        `comment` is the string that starts a comment in the language, e.g. "#",
+        and `quotes` are the characters that start and end strings. """
+    def __init__(self, text="", comment=None, quotes="'\""):
+        self.comment = comment
+        self.quotes  = quotes
+
+        # Strings and comments are matched so that the brackets inside them are skipped
+
+        patterns = [r"{0}(?:\\.|[^{0}\\])*(?:{0}|$)".format(re.escape(q)) for q in quotes]
+
+        if comment:
+
+            patterns.append(re.escape(comment) + ".*")
+
+        patterns.append(r"(?P<bracket>[()\[\]{}])")
+
+        self.regex = re.compile("|".join(patterns))
+
+        self.lines = LineIndex()
+        self.set_text(text)
+
+    def set_text(self, text):
+        """ Rebuilds the index from the whole document """
+        self.text = text
+        self.lines.set_text(text)
+        rows = [self.read_line(line) for line in text.split("\n")]
+        self.blocks = [rows[i:i + BLOCK] for i in range(0, len(rows), BLOCK)]
+        self.values = [self.block_values(block) for block in self.blocks]
+        self.update_firsts()
+        self.build()
+        self.restructured = False
+        return
+
+    def read_line(self, line):
+        """ Returns a tuple of (column, bracket) for the brackets in a line of code """
+        return tuple((match.start(), match.group("bracket")) for match in self.regex.finditer(line) if match.group("bracket"))
+
+    def row(self, row):
+        """ Returns the brackets in `row` """
+        b, j = self.locate(row)
+        return self.blocks[b][j]
+
+    def __len__(self):
+        """ Returns the number of lines in the document """
+        return self.firsts[-1] + len(self.blocks[-1])
+
+    # Blocks
+    # ======
+
+    @staticmethod
+    def block_values(block):
+        """ Returns a dictionary of kind of bracket -> (sum, largest suffix sum, smallest
+            prefix sum) for a block of rows """
+        total = dict.fromkeys(PAIRS, 0)
+        low   = dict.fromkeys(PAIRS, 0)
+        for brackets in block:
+            for _, char in brackets:
+                kind = KINDS[char]
+                if char == kind:
+                    total[kind] += 1
+                else:
+                    total[kind] -= 1
+                    low[kind] = min(low[kind], total[kind])
+        # The largest suffix sum is the total less the smallest prefix sum
+        return dict((kind, (total[kind], total[kind] - low[kind], low[kind])) for kind in PAIRS)
+
+    def update_firsts(self):
+        """ Stores the (zero-based) first row of each block """
+        self.firsts, row = [], 0
+        for block in self.blocks:
+            self.firsts.append(row)
+            row += len(block)
+        return
+
+    def locate(self, row):
+        """ Returns the block that holds `row` and the position of the row in it """
+        b = bisect_right(self.firsts, row - 1) - 1
+        return b, row - 1 - self.firsts[b]
+
+    def rebalance(self, b):
+        """ Splits block `b` if it has grown too large, or joins it to the next block
+            if it has become small. Sets `self.restructured` if the blocks after `b`
+            have moved, as their leaves in the tree are then out of date. """
+        block = self.blocks[b]
+        if len(block) < BLOCK // 2 and b + 1 < len(self.blocks):
+            block = block + self.blocks[b + 1]
+            self.blocks[b:b + 2] = [block]
+            self.values[b:b + 2] = [None]
+            self.restructured = True
+        if len(block) > 2 * BLOCK:
+            self.blocks[b:b + 1] = [block[i:i + BLOCK] for i in range(0, len(block), BLOCK)]
+            self.values[b:b + 1] = [None] * ((len(block) + BLOCK - 1) // BLOCK)
+            self.restructured = True
+        elif len(block) == 0 and len(self.blocks) > 1:
+            del self.blocks[b]
+            del self.values[b]
+            self.restructured = True
+        return
+
+    def insert_rows(self, row, count):
+        """ Adds `count` empty rows after `row` """
+        b, j = self.locate(row)
+        self.blocks[b][j + 1:j + 1] = [()] * count
+        self.values[b] = None
+        self.rebalance(b)
+        self.update_firsts()
+        return
+
+    def delete_rows(self, row, count):
+        """ Removes the `count` rows after `row` """
+        while count > 0:
+            b, j = self.locate(row + 1)
+            block = self.blocks[b]
+            size = min(count, len(block) - j)
+            del block[j:j + size]
+            self.values[b] = None
+            count -= size
+            self.rebalance(b)
+            self.update_firsts()
+        return
+
+    # Segment tree
+    # ============
+
+    def build(self):
+        """ Rebuilds the segment tree over the blocks for each kind of bracket """
+        size = 1
+        while size < len(self.blocks):
+            size *= 2
+        self.size = size
+        self.trees = {}
+        for kind in PAIRS:
+            tree = [EMPTY] * (2 * size)
+            for i, values in enumerate(self.values):
+                tree[size + i] = values[kind]
+            for i in range(size - 1, 0, -1):
+                tree[i] = combine(tree[2 * i], tree[2 * i + 1])
+            self.trees[kind] = tree
+        return
+
+    def update_block(self, b):
+        """ Updates the values of block `b` in the tree """
+        for kind, tree in self.trees.items():
+            node = self.size + b
+            if tree[node] == self.values[b][kind]:
+                continue
+            tree[node] = self.values[b][kind]
+            node //= 2
+            while node > 0:
+                tree[node] = combine(tree[2 * node], tree[2 * node + 1])
+                node //= 2
+        return
+
+    def nodes(self, start, end):
+        """ Returns the tree nodes that cover the blocks from `start` to `end` (end
+            exclusive) in order """
+        left, right = [], []
+        lo, hi = self.size + start, self.size + end
+        while lo < hi:
+            if lo & 1:
+                left.append(lo)
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                right.append(hi)
+            lo //= 2
+            hi //= 2
+        return left + right[::-1]
+
+    # Updating from operations
+    # ========================
+
+    def apply(self, ops, text):
+        """ Updates the index from a list of text operation ops, where `text` is the
+            document after the operation has been applied """
+
+        self.text = text
+
+        self.restructured = False
+
+        pos, changed = 0, []
+
+        for op in ops:
+
+            if _is_retain(op):
+
+                pos += op
+
+                continue
+
+            row = self.lines.row_col(pos)[0]
+
+            if _is_insert(op):
+
+                added = op.count("\n")
+
+                self.lines.insert(pos, op)
+
+                pos += len(op)
+
+            else:
+
+                added = row - self.lines.row_col(pos - op)[0]
+
+                self.lines.delete(pos, -op)
+
+            # Lines after the edit move by the number of lines added
+
+            if added > 0:
+
+                self.insert_rows(row, added)
+
+            elif added < 0:
+
+                self.delete_rows(row, -added)
+
+            if added != 0:
+
+                changed = [max(r + added, row) if r > row else r for r in changed]
+
+            changed.extend(range(row, row + max(added, 0) + 1))
+
+        # Re-read the edited lines
+
+        for row in set(changed):
+
+            if 0 < row <= len(self):
+
+                b, j = self.locate(row)
+
+                brackets = self.read_line(self.text[self.lines.line_start(row):self.lines.line_end(row)])
+
+                if brackets != self.blocks[b][j]:
+
+                    self.blocks[b][j] = brackets
+
+                    self.values[b] = None
+
+        # Update the blocks that changed
+
+        for b, block in enumerate(self.blocks):
+
+            if self.values[b] is None:
+
+                self.values[b] = self.block_values(block)
+
+                if not self.restructured:
+
+                    self.update_block(b)
+
+        # Blocks were split, joined or removed so the leaves no longer line up with them
+
+        if self.restructured:
+
+            self.build()
+
+        return
+
+    # Queries
+    # =======
+
+    def bracket_at(self, offset):
+        """ Returns the row, the position in the row's list of brackets, and the bracket
+            at `offset`, or None if there is no bracket outside a string or comment there """
+        row, col = self.lines.row_col(offset)
+        brackets = self.row(row)
+        i = bisect_left(brackets, (col,))
+        if i < len(brackets) and brackets[i][0] == col:
+            return row, i, brackets[i][1]
+        return None
+
+    def search_block(self, b, j, i, kind, depth, forward):
+        """ Moves through block `b` from the i-th bracket of its j-th row, forwards or
+            backwards, until `depth` unmatched brackets of `kind` have been found.
+            Returns the offset of the last one (or None) and the depth left to find. """
+        block = self.blocks[b]
+        for k in (range(j, len(block)) if forward else range(j, -1, -1)):
+            brackets = block[k]
+            if k == j:
+                brackets = brackets[i + 1:] if forward else brackets[:i]
+            for col, char in (brackets if forward else reversed(brackets)):
+                if KINDS[char] == kind:
+                    depth += 1 if (char == kind) == forward else -1
+                    if depth == 0:
+                        return self.lines.offset(self.firsts[b] + k + 1, col), depth
+        return None, depth
+
+    def find_open(self, row, i, kind):
+        """ Returns the offset of the unmatched opening bracket of `kind` that comes
+            before the i-th bracket of `row`, or None """
+
+        b, j = self.locate(row)
+
+        # Search the rest of the block, then find the block before it that has the bracket
+
+        found, depth = self.search_block(b, j, i, kind, 1, False)
+
+        if found is not None:
+
+            return found
+
+        tree = self.trees[kind]
+
+        for node in reversed(self.nodes(0, b)):
+
+            if tree[node][1] < depth:
+                depth -= tree[node][0]
+                continue
+
+            while node < self.size:
+                node = 2 * node + 1
+                if tree[node][1] < depth:
+                    depth -= tree[node][0]
+                    node -= 1
+
+            b = node - self.size
+
+            return self.search_block(b, len(self.blocks[b]) - 1, len(self.blocks[b][-1]), kind, depth, False)[0]
+
+        return None
+
+    def find_close(self, row, i, kind):
+        """ Returns the offset of the unmatched closing bracket of `kind` that comes
+            after the i-th bracket of `row`, or None """
+
+        b, j = self.locate(row)
+
+        found, depth = self.search_block(b, j, i, kind, 1, True)
+
+        if found is not None:
+
+            return found
+
+        tree = self.trees[kind]
+
+        for node in self.nodes(b + 1, len(self.blocks)):
+
+            if tree[node][2] > -depth:
+                depth += tree[node][0]
+                continue
+
+            while node < self.size:
+                node = 2 * node
+                if tree[node][2] > -depth:
+                    depth += tree[node][0]
+                    node += 1
+
+            b = node - self.size
+
+            return self.search_block(b, 0, -1, kind, depth, True)[0]
+
+        return None
+
+    def match(self, offset):
+        """ Returns the offset of the bracket that matches the bracket at `offset`, or
+            None if there isn't a bracket at `offset` or it has no match """
+        found = self.bracket_at(offset)
+        if found is None:
+            return None
+        row, i, char = found
+        if char in PAIRS:
+            return self.find_close(row, i, char)
+        return self.find_open(row, i, KINDS[char])
+
+    def enclosing(self, offset, kinds="([{"):
+        """ Returns the offsets of the innermost pair of brackets, of one of `kinds`, around
+            the cursor position `offset`, i.e. between the characters at `offset - 1` and
+            `offset`, or None. Opening brackets that are never closed are skipped. """
+
+        row, col = self.lines.row_col(offset)
+        i = bisect_left(self.row(row), (col,))
+
+        best = None
+
+        for kind in kinds:
+
+            start = self.find_open(row, i, kind)
+
+            # Move outwards until an opening bracket of this kind is closed
+
+            while start is not None and (best is None or start > best[0]):
+
+                start_row, start_i, _ = self.bracket_at(start)
+
+                end = self.find_close(start_row, start_i, kind)
+
+                if end is not None:
+
+                    best = (start, end)
+
+                    break
+
+                start = self.find_open(start_row, start_i, kind)
+
+        return best
@@ -0,0 +1,100 @@
+"""
+    Document/cursors.py
+    -------------------
+
+    Keeps the locations of the peers in a single document sorted by their
+    index so that an operation can find and shift every peer after the
+    edit point in one pass, instead of checking each peer in turn.
+
+"""
+
+from __future__ import absolute_import
+
+from bisect import bisect_left, bisect_right, insort
+
+__all__ = ["CursorIndex"]
+
+class CursorIndex:
+    """ Sorted index of (location, peer_id) pairs for one document """
+    def __init__(self):
+        self.locations = {} # peer_id -> location
+        self.cursors   = [] # sorted list of (location, peer_id)
+
+    def __len__(self):
+        return len(self.cursors)
+
+    def __contains__(self, peer_id):
+        return peer_id in self.locations
+
+    def __iter__(self):
+        """ Yields (location, peer_id) pairs in document order """
+        return iter(list(self.cursors))
+
+    def get(self, peer_id, default=None):
+        """ Returns the location of a peer """
+        return self.locations.get(peer_id, default)
+
+    def set(self, peer_id, location):
+        """ Adds a peer at `location` or moves it there if it is already in the index """
+        if self.locations.get(peer_id) == location:
+            return
+        self.remove(peer_id)
+        self.locations[peer_id] = location
+        insort(self.cursors, (location, peer_id))
+        return
+
+    def remove(self, peer_id):
+        """ Removes a peer from the index, if present """
+        location = self.locations.pop(peer_id, None)
+        if location is not None:
+            i = bisect_left(self.cursors, (location, peer_id))
+            del self.cursors[i]
+        return
+
+    def between(self, start, end):
+        """ Returns a list of the peer ids located strictly between `start` and `end` """
+        i = bisect_right(self.cursors, (start, float("inf")))
+        j = bisect_left(self.cursors, (end, float("-inf")))
+        return [peer_id for _, peer_id in self.cursors[i:j]]
+
+    def shift(self, location, amount, exclude=None):
+        """ Moves every peer after `location` by `amount`, without moving any peer to
+            before `location`, and returns a list of (peer_id, new_location) for the
+            peers that moved. The peer `exclude` is left where it is. """
+
+        if amount == 0:
+
+            return []
+
+        i = bisect_right(self.cursors, (location, float("inf")))
+
+        moved, kept = [], []
+
+        for old, peer_id in self.cursors[i:]:
+
+            if peer_id == exclude:
+
+                kept.append((old, peer_id))
+
+            else:
+
+                new = max(location, old + amount)
+
+                self.locations[peer_id] = new
+
+                moved.append((new, peer_id))
+
+        # Shifting keeps the moved peers in order relative to each other, so they only need
+        # re-sorting when a peer was excluded or they were clamped on top of other peers
+
+        if kept or amount < 0:
+
+            j = bisect_left(self.cursors, (location, float("-inf")))
+
+            self.cursors[j:] = sorted(self.cursors[j:i] + moved + kept)
+
+        else:
+
+            self.cursors[i:] = moved
+
+        return [(peer_id, new) for new, peer_id in moved]
@@ -0,0 +1,47 @@
+"""
+    Document/edits.py
+    -----------------
+
+    Turns a text operation into the inserts and deletes to make to a Tk
+    text widget that holds the document, so only the text that changed
+    is touched. Positions are (row, column) pairs, as in Tk indices.
+
+"""
+
+from __future__ import absolute_import
+
+from ..utils import _is_retain, _is_insert
+
+__all__ = ["widget_edits"]
+
+def widget_edits(ops, document, lines):
+    """ Returns a list of ("insert", row, col, text) and ("delete", row, col, text) edits
+        that apply text operation ops to a widget containing `document`, in the order
+        they should be made. `lines` is a LineIndex of the document after the operation.
+        Everything before the position of an edit is already up to date when it is made,
+        so positions are taken from `lines`. """
+
+    edits = []
+
+    pos, old = 0, 0 # position in the new and the old document
+
+    for op in ops:
+
+        if _is_retain(op):
+
+            pos += op
+            old += op
+
+        elif _is_insert(op):
+
+            edits.append(("insert",) + lines.row_col(pos) + (op,))
+
+            pos += len(op)
+
+        else:
+
+            edits.append(("delete",) + lines.row_col(pos) + (document[old:old - op],))
+
+            old -= op
+
+    return edits
@@ -0,0 +1,107 @@
+"""
+    Document/line_index.py
+    ----------------------
+
+    Keeps a sorted list of the offset at which each line of a document
+    starts so that character offsets can be converted to and from
+    (row, column) pairs with a binary search. The list is updated from
+    each text operation instead of being rebuilt from the document.
+
+"""
+
+from __future__ import absolute_import
+
+from bisect import bisect_right
+
+from ..utils import _is_retain, _is_insert
+
+__all__ = ["LineIndex"]
+
+class LineIndex:
+    """ Offsets of the start of each line in a document. Rows start at 1 and
+        columns at 0, as in Tk text indices. """
+    def __init__(self, text=""):
+        self.set_text(text)
+
+    def set_text(self, text):
+        """ Rebuilds the index from the whole document """
+        starts = [0]
+        pos = text.find("\n")
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = text.find("\n", pos + 1)
+        self.starts = starts
+        self.length = len(text)
+        return
+
+    def __len__(self):
+        """ Returns the number of lines in the document """
+        return len(self.starts)
+
+    def line_start(self, row):
+        """ Returns the offset of the first character in `row` """
+        row = min(max(row, 1), len(self.starts))
+        return self.starts[row - 1]
+
+    def line_end(self, row):
+        """ Returns the offset of the newline (or end of document) that ends `row` """
+        if row >= len(self.starts):
+            return self.length
+        return self.starts[max(row, 1)] - 1
+
+    def row_col(self, offset):
+        """ Converts a character offset into a (row, column) pair """
+        offset = min(max(offset, 0), self.length)
+        row = bisect_right(self.starts, offset)
+        return row, offset - self.starts[row - 1]
+
+    def tcl_index(self, offset):
+        """ Converts a character offset into a Tk index string e.g. "1.0" """
+        return "{}.{}".format(*self.row_col(offset))
+
+    def offset(self, row, col):
+        """ Converts a (row, column) pair into a character offset. Columns past the end
+            of the line are clamped to the end of the line, as Tk does. """
+        if row < 1:
+            return 0
+        if row > len(self.starts):
+            return self.length
+        return self.starts[row - 1] + min(max(col, 0), self.line_end(row) - self.starts[row - 1])
+
+    def insert(self, pos, text):
+        """ Updates the index for `text` inserted at `pos` """
+        if len(text) == 0:
+            return
+        i = bisect_right(self.starts, pos)
+        size = len(text)
+        new_lines = []
+        nl = text.find("\n")
+        while nl != -1:
+            new_lines.append(pos + nl + 1)
+            nl = text.find("\n", nl + 1)
+        self.starts[i:] = new_lines + [start + size for start in self.starts[i:]]
+        self.length += size
+        return
+
+    def delete(self, pos, size):
+        """ Updates the index for `size` characters deleted from `pos` """
+        if size <= 0:
+            return
+        i = bisect_right(self.starts, pos)
+        j = bisect_right(self.starts, pos + size)
+        self.starts[i:] = [start - size for start in self.starts[j:]]
+        self.length -= size
+        return
+
+    def apply(self, ops):
+        """ Updates the index from a list of text operation ops """
+        pos = 0
+        for op in ops:
+            if _is_retain(op):
+                pos += op
+            elif _is_insert(op):
+                self.insert(pos, op)
+                pos += len(op)
+            else:
+                self.delete(pos, -op)
+        return
@@ -0,0 +1,53 @@
+"""
+    Document/syntax.py
+    ------------------
+
+    Finds the syntax highlighting tags for single lines of code using the
+    functions an Interpreter provides in its `re` dictionary, e.g.
+    {"tag_bold": find_keyword, "tag_italic": find_comment}. Results are
+    cached by the contents of the line, so lines that have been seen
+    before (or that an edit did not change) are not searched again.
+
+"""
+
+from __future__ import absolute_import
+
+__all__ = ["SyntaxCache"]
+
+class SyntaxCache:
+    """ Cache of line contents -> tuple of (tag_name, start, end) """
+    def __init__(self, finders, size=10000):
+        self.finders = sorted(finders.items())
+        self.tags    = [tag_name for tag_name, _ in self.finders]
+        self.size    = size
+        self.cache   = {}
+        self.hits    = 0
+        self.misses  = 0
+
+    def __len__(self):
+        return len(self.cache)
+
+    def tokens(self, line):
+        """ Returns a tuple of (tag_name, start, end) for a line of text """
+        try:
+            result = self.cache[line]
+            self.hits += 1
+            return result
+        except KeyError:
+            pass
+        self.misses += 1
+        result = tuple(
+            (tag_name, start, end)
+            for tag_name, find in self.finders
+            for start, end in find(line)
+            if end > start
+        )
+        # Discard everything once full rather than tracking the least recently used lines
+        if len(self.cache) >= self.size:
+            self.cache.clear()
+        self.cache[line] = result
+        return result
+
+    def clear(self):
+        self.cache.clear()
+        return
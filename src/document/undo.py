@@ -0,0 +1,142 @@
+"""
+    Document/undo.py
+    ----------------
+
+    Undo and redo history for a text buffer. Entries are not transformed
+    every time another peer edits the document. Instead each entry is
+    tagged with the number of remote operations seen when it was stored
+    and is only rebased against the operations that arrived since then
+    when the user actually asks to undo / redo. Once more than `max_log`
+    remote operations are logged, the oldest entries are rebased up to a
+    more recent revision so the start of the log can be removed.
+
+"""
+
+from __future__ import absolute_import
+
+from collections import deque
+
+from ..utils import new_operation, get_doc_size
+from ..ot.text_operation import TextOperation
+
+__all__ = ["UndoHistory"]
+
+class UndoHistory:
+    """ Stores undo / redo operations and a log of remote operations to rebase them against """
+    def __init__(self, max_size=50, max_log=1000):
+
+        self.max_size = max_size
+        self.max_log  = max_log
+
+        # Stacks of (operation, revision) pairs
+
+        self.undo_stack = deque(maxlen=max_size)
+        self.redo_stack = deque(maxlen=max_size)
+
+        # Remote operations as (operation, doc_size) pairs. `log_start` is the
+        # revision of the first item in the log
+
+        self.log       = []
+        self.log_start = 0
+
+    def __len__(self):
+        return len(self.undo_stack)
+
+    def revision(self):
+        """ Returns the number of remote operations seen so far """
+        return self.log_start + len(self.log)
+
+    def has_undo(self):
+        return len(self.undo_stack) > 0
+
+    def has_redo(self):
+        return len(self.redo_stack) > 0
+
+    def push_undo(self, operation):
+        """ Adds an operation to the undo stack, unless it is empty """
+        if not len(operation.ops):
+            return
+        self.undo_stack.append((operation, self.revision()))
+        self.trim_log()
+        return
+
+    def push_redo(self, operation):
+        """ Adds an operation to the redo stack """
+        self.redo_stack.append((operation, self.revision()))
+        self.trim_log()
+        return
+
+    def clear_redo(self):
+        self.redo_stack.clear()
+        self.trim_log()
+        return
+
+    def clear(self):
+        """ Removes all undo / redo operations and the remote log """
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.log       = []
+        self.log_start = 0
+        return
+
+    def add_remote(self, operation, doc_size):
+        """ Stores an operation made by another peer. `doc_size` is the length of the
+            document the operation is applied to. This is O(1) regardless of the
+            depth of the stacks. """
+        if len(self.undo_stack) or len(self.redo_stack):
+            self.log.append((operation, doc_size))
+            if len(self.log) > self.max_log:
+                self.rebase_to(self.revision() - self.max_log // 2)
+        else:
+            self.log_start += len(self.log) + 1
+            self.log = []
+        return
+
+    def oldest_revision(self):
+        """ Returns the revision of the oldest entry in either stack """
+        revisions = [stack[0][1] for stack in (self.undo_stack, self.redo_stack) if len(stack)]
+        return min(revisions) if revisions else self.revision()
+
+    def rebase_to(self, revision):
+        """ Transforms the undo / redo entries stored before `revision` against the remote
+            operations up to `revision`, so the log before it is no longer needed """
+        for stack in (self.undo_stack, self.redo_stack):
+            for i, (operation, stored) in enumerate(stack):
+                if stored >= revision:
+                    break
+                for other, doc_size in self.log[stored - self.log_start:revision - self.log_start]:
+                    operation = self.transform(operation, other, doc_size)
+                stack[i] = (operation, revision)
+        self.trim_log()
+        return
+
+    def trim_log(self):
+        """ Removes remote operations that no entry needs to be rebased against """
+        drop = self.oldest_revision() - self.log_start
+        if drop > 0:
+            del self.log[:drop]
+            self.log_start += drop
+        return
+
+    def pop_undo(self):
+        """ Removes the last undo operation and returns it rebased against the current document """
+        return self.rebase(*self.undo_stack.pop())
+
+    def pop_redo(self):
+        """ Removes the last redo operation and returns it rebased against the current document """
+        return self.rebase(*self.redo_stack.pop())
+
+    def rebase(self, operation, revision):
+        """ Transforms `operation` against each remote operation received after `revision` """
+        for other, doc_size in self.log[revision - self.log_start:]:
+            operation = self.transform(operation, other, doc_size)
+        self.trim_log()
+        return operation
+
+    @staticmethod
+    def transform(operation, other, doc_size):
+        """ Transforms two TextOperations and adjusts the first for the length of the document """
+        size = max(get_doc_size(operation.ops), doc_size)
+        op1 = TextOperation(new_operation(*(list(operation.ops) + [size])))
+        op2 = TextOperation(new_operation(*(list(other.ops) + [size])))
+        return TextOperation.transform(op1, op2)[0]
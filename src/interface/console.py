@@ -18,7 +18,7 @@ def find_colour(string):
     return re_colour.search(string)
 
 class Console(Tk.Text):
-    def __init__(self, root, **kwargs):
+    def __init__(self, root, max_lines=CONSOLE_MAX_LINES, **kwargs):
         # Inherit
         Tk.Text.__init__(self, root, **kwargs)
 
@@ -29,6 +29,12 @@ class Console(Tk.Text):
         # Queue waits for messages to be added to the console
         self.queue = queue.Queue()
 
+        # Lines of output to keep, older lines are removed from the top
+        self.max_lines = max_lines
+
+        # Most lines added in a single frame, the rest wait for the next one
+        self.batch_size = 1000
+
         # By default, don't allow keypresses
         self.bind("<Key>", self.null)
         
@@ -43,14 +49,33 @@ class Console(Tk.Text):
 
         self.colours = {}
 
-        self.update_me()
-
     def null(self, event):
         return "break"
 
+    def schedule_update(self):
+        """ Adds any queued text in the next frame """
+        self.root.root.scheduler.request(("console", self.root.id), self.update_me)
+        return
+
+    def get_colour_tag(self, colour):
+        """ Returns the name of the tag for a foreground colour, creating it if needed """
+
+        if colour not in self.colours:
+
+            self.colours[colour] = "tag_%s" % colour
+
+            self.tag_config(self.colours[colour], foreground=colour)
+
+        return self.colours[colour]
+
     def update_me(self):
+        """ Adds the text waiting in the queue to the console with a single insert """
+
+        args = []
+
         try:
-            while True:
+
+            for _ in range(self.batch_size):
                 
                 string = self.queue.get_nowait().rstrip() # Remove trailing whitespace
                 
@@ -58,42 +83,49 @@ class Console(Tk.Text):
 
                 if match:
 
-                    self.mark_set(Tk.INSERT, Tk.END)
+                    args.extend((match.group("c_text"), self.get_colour_tag(match.group("colour"))))
 
-                    colour = match.group("colour")
-                    c_text = match.group("c_text")
                     string = match.group("string")
 
-                    start = self.index(Tk.INSERT)
-                    self.insert(Tk.INSERT, c_text)
-                    end   = self.index(Tk.INSERT)
+                args.extend((string + "\n", ()))
 
-                    # Add tag
+            # More text is waiting, so add it in the next frame
 
-                    if colour not in self.colours:
+            self.schedule_update()
 
-                        self.colours[colour] = "tag_%s" % colour
+        except queue.Empty:
 
-                        self.tag_config(self.colours[colour], foreground=colour)
+            pass
 
-                    self.tag_add(self.colours[colour], start, end)
+        if len(args):
 
-                self.insert(Tk.END, string + "\n")
+            self.insert(Tk.END, *args)
 
-                self.see(Tk.END)
+            self.trim()
 
-                self.update_idletasks()
+            self.see(Tk.END)
 
-        except queue.Empty:
+        return
 
-            pass
-        
-        self.after(100, self.update_me)
+    def trim(self):
+        """ Removes the oldest lines if there are more than `self.max_lines` """
+
+        if self.max_lines > 0:
+
+            num_lines = int(self.index("end-1c").split(".")[0])
+
+            if num_lines > self.max_lines:
+
+                self.delete("1.0", "{}.0".format(num_lines - self.max_lines + 1))
+
+        return
 
     def write(self, string):        
-        """ Adds a string to the console queue """
+        """ Adds a string to the console queue. Text is written from other threads,
+            which wake the Tk loop through the interface to schedule an update. """
         if string != "\n":
             self.queue.put(string)
+            self.root.root.wake_console(self)
         return
 
     def flush(self, *args, **kwargs):
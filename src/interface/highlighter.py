@@ -0,0 +1,89 @@
+from __future__ import absolute_import
+
+from ..document import SyntaxCache
+
+class Highlighter:
+    """ Applies syntax highlighting tags to the lines of a ThreadSafeText that are on
+        screen, plus `margin` lines either side. Tags stay attached to text in Tk as it
+        moves, so a line is only re-tagged when it is edited or first scrolled into view. """
+    def __init__(self, text, finders, margin=50):
+        self.text   = text
+        self.cache  = SyntaxCache(finders)
+        self.margin = margin
+
+        # Row -> contents of the line when it was tagged
+
+        self.tagged = {}
+
+    def reset(self):
+        """ Forget which lines are tagged, e.g. when the whole document is replaced """
+        self.tagged = {}
+        return
+
+    def shift(self, row, amount):
+        """ Moves the record of tagged lines after `row` by `amount` rows """
+        if amount != 0:
+            self.tagged = dict((r + amount if r > row else r, line) for r, line in self.tagged.items())
+        return
+
+    def insert(self, row, newlines):
+        """ Call when text containing `newlines` line breaks is inserted at `row` """
+        self.tagged.pop(row, None)
+        self.shift(row, newlines)
+        return
+
+    def delete(self, row, newlines):
+        """ Call when text containing `newlines` line breaks is deleted from `row` """
+        for r in range(row, row + newlines + 1):
+            self.tagged.pop(r, None)
+        self.shift(row + newlines, -newlines)
+        return
+
+    def get_line(self, row):
+        """ Returns the contents of a line from the document """
+        lines = self.text.lines
+        return self.text.document[lines.line_start(row):lines.line_end(row)]
+
+    def colour_line(self, row):
+        """ Replaces the syntax tags on a single line """
+
+        line = self.get_line(row)
+
+        for tag_name in self.cache.tags:
+
+            self.text.tag_remove(tag_name, "{}.0".format(row), "{}.end".format(row))
+
+        for tag_name, start, end in self.cache.tokens(line):
+
+            self.text.tag_add(tag_name, "{}.{}".format(row, start), "{}.{}".format(row, end))
+
+        self.tagged[row] = line
+
+        return
+
+    def update(self):
+        """ Tags any lines in view that have changed since they were last tagged """
+
+        if not self.cache.tags:
+
+            return
+
+        top    = max(1, self.text.get_visible_row_top() - self.margin)
+        bottom = min(self.text.get_num_lines(), self.text.get_visible_row_bottom() + self.margin)
+
+        for row in range(top, bottom + 1):
+
+            if self.tagged.get(row) != self.get_line(row):
+
+                self.colour_line(row)
+
+        # Forget about lines well out of view so the record stays small. They are
+        # re-tagged (using the cache) if scrolled back into view.
+
+        if len(self.tagged) > 4 * (bottom - top + 1):
+
+            low, high = top - self.margin, bottom + self.margin
+
+            self.tagged = dict((r, line) for r, line in self.tagged.items() if low <= r <= high)
+
+        return
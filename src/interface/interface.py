@@ -12,6 +12,9 @@ from .menu_bar import MenuBar, PopupMenu
 from .textbuffer import BufferTab
 from .drag import VerticalDragbar
 from .status_bar import StatusBar
+from .scheduler import RenderScheduler
+from .wakeup import TkWaker, LatencyStats
+from .profile import profiler, clock
 
 from .tkimport import Tk, tkFont
 
@@ -20,6 +23,8 @@ import time
 import sys
 import webbrowser
 
+from threading import Lock
+
 try:
     
     import queue
@@ -48,6 +53,10 @@ class BasicInterface:
         self.waiting  = None
         self.msg_id   = 0
 
+        # Messages can be queued from other threads, e.g. console output from a Timer
+
+        self.msg_lock = Lock()
+
         # Store information about the last key pressed
         self.last_keypress  = ""
         self.last_row       = 0
@@ -57,8 +66,6 @@ class BasicInterface:
 
     def run(self):
         """ Starts the Tkinter loop and exits cleanly if interrupted"""
-        # Continually check for messages to be sent
-        self.client.update_send()
         self.client.input.mainloop()
         return
 
@@ -89,6 +96,10 @@ class Interface(BasicInterface):
 
         self.queue = queue.Queue()
 
+        # Redraws are requested by widgets and performed at most once per frame
+
+        self.scheduler = RenderScheduler(self.root, RENDER_FPS)
+
         # Define message handlers
 
         self.handles = {}
@@ -199,7 +210,18 @@ class Interface(BasicInterface):
 
         self.root.after(200, set_widths)
 
-        # Begin listening for messages
+        # Begin listening for messages. The Receiver thread wakes the Tk loop when
+        # messages are added to the queue, which are handled for up to 10ms at a time.
+        # Consoles written to from interpreter threads share the same waker.
+
+        self.dispatch_budget = 0.01
+
+        self.latency = LatencyStats()
+
+        self.waiting_consoles = set()
+        self.console_lock     = Lock()
+
+        self.waker = TkWaker(self.root, self.on_wake)
 
         self.listen()
 
@@ -218,8 +240,25 @@ class Interface(BasicInterface):
 
     def handle(self, message):
         ''' Passes the message onto the correct handler '''
-        # return self.handles[message.type](message)
-        return self.handles.get(message.type, -1)(message)
+        func = self.handles.get(message.type, self.handles[-1])
+
+        if not profiler.enabled:
+
+            return func(message)
+
+        # Record how long the message waited since the Receiver read it, and how long it takes to handle
+
+        profiler.record_wait("queue wait", getattr(message, "time_received", None))
+
+        start = clock()
+
+        try:
+
+            return func(message)
+
+        finally:
+
+            profiler.record("Interface.{}".format(getattr(func, "__name__", "handle")), start, clock() - start)
 
     # Main loop actions
     # =================
@@ -230,9 +269,38 @@ class Interface(BasicInterface):
         assert isinstance(message, MESSAGE)
         
         self.queue.put(message)
+
+        self.waker.wake()
         
         return
 
+    def wake_console(self, console):
+        """ Called from any thread when text is written to a console, to add it in the next frame """
+
+        with self.console_lock:
+
+            self.waiting_consoles.add(console)
+
+        self.waker.wake()
+
+        return
+
+    def on_wake(self):
+        """ Called by `self.waker` in the Tk loop. Handles received messages and schedules an
+            update of any console that has been written to. """
+
+        self.listen()
+
+        with self.console_lock:
+
+            consoles, self.waiting_consoles = self.waiting_consoles, set()
+
+        for console in consoles:
+
+            console.schedule_update()
+
+        return
+
     # Updating the buffer-frame
     # =========================
 
@@ -374,10 +442,14 @@ class Interface(BasicInterface):
             for buf in self.buffers.values():
                 
                 buf.lang.kill()
+
+                buf.console_forwarder.close()
             
         except(Exception) as e:
             
             stdout(e.__class__.__name__, e)
+
+        self.waker.close()
         
         BasicInterface.kill(self)
         
@@ -385,7 +457,8 @@ class Interface(BasicInterface):
 
     def freeze_kill(self, err):
         ''' Displays an error message and stops communicating to the server '''
-        self.console.write(err)
+        for buf in self.buffers.values():
+            buf.console.write(err)
         self.client.send.kill()
         self.client.recv.kill()
         return
@@ -482,11 +555,13 @@ class Interface(BasicInterface):
 
             if self.user_disabled() is False or isinstance(message, MSG_CONNECT_ACK):
 
-                self.msg_id += 1
+                with self.msg_lock:
 
-                message.set_msg_id(self.msg_id)
+                    self.msg_id += 1
 
-                self.client.send_queue.put(message)
+                    message.set_msg_id(self.msg_id)
+
+                    self.client.send_queue.put(message)
 
         else:
 
@@ -495,12 +570,26 @@ class Interface(BasicInterface):
         return
 
     def listen(self):
-        """ Continuously reads from the queue of messages read from the server
-            and carries out the specified actions. """
+        """ Reads messages received from the server from the queue and carries out the
+            specified actions. Called by `self.on_wake` as soon as the Receiver adds messages
+            to the queue. Handling stops after `self.dispatch_budget` seconds and continues
+            once Tk has processed any other events, so a burst of messages doesn't block
+            keyboard input. """
+
+        start = time.time()
+
+        received = []
 
         try:
+
             while True:
 
+                if time.time() - start > self.dispatch_budget:
+
+                    self.root.after(1, self.listen)
+
+                    break
+
                 # Pop the message from the queue
 
                 msg = self.queue.get_nowait()
@@ -516,19 +605,41 @@ class Interface(BasicInterface):
                     print("Exception occurred in message {!r}: {!r} {!r}".format(self.handles[msg.type].__name__, type(e), e))
                     raise(e)
 
-                # Update any other idle tasks
-
-                self.root.update_idletasks()
+                received.append(getattr(msg, "time_received", None))
 
         # Break when the queue is empty
         except queue.Empty:
 
             pass
 
-        # self.redraw()
+        # Update the display. Peer labels, line numbers and syntax highlighting are redrawn
+        # in the next frame, so how long messages took to reach the screen is recorded then.
+
+        if len(received):
+
+            start = clock()
+
+            self.root.update_idletasks()
+
+            if profiler.enabled:
+
+                profiler.record("Interface.update_idletasks", start, clock() - start)
+
+            self.scheduler.after_frame(lambda: self.record_latency(received))
+
+        return
+
+    def record_latency(self, received):
+        """ Records the time since each message was received from the network """
+
+        now = time.time()
+
+        for time_received in received:
+
+            if time_received is not None:
+
+                self.latency.add(now - time_received)
 
-        # Recursive call
-        self.root.after(300, self.listen)
         return
 
     # Interface toggles
@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 from .tkimport import Tk
+from .profile import profiled
 
 from ..config import *
 
@@ -9,21 +10,75 @@ class LineNumbers(Tk.Canvas):
         self.parent     = parent      # buffer
         self.root       = parent.root # interface
         self.textwidget = parent.text # text
+
+        # Canvas items are created once and re-used when the view changes
+
+        self.numbers   = [] # text item ids, one per visible line
+        self.labels    = [] # line number shown by each item, or None if hidden
+        self.highlight = self.create_rectangle(0, 0, 0, 0, fill="gray30", outline="gray30", state=Tk.HIDDEN)
+        self.separator = self.create_line(0, 0, 0, 0, fill="gray50")
+
+        self.digits = None
+        self.last_state = None
+
         self.redraw()
 
+    def get_number_item(self, i):
+        """ Returns the i-th line number text item, creating it if needed """
+        while len(self.numbers) <= i:
+            self.numbers.append(self.create_text(0, 0, anchor="ne", justify=Tk.RIGHT, text="", font="Font", fill="#d3d3d3"))
+            self.labels.append(None)
+        return self.numbers[i]
+
+    @profiled("LineNumbers.redraw")
     def redraw(self, *args):
-        '''Redraws the line numbers at 30 fps'''
-        self.delete("all")
+        '''Redraws the line numbers, if the view has changed since the last redraw '''
+
+        num_lines = self.textwidget.get_num_lines()
+
+        # Only resize when the number of digits changes
+
+        digits = len(str(max(num_lines, 10)))
+
+        if digits != self.digits:
+
+            self.digits = digits
+
+            self.config(width=self.textwidget.font.measure(str(max(num_lines, 10))) + 20)
+
+        first = int(self.textwidget.index("@0,0").split(".")[0])
+
+        if self.root.local_peer is not None and self.parent.is_active():
+
+            active_row = self.root.local_peer.row
+
+        else:
+
+            active_row = None
 
-        i = self.textwidget.index("@0,0")
+        # Skip redrawing if nothing has changed. Lines that wrap onto more or fewer rows
+        # move the lines below them, which changes the last visible row and the view.
 
-        self.config(width=self.textwidget.font.measure(str(max(self.textwidget.get_num_lines(), 10))) + 20)
+        last = self.textwidget.index("@0,{}".format(self.textwidget.winfo_height()))
+
+        state = (first, num_lines, active_row, self.textwidget.dlineinfo("@0,0"), last, self.textwidget.dlineinfo(last),
+                 self.textwidget.yview(), self.winfo_width(), self.winfo_height())
+
+        if state == self.last_state:
+
+            return
+
+        self.last_state = state
 
         w = self.winfo_width() - 5 # Width
 
-        while True:
+        i, linenum = 0, first
 
-            dline=self.textwidget.dlineinfo(i)
+        highlighted = False
+
+        while linenum <= num_lines:
+
+            dline = self.textwidget.dlineinfo("{}.0".format(linenum))
 
             if dline is None:
                 break
@@ -31,34 +86,43 @@ class LineNumbers(Tk.Canvas):
             y = dline[1]
             h = dline[3]
 
-            linenum = int(str(i).split(".")[0])
-
             # If the linenum is the currently edited linenumber, highlight
 
-            if self.root.local_peer is not None:
+            if linenum == active_row:
 
-                if (self.parent.is_active()) and (linenum == self.root.local_peer.row):
+                self.coords(self.highlight, 0, y, w, y + h)
+                self.itemconfig(self.highlight, state=Tk.NORMAL)
 
-                    x1, y1 = 0, y
-                    x2, y2 = w, y + h
+                highlighted = True
 
-                    self.create_rectangle(x1, y1, x2, y2, fill="gray30", outline="gray30")
+            item = self.get_number_item(i)
 
-            self.create_text(w - 4, y, anchor="ne",
-                             justify=Tk.RIGHT,
-                             text=linenum,
-                             font="Font",
-                             fill="#d3d3d3")
+            self.coords(item, w - 4, y)
 
+            if self.labels[i] != linenum:
 
-            i = self.textwidget.index("{}+1line".format(i))
+                self.itemconfig(item, text=linenum, state=Tk.NORMAL)
 
-        # Draw a line
+                self.labels[i] = linenum
 
-        self.create_line(w, 0, w, self.winfo_height(), fill="gray50")#COLOURS["Background"])
+            i, linenum = i + 1, linenum + 1
 
-        # # Draw peer_lables - this could be done after every update / on scroll / resize
+        # Hide any items not needed
+
+        for j in range(i, len(self.numbers)):
+
+            if self.labels[j] is not None:
+
+                self.itemconfig(self.numbers[j], state=Tk.HIDDEN)
+
+                self.labels[j] = None
+
+        if not highlighted:
+
+            self.itemconfig(self.highlight, state=Tk.HIDDEN)
+
+        # Draw a line
 
-        # if self.textwidget.is_refreshing is False:
+        self.coords(self.separator, w, 0, w, self.winfo_height())
 
-        #     self.textwidget.refresh_peer_labels()
\ No newline at end of file
+        return
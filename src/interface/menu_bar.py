@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 
-from .tkimport import Tk
+from .tkimport import Tk, tkFileDialog
+from .profile import profiler, ProfileWindow
     
 from functools import partial
 
@@ -83,6 +84,19 @@ class MenuBar(Tk.Menu):
         # helpmenu.add_command(label="Documentation",   command=self.root.OpenGitHub)
         # self.add_cascade(label="Help", menu=helpmenu)
 
+        # Debug menu
+
+        self.profiling = Tk.BooleanVar()
+        self.profiling.set(profiler.enabled)
+
+        self.profile_window = None
+
+        debugmenu = Tk.Menu(self, tearoff=0)
+        debugmenu.add_checkbutton(label="Profile interface", command=self.toggle_profiling, variable=self.profiling)
+        debugmenu.add_command(label="Show profile",       command=self.show_profile, accelerator="Ctrl+Shift+P")
+        debugmenu.add_command(label="Save profile trace", command=self.save_profile)
+        self.add_cascade(label="Debug", menu=debugmenu)
+
         # Add to root
 
         self.visible = visible
@@ -96,6 +110,34 @@ class MenuBar(Tk.Menu):
         self.visible = not self.visible
         return "break"
 
+    def toggle_profiling(self, event=None):
+        """ Turns the interface profiler on or off """
+        if self.profiling.get():
+            profiler.enable()
+        else:
+            profiler.disable()
+        return
+
+    def show_profile(self, event=None):
+        """ Opens a window with a live summary of the interface profile, turning the
+            profiler on if needed """
+        if not profiler.enabled:
+            self.profiling.set(True)
+            self.toggle_profiling()
+        if self.profile_window is None or not self.profile_window.winfo_exists():
+            self.profile_window = ProfileWindow(self.root)
+        else:
+            self.profile_window.lift()
+        return "break"
+
+    def save_profile(self, event=None):
+        """ Writes the interface profile, including a trace of recent calls, to a JSON file """
+        fn = tkFileDialog.asksaveasfilename(title="Save profile trace as...", filetypes=(("JSON file", ".json"),), defaultextension=".json")
+        if len(fn):
+            profiler.dump(fn)
+            print("Saved: {}".format(fn))
+        return
+
     def save_file(self, event=None):
         """ Opens a save file dialog """
         lang_files = ("{} file".format(repr(self.root.lang)), self.root.lang.filetype )
@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 from .tkimport import Tk
+from .profile import profiled
     
 from ..interpreter import DEFAULT_INTERPRETERS
 from ..config import *
@@ -130,6 +131,7 @@ class Peer:
         self.mark     = self.get_mark_tag(self.id)
         self.bbox     = None
         self.raised   = False
+        self.placed   = None # (x, label y, insert y) of the labels
 
         # For refreshing the text
         self.hl_eval    = Highlight(self, self.code_tag)
@@ -269,7 +271,7 @@ class Peer:
 
     def is_on_same_row(self, other):
         """ Returns true if this peer and other peer have the first same value for their tcl index """
-        return self.get_row() == other.get_row()
+        return self.row == other.row
         
     def move(self, buf, loc, raised = False, local_operation = False):
         """ Updates the location of the Peer's label """
@@ -292,57 +294,61 @@ class Peer:
 
         try:
 
-            document_length = len(text_widget.read())
+            self.set_index(text_widget, loc)
 
-            # Make sure the location is valid
+            # Redraw all peer labels
 
-            if loc < 0:
+            if text_widget.is_refreshing is False:
 
-                self.index_num = 0
+                text_widget.refresh_peer_labels()
 
-            elif loc > document_length:
+            if old_buffer is not None:
 
-                self.index_num = document_length
+                old_buffer.text.cursors.remove(self.id)
 
-            else:
+                old_buffer.redraw()
 
-                self.index_num = loc
+        except Tk.TclError as e:
 
-            # Work with tcl indexing e.g. "1.0"
+            print(e)
             
-            index = text_widget.number_index_to_tcl(loc)
+        return self.index_num
 
-            row, col = [int(val) for val in index.split(".")]
+    def set_index(self, text_widget, loc):
+        """ Updates the peer's location and Tk mark in `text_widget` without redrawing any labels """
 
-            self.row = row
-            self.col = col
+        document_length = len(text_widget.read())
 
-            index = "{}.{}".format(self.row, self.col)
+        # Make sure the location is valid
 
-            # Update the Tk text tag and draw the label
+        if loc < 0:
 
-            # print("moving {} to {} / {} ({})".format(str(self), loc, document_length, index))
+            self.index_num = 0
 
-            text_widget.mark_set(self.mark, index)
+        elif loc > document_length:
 
-            # Redraw all peer labels
+            self.index_num = document_length
 
-            if text_widget.is_refreshing is False:
+        else:
 
-                text_widget.refresh_peer_labels()
+            self.index_num = loc
 
-            if old_buffer is not None:
+        # Work with tcl indexing e.g. "1.0"
 
-                old_buffer.redraw()
+        self.row, self.col = text_widget.number_index_to_row_col(self.index_num)
 
-        except Tk.TclError as e:
+        index = "{}.{}".format(self.row, self.col)
+
+        text_widget.cursors.set(self.id, self.index_num)
+
+        text_widget.mark_set(self.mark, index)
 
-            print(e)
-            
         return self.index_num
 
-    def redraw(self):
-        """ Redraws the peer label """
+    @profiled("Peer.redraw")
+    def redraw(self, raised=None):
+        """ Redraws the peer label. If `raised` is not given, checks whether the label
+            needs to go above the cursor to avoid overlapping another peer """
 
         if self.visible is False:
 
@@ -363,7 +369,13 @@ class Peer:
 
             # Label can go on top of the cursor
 
-            raised = self.find_overlapping_peers()
+            if raised is None:
+
+                raised = self.find_overlapping_peers()
+
+            else:
+
+                self.raised = raised
 
             if raised:
 
@@ -388,8 +400,16 @@ class Peer:
         self.x_val = self.x_val + shift_x
         self.y_val = tuple(y + shift_y for y in self.y_val)
 
-        self.label.place(x=self.x_val, y=self.y_val[0], anchor="nw")
-        self.insert.place(x=self.x_val, y=self.y_val[1], anchor="nw")
+        # Only move the labels if their location has changed
+
+        placed = (self.x_val, self.y_val[0], self.y_val[1])
+
+        if placed != self.placed:
+
+            self.label.place(x=self.x_val, y=self.y_val[0], anchor="nw")
+            self.insert.place(x=self.x_val, y=self.y_val[1], anchor="nw")
+
+            self.placed = placed
 
         return
 
@@ -478,6 +498,8 @@ class Peer:
         self.y_val = (-100, -100)
         self.label.place(x=self.x_val, y=self.y_val[0], anchor="nw")
         self.insert.place(x=self.x_val, y=self.y_val[1], anchor="nw")
+        self.placed = (self.x_val, self.y_val[0], self.y_val[1])
+        self.get_text_widget().cursors.remove(self.id)
         self.index_num = -1
         self.visible = False
         return 
@@ -498,8 +520,6 @@ class Peer:
         """ Highlights (and schedules de-highlight) of block of text. Returns contents
             as a string """
 
-        code = []
-
         if start_line == end_line: 
             end_line += 1
 
@@ -512,7 +532,7 @@ class Peer:
 
             self.hl_eval.add(start, end)
 
-            code.append(self.get_text_widget().get(start, end))
+        code = self.get_text_widget().get_rows(start_line, end_line)
 
         self.__highlight_block()
             
@@ -520,7 +540,7 @@ class Peer:
 
         self.tk.after(200, self.__unhighlight_block)
 
-        return "\n".join(code)
+        return code
 
     def __highlight_block(self):
         """ Adds background highlighting for code being evaluated"""
@@ -571,10 +591,10 @@ class Peer:
         return self.get_text_widget().number_index_to_tcl(self.index_num)
 
     def get_row(self):
-        return int(self.get_tcl_index().split(".")[0])
+        return self.get_text_widget().number_index_to_row_col(self.index_num)[0]
 
     def get_col(self):
-        return int(self.get_tcl_index().split(".")[1])
+        return self.get_text_widget().number_index_to_row_col(self.index_num)[1]
 
     def get_index_num(self):
         """ Returns the index (a single integer) of this peer """
@@ -0,0 +1,149 @@
+"""
+    Interface/profile.py
+    --------------------
+
+    Opt-in timings for the client interface: each message handler, the
+    time messages wait between the Receiver and their handler, each
+    redraw in a frame and the Tk methods that commonly cause hitches.
+    Profiling is off by default and costs one attribute check per call
+    when disabled. Turn it on from the Debug menu, with Ctrl+Shift+P
+    (which also shows a live summary) or by setting the
+    POLYGLOT_UI_PROFILE environment variable before starting the client.
+    If the variable is a file name ending in ".json" the trace is written
+    to it when the client exits, otherwise a summary is printed.
+
+"""
+
+from __future__ import absolute_import, print_function
+
+from .tkimport import Tk
+
+from ..ot.profile import Profiler, clock
+
+import atexit
+import functools
+import os
+import time
+
+__all__ = ["profiler", "profiled", "ProfileWindow"]
+
+class UIProfiler(Profiler):
+    """ Profiler whose summary lists calls by total time and the slowest single calls """
+
+    def summary(self, worst=10):
+        """ Returns a table of the recorded calls, most expensive first, as a string """
+        data = self.as_dict()
+        lines = ["{:<40} {:>8} {:>10} {:>10} {:>10}".format("call", "count", "total ms", "mean ms", "worst ms")]
+        for name, stats in sorted(data["calls"].items(), key=lambda item: -item[1]["total_ms"]):
+            lines.append("{:<40} {count:>8} {total_ms:>10.3f} {mean_ms:>10.3f} {worst_ms:>10.3f}".format(name, **stats))
+        slowest = sorted((item for item in data["trace"] if "duration_ms" in item), key=lambda item: -item["duration_ms"])[:worst]
+        if slowest:
+            lines.append("")
+            lines.append("Slowest calls:")
+            for item in slowest:
+                lines.append("{:>10.3f} ms  {} (at {:.0f} ms)".format(item["duration_ms"], item["name"], item["start_ms"]))
+        return "\n".join(lines)
+
+    def record_wait(self, name, time_received):
+        """ Records how long ago (in `time.time()` seconds) a message was received """
+        if time_received is not None:
+            wait = max(0.0, time.time() - time_received)
+            self.record(name, clock() - wait, wait)
+        return
+
+profiler = UIProfiler()
+
+def profiled(name):
+    """ Decorates a method so that its calls are timed while the profiler is enabled """
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record(name, start, clock() - start)
+
+        return wrapper
+
+    return decorator
+
+class ProfileWindow(Tk.Toplevel):
+    """ Shows the profiler's summary, refreshed every second """
+    def __init__(self, interface, interval=1000):
+        Tk.Toplevel.__init__(self, interface.root)
+
+        self.interface = interface
+        self.interval  = interval
+        self.after_id  = None
+
+        self.title("Polyglot - Interface profile")
+
+        self.text = Tk.Text(self, width=100, height=40, font="ConsoleFont", bg="black", fg="white")
+        self.text.grid(row=0, column=0, columnspan=3, sticky=Tk.NSEW)
+
+        Tk.Button(self, text="Reset", command=profiler.reset).grid(row=1, column=0, sticky=Tk.EW)
+        Tk.Button(self, text="Save trace...", command=interface.menu.save_profile).grid(row=1, column=1, sticky=Tk.EW)
+        Tk.Button(self, text="Close", command=self.destroy).grid(row=1, column=2, sticky=Tk.EW)
+
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.update_me()
+
+    def update_me(self):
+        """ Replaces the text with the latest summary """
+
+        lines = [
+            "Profiling is {}".format("on" if profiler.enabled else "off (turn it on in the Debug menu)"),
+            "Received to redrawn: {}".format(self.interface.latency.summary()),
+        ]
+
+        for buf in self.interface.buffers.values():
+
+            if hasattr(buf.lang, "write_latency"):
+
+                lines.append("{} queue: {} waiting, {}".format(buf.lang, buf.lang.queue_depth(), buf.lang.write_latency.summary()))
+
+        lines += [
+            "",
+            profiler.summary(),
+            "",
+            self.interface.scheduler.summary(),
+        ]
+
+        self.text.delete("1.0", Tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+
+        self.after_id = self.after(self.interval, self.update_me)
+
+        return
+
+    def destroy(self):
+        """ Stops refreshing the summary and closes the window """
+
+        if self.after_id is not None:
+
+            self.after_cancel(self.after_id)
+
+            self.after_id = None
+
+        Tk.Toplevel.destroy(self)
+
+        return
+
+def _report_at_exit(target):
+    if target.endswith(".json"):
+        profiler.dump(target)
+    else:
+        print(profiler.summary())
+
+_env = os.environ.get("POLYGLOT_UI_PROFILE", "")
+
+if _env and _env != "0":
+    profiler.enable()
+    atexit.register(_report_at_exit, _env)
@@ -0,0 +1,139 @@
+from __future__ import absolute_import, print_function
+
+from .tkimport import Tk
+from .profile import profiler, clock
+
+from collections import OrderedDict
+
+class RenderScheduler:
+    """ Coalesces redraw requests from the interface so that each one is performed
+        at most once per frame. Subsystems call `request` with a key identifying
+        the redraw, e.g. ("labels", buf_id), and the function that does it. A single
+        Tk `after` callback then calls every requested function, no more often
+        than `fps` times a second. Functions passed to `after_frame` are called
+        once the redraws of the next frame are done. """
+    def __init__(self, root, fps=60):
+        self.root    = root # Tk root
+        self.dirty   = OrderedDict() # key -> function
+        self.finished = [] # functions to call after the next frame
+        self.pending = None # id of the scheduled `after` callback
+        self.last_frame = 0
+
+        self.set_fps(fps)
+
+        # Counters for redraws requested vs performed
+
+        self.requested = {}
+        self.performed = {}
+        self.frames    = 0
+
+    def set_fps(self, fps):
+        """ Sets the maximum number of frames drawn per second """
+        self.interval = 1.0 / max(1, fps)
+        return
+
+    def request(self, key, func):
+        """ Marks `key` as needing a redraw and schedules a frame if one is not already due """
+
+        self.requested[key] = self.requested.get(key, 0) + 1
+
+        self.dirty[key] = func
+
+        self.schedule()
+
+        return
+
+    def after_frame(self, func):
+        """ Calls `func` after the redraws in the next frame have been performed """
+
+        self.finished.append(func)
+
+        self.schedule()
+
+        return
+
+    def schedule(self):
+        """ Schedules a frame if one is not already due """
+
+        if self.pending is None:
+
+            delay = max(0, self.interval - (clock() - self.last_frame))
+
+            try:
+
+                self.pending = self.root.after(int(delay * 1000), self.render)
+
+            except Tk.TclError:
+
+                pass # Tk has been destroyed
+
+        return
+
+    def render(self):
+        """ Performs every redraw requested since the last frame """
+
+        self.pending    = None
+        self.last_frame = clock()
+        self.frames    += 1
+
+        dirty, self.dirty = self.dirty, OrderedDict()
+
+        frame_start = clock()
+
+        for key, func in dirty.items():
+
+            self.performed[key] = self.performed.get(key, 0) + 1
+
+            start = clock()
+
+            # An error in one redraw shouldn't stop the others in the frame
+
+            try:
+
+                func()
+
+            except Exception as e:
+
+                print("Error redrawing {!r}: {!r}".format(key, e))
+
+            if profiler.enabled:
+
+                name = key[0] if isinstance(key, tuple) else key
+
+                profiler.record("render {}".format(name), start, clock() - start)
+
+        if profiler.enabled:
+
+            profiler.record("frame", frame_start, clock() - frame_start)
+
+        finished, self.finished = self.finished, []
+
+        for func in finished:
+
+            try:
+
+                func()
+
+            except Exception as e:
+
+                print("Error after redrawing: {!r}".format(e))
+
+        return
+
+    def flush(self):
+        """ Performs any outstanding redraws immediately """
+        if self.pending is not None:
+            self.root.after_cancel(self.pending)
+        self.render()
+        return
+
+    def stats(self):
+        """ Returns a dictionary of key -> (redraws requested, redraws performed) """
+        return dict((key, (count, self.performed.get(key, 0))) for key, count in self.requested.items())
+
+    def summary(self):
+        """ Returns the redraw counters as a string """
+        lines = ["{} frames drawn".format(self.frames)]
+        for key, (requested, performed) in sorted(self.stats().items(), key=lambda item: str(item[0])):
+            lines.append("{!s:<24} requested {:>8}   performed {:>8}".format(key, requested, performed))
+        return "\n".join(lines)
@@ -16,7 +16,9 @@ class StatusBar(Tk.Frame):
         # Remove labels
         for label in self.labels:
 
-            label.grid_remove()
+            label.destroy()
+
+        self.labels = []
 
         self.peer_info = {}
         
@@ -43,7 +45,7 @@ class StatusBar(Tk.Frame):
 
         # If we have a different peer amount, update the labels
 
-        if len(self.peer_info) != self.root.peers:
+        if len(self.peer_info) != len(self.root.peers):
 
             self.update()
 
@@ -57,11 +59,11 @@ class StatusBar(Tk.Frame):
 
             for i, buf in self.root.buffers.items():
 
-                count += buf.text.peer_tag_doc.count(peer.char)
+                count += buf.text.peer_tags.count(p_id)
 
             counts[p_id] = count
 
-        total = sum([len(buf.text.peer_tag_doc) for buf in self.root.buffers.values()])
+        total = sum([len(buf.text.peer_tags) for buf in self.root.buffers.values()])
 
         for p_id, count in counts.items():
 
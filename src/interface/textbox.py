@@ -6,10 +6,13 @@ from ..interpreter import *
 
 from ..ot.client import Client as OTClient
 from ..ot.text_operation import TextOperation, IncompatibleOperationError
+from ..document import UndoHistory, AuthorshipIndex, CursorIndex, LineIndex, BracketIndex, widget_edits
 
 from .peer import *
 from .constraints import TextConstraint
 from .colour_merge import ColourMerge
+from .highlighter import Highlighter
+from .profile import profiled
 
 from .tkimport import Tk
 
@@ -33,10 +36,16 @@ class ThreadSafeText(Tk.Text, OTClient):
 
         self.constraint = TextConstraint(self)
 
-        self.config(undo=True, autoseparators=True, maxundo=50)
-        self.undo_stack = []
-        self.redo_stack = []
+        # Undo is handled by self.history, so Tk doesn't need to keep its own stack of edits
+
+        self.config(undo=False)
+
         self.max_undo_size = 50
+        self.history = UndoHistory(self.max_undo_size)
+
+        # Locations of the peers in this buffer, sorted by index
+
+        self.cursors = CursorIndex()
 
         # If we are blending font colours
 
@@ -68,10 +77,22 @@ class ThreadSafeText(Tk.Text, OTClient):
 
             self.tag_config(tag_name, **kwargs)
 
-        # Create 2 docs - one with chars, one with peer ids
+        # The document and a run-length index of which peer wrote each character
 
         self.document = ""
-        self.peer_tag_doc = ""
+        self.peer_tags = AuthorshipIndex()
+
+        # Offsets of the start of each line, for converting to and from Tk indices
+
+        self.lines = LineIndex()
+
+        # Brackets outside of strings and comments, for finding matching pairs
+
+        self.brackets = BracketIndex(comment=self.parent.lang.comment, quotes=self.parent.lang.quotes)
+
+        # Syntax highlighting for the language used in this buffer
+
+        self.highlighter = Highlighter(self, self.parent.lang.re)
 
 
     def __str__(self):
@@ -91,9 +112,9 @@ class ThreadSafeText(Tk.Text, OTClient):
 
         if len(operation.ops):
 
-            if len(self.read()) != len(self.peer_tag_doc):
+            if len(self.read()) != len(self.peer_tags):
 
-                print("{} {}".format( len(self.read()) , len(self.peer_tag_doc)))
+                print("{} {}".format( len(self.read()) , len(self.peer_tags)))
                 print("Document length mismatch, please restart the Troop server.")
                 return
 
@@ -101,11 +122,12 @@ class ThreadSafeText(Tk.Text, OTClient):
 
                 peer = self.active_peer
 
-            # If other peers have added/deleted chars - transform the undo stack
+            # If other peers have added/deleted chars - log the operation so undo
+            # operations can be rebased when they are used
 
             if peer != self.root.local_peer:
 
-                self.transform_undo_stacks(operation)
+                self.history.add_remote(operation, len(self.read()))
 
             # Apply op
 
@@ -113,7 +135,9 @@ class ThreadSafeText(Tk.Text, OTClient):
 
                 # print(operation.ops) -- could do manually instead of "refresh"
 
-                new_text = operation(self.read())
+                old_text = self.read()
+
+                new_text = operation(old_text)
 
             except IncompatibleOperationError as err:
 
@@ -127,13 +151,36 @@ class ThreadSafeText(Tk.Text, OTClient):
 
             self.document = new_text
 
+            # Opening a file or pasting large amounts of text replaces most of the document, so
+            # the indices are rebuilt from it and the widget is loaded with it in one go
+
+            bulk = is_bulk_operation(operation.ops, len(new_text))
+
+            if bulk:
+
+                self.lines.set_text(new_text)
+
+                self.brackets.set_text(new_text)
+
+            else:
+
+                self.lines.apply(operation.ops)
+
+                self.brackets.apply(operation.ops, new_text)
+
             self.insert_peer_id(peer, operation.ops)
 
             peer.de_select()
 
-            # Redraw status bar after an operation
+            if bulk:
+
+                self.refresh()
 
-            self.refresh()
+            else:
+
+                # Update only the text that changed in the Tk widget
+
+                self.apply_to_widget(operation.ops, peer, old_text)
 
         return
 
@@ -170,9 +217,8 @@ class ThreadSafeText(Tk.Text, OTClient):
         return
 
     def insert_peer_id(self, peer, ops):
-        """ Applies a text operation to the `peer_tag_doc` which contains information about which character relates to which peers """
-        operation = TextOperation(self.get_peer_loc_ops(peer, ops))
-        self.peer_tag_doc = operation(self.peer_tag_doc)
+        """ Applies a text operation to `peer_tags`, which contains information about which character relates to which peers """
+        self.peer_tags.apply(ops, peer.id)
         return
 
     def get_state(self):
@@ -183,42 +229,24 @@ class ThreadSafeText(Tk.Text, OTClient):
         """ Returns a list of peers currently connected """
         return [peer for peer in self.root.peers.values() if peer.connected]
 
-    def transform(self, op1, op2):
-        """ Transforms two TextOperations and adjusts the first for the length of the document"""
-        try:
-            size = max(get_doc_size(op1.ops), len(self.read()))
-            new_op1 = TextOperation(new_operation(*(list(op1.ops) + [size])))
-            new_op2 = TextOperation(new_operation(*(list(op2.ops) + [size])))
-            return TextOperation.transform(new_op1, new_op2)
-        except Exception as e:
-            print("Error transforming {} and {}".format(new_op1, new_op2))
-            raise e
-
-    def transform_undo_stacks(self, operation):
-        """ Transforms operations in the undo_stack so their locations are adjusted after other
-            operations are applied to the text """
-        if len(self.undo_stack):
-            self.undo_stack = [self.transform(action, operation)[0] for action in self.undo_stack if len(action.ops)]
-        return
-
     def add_to_undo_stacks(self, operation, document, undo=False, redo=False):
         """ Adds the inverse of an operation to the undo stack """
         # Keep track of operations for use in undo
         if not undo:
-            self.undo_stack = self.undo_stack[-self.max_undo_size:] + [operation.invert(document)]
+            self.history.push_undo(operation.invert(document))
             if not redo:
-                self.redo_stack = []
+                self.history.clear_redo()
         else:
-            self.redo_stack.append(operation.invert(document))
+            self.history.push_redo(operation.invert(document))
         return
 
     def get_undo_operation(self):
-        """ Gets the last operation from the undo stack """
-        return self.undo_stack.pop()
+        """ Gets the last operation from the undo stack, rebased against any remote operations """
+        return self.history.pop_undo()
 
     def get_redo_operation(self):
-        """ Gets the last operation from the undo stack """
-        return self.redo_stack.pop()
+        """ Gets the last operation from the redo stack, rebased against any remote operations """
+        return self.history.pop_redo()
 
     # Handle methods
     # ==============
@@ -285,7 +313,7 @@ class ThreadSafeText(Tk.Text, OTClient):
         """ Update's a peer's selection """
         peer = self.root.get_peer(message)
         peer.select_set(message["start"], message["end"])
-        self.update_colours()
+        self.schedule("highlights", self.refresh_highlights)
         return
 
     def handle_evaluate(self, message):
@@ -308,13 +336,15 @@ class ThreadSafeText(Tk.Text, OTClient):
 
         return
 
-    def handle_set_all(self, document, peer_tag_doc):
+    def handle_set_all(self, document, peer_tag_loc):
         ''' Sets the contents of the text box and updates the location of peer markers '''
 
         self.reset() # inherited from OTClient
 
         self.document = document
-        self.peer_tag_doc = peer_tag_doc
+        self.lines.set_text(document)
+        self.brackets.set_text(document)
+        self.peer_tags = AuthorshipIndex.from_snapshot(peer_tag_loc)
 
         self.refresh()
 
@@ -365,10 +395,6 @@ class ThreadSafeText(Tk.Text, OTClient):
         """ Returns the entire document as a list in which each element is a line from the text"""
         return self.read().split("\n")
 
-    def get_num_lines(self):
-        """ Returns the number of lines in the document """
-        return int(self.index('end-1c').split('.')[0])
-
     # Updating / retrieving info from peers
     # =====================================
 
@@ -387,89 +413,75 @@ class ThreadSafeText(Tk.Text, OTClient):
 
         #     print("{} index: {}, Op index: {}, shift: {} === {} ".format(str(peer), peer.get_index_num(), index, shift, peer_index))
 
-        doc_size = len(self.read())
+        # Shift or trim the selected areas of other peers
 
-        for other in self.root.peers.values():
+        for _, other_id in self.cursors:
 
-            if other != peer and other.in_same_buffer(peer):
+            other = self.root.peers[other_id]
 
-                other_index = other.get_index_num()
+            if other != peer and other.has_selection():
 
-                # Moving whole selections
+                # If the selections overlap, de-highlight the deleted section
 
-                if other.has_selection():
+                if peer.has_selection():
 
-                    # If the selections overlap, de-highlight the deleted section
+                    other.select_remove(peer.select_start(), peer.select_end())
 
-                    if peer.has_selection():
+                other.select_shift(peer_index, shift)
 
-                        other.select_remove(peer.select_start(), peer.select_end())
+        # If other peers are *in* this peer's selection, move them to the start of it
 
-                    # Shift a selected area
+        if peer.has_selection():
 
-                    other.select_shift(peer_index, shift)
+            start = peer.select_start()
 
-                # If the other peer is *in* this peer's selection, move it
+            for other_id in self.cursors.between(start, peer.select_end()):
 
-                if peer.has_selection() and peer.select_contains( other_index ):
-        
-                    other.move(self.parent.id, peer.select_start())
+                if other_id != peer.id:
 
-                # Adjust the index if it comes after the operating peer index
+                    self.root.peers[other_id].set_index(self, start)
 
-                elif other_index > peer_index:
+        # Adjust the index of the peers that come after the operating peer index. Labels
+        # are redrawn once when the operating peer itself is moved.
 
-                    other.shift(shift)
+        for other_id, location in self.cursors.shift(peer_index, shift, exclude=peer.id):
 
-                # If behind, just redraw (if on screen)
+            self.root.peers[other_id].set_index(self, location)
 
-                else:
+        # Inserted text is tagged with its author as it is inserted, but highlights
+        # may need to be extended over it
 
-                    other.refresh()
-
-        self.update_colours()
+        self.schedule("highlights", self.refresh_highlights)
 
         return
 
-    def create_peer_tag_doc(self, locations):
-        """ Re-creates the document of peer_id markers """
-        s = []
-        for peer_id, length in locations:
-            s.append("{}".format(get_peer_char(peer_id)) * int(length))
-        return "".join(s)
-
-    def get_peer_loc_ops(self, peer, ops):
-        """ Converts a list of operations on the main document to inserting the peer ID """
-        # return [str(peer.id) * len(val) if isinstance(val, str) else val for val in ops]
-        return [peer.char * len(val) if isinstance(val, str) else val for val in ops]
-
+    @profiled("ThreadSafeText.update_colours")
     def update_colours(self):
-        """ Sets the peer tags in the text document """
-
-        processed = []
+        """ Re-applies the text tag of every peer that has written in the document. Text
+            inserted by an operation is tagged as it is inserted, so this is only needed
+            when the whole document is replaced """
 
-        # Go through connected peers and colour the text
+        # Group the ranges written by each peer so each tag is added in a single call
 
-        for p_id, peer in self.root.peers.items():
+        ranges = {}
 
-            processed.append(peer.char)
+        for p_id, start, end in self.peer_tags:
 
-            self.update_peer_tag(p_id)
+            ranges.setdefault(p_id, []).extend((self.number_index_to_tcl(start), self.number_index_to_tcl(end)))
 
-            peer.refresh_highlight()
+        # Include peers no longer connected, to keep their colours
 
-        # If there are any other left over peers, keep their colours
+        for p_id in set(self.root.peers.keys()) | set(ranges.keys()):
 
-        for p_id in set(self.peer_tag_doc):
+            self.update_peer_tag(p_id, ranges.get(p_id, []))
 
-            if str(p_id) not in processed:
-
-                self.update_peer_tag(get_peer_id_from_char(p_id))
+        self.refresh_highlights()
 
         return
 
-    def update_peer_tag(self, p_id):
-        """ Refreshes a peer's text_tag colours """
+    def update_peer_tag(self, p_id, indices):
+        """ Refreshes a peer's text_tag colours and sets it on `indices`, a flat list of
+            start and end Tk indices """
 
         text_tag = Peer.get_text_tag(p_id)
 
@@ -485,14 +497,27 @@ class ThreadSafeText(Tk.Text, OTClient):
 
         self.tag_remove(text_tag, "1.0", Tk.END)
 
-        for start, end in get_peer_locs(get_peer_char(p_id), self.peer_tag_doc):
+        if len(indices):
+
+            self.tag_add(text_tag, *indices)
+
+        return
+
+    def refresh_highlights(self):
+        """ Re-applies the selection and evaluation highlights of peers in this buffer """
 
-            self.tag_add(text_tag, self.number_index_to_tcl(start), self.number_index_to_tcl(end))
+        for peer in self.root.peers.values():
+
+            if peer.get_buf_id() == self.parent.id:
+
+                peer.refresh_highlight()
 
         return
 
+    @profiled("ThreadSafeText.refresh")
     def refresh(self):
-        """ Clears the text box and loads the current document state, called after an operation """
+        """ Clears the text box and loads the current document state, called when the whole
+            document is received from the server or an operation replaces most of it """
 
         self.is_refreshing = True
         
@@ -505,7 +530,8 @@ class ThreadSafeText(Tk.Text, OTClient):
 
         # Update the colours and formatting
         self.update_colours()
-        self.apply_language_formatting()
+        self.highlighter.reset()
+        self.schedule("syntax", self.highlighter.update)
         self.root.status_bar.redraw()
 
         # Draw peer_lables - this could be done after every update / on scroll / resize
@@ -516,64 +542,120 @@ class ThreadSafeText(Tk.Text, OTClient):
         
         return
 
+    def apply_to_widget(self, ops, peer, document):
+        """ Applies text operation ops to the Tk widget as inserts and deletes at the affected
+            indices instead of re-inserting the whole document. Inserted text is given the
+            text tag of `peer`. `document` is the text before the operation, and
+            `self.lines` must already be up to date with the text after it. """
+
+        self.is_refreshing = True
+
+        self.store_view()
+
+        tags = (peer.text_tag,)
+
+        for kind, row, col, text in widget_edits(ops, document, self.lines):
+
+            index = "{}.{}".format(row, col)
+
+            if kind == "insert":
+
+                self.insert(index, text, tags)
+
+                self.highlighter.insert(row, text.count("\n"))
+
+            else:
+
+                self.highlighter.delete(row, text.count("\n"))
+
+                self.delete(index, "{}+{}c".format(index, len(text)))
+
+        # Update syntax highlighting on the edited lines in view
+
+        self.schedule("syntax", self.highlighter.update)
+
+        self.root.scheduler.request("status_bar", self.root.status_bar.redraw)
+
+        self.is_refreshing = False
+
+        return
+
+    def schedule(self, name, func):
+        """ Asks the interface to call `func` in the next frame, once no matter how many times
+            it is requested before then """
+        return self.root.scheduler.request((name, self.parent.id), func)
+
     def refresh_peer_labels(self):
-        ''' Updates the locations of the peers to their marks and redraws the line numbers'''
-        for peer_id, peer in self.root.peers.items():
-            # if the peer is in this textbox
-            if peer.get_buf_id() == self.parent.id:
-                peer.redraw()
-        self.parent.line_numbers.redraw()
+        ''' Schedules the peer labels and line numbers to be redrawn in the next frame '''
+        self.schedule("labels", self.redraw_peer_labels)
+        self.schedule("line_numbers", self.parent.line_numbers.redraw)
         return
 
-    def yview(self, *args):
-        """ Perform scroll action and redraw peer labels """
-        Tk.Text.yview(self, *args)
+    def redraw_peer_labels(self):
+        ''' Updates the locations of the peers in this textbox to their marks '''
 
-        if self.is_refreshing is False:
+        # Group the peers in this textbox by row, as labels can only overlap on the same row
 
-            self.refresh_peer_labels()
+        rows = {}
 
-        return
+        for peer in self.root.peers.values():
 
-    # handling key events
+            if peer.get_buf_id() == self.parent.id and peer.visible:
 
-    def apply_language_formatting(self):
-         """ Iterates over each line in the text and updates the correct colour / formatting """
-         for line,  _ in enumerate(self.readlines()):
-             self.colour_line(line + 1)
-         return
+                rows.setdefault(peer.row, []).append(peer)
 
-    def colour_line(self, line):
-        """ Embold keywords defined in `Interpreter.py` """
+        for peers in rows.values():
 
-        # Get contents of the line
+            # A label is raised above the cursor if it would cover a peer to its right
+            # whose label is not raised. Going right to left, those peers are known.
 
-        start, end = "{}.0".format(line), "{}.end".format(line)
+            peers.sort(key=lambda peer: (peer.get_index_num(), peer.id), reverse=True)
 
-        string = self.get(start, end)
+            lowered = []
 
-        # Go through the possible tags
+            for peer in peers:
 
-        # for tag_name, tag_finding_func in self.root.lang.re.items():
+                start, end = peer.get_index_num(), peer.get_index_num() + len(str(peer))
 
-        #     self.tag_remove(tag_name, start, end)
+                raised = any(start <= index < end for index in lowered)
 
-        #     for match_start, match_end in tag_finding_func(string):
+                if not raised:
 
-        #         tag_start = "{}.{}".format(line, match_start)
-        #         tag_end   = "{}.{}".format(line, match_end)
+                    lowered.append(start)
 
-        #         self.tag_add(tag_name, tag_start, tag_end)
+                peer.redraw(raised)
 
         return
 
+    def yview(self, *args):
+        """ Perform scroll action and redraw peer labels """
+        Tk.Text.yview(self, *args)
+
+        if self.is_refreshing is False:
+
+            self.refresh_peer_labels()
+
+        return
+
+    # handling key events
+
+    def apply_language_formatting(self):
+         """ Re-applies syntax highlighting to the lines in view """
+         self.highlighter.reset()
+         self.highlighter.update()
+         return
+
+    def colour_line(self, line):
+        """ Embold keywords defined in `Interpreter.py` """
+        return self.highlighter.colour_line(line)
+
     def highlight_brackets(self, bracket):
         """ Call this with a bracket """
 
         index = self.root.local_peer.get_index_num() - 1
         assert self.read()[index] == bracket
 
-        start = self.find_starting_bracket(index - 1, self.right_brackets[bracket], bracket)
+        start = self.brackets.match(index)
 
         if start is not None:
 
@@ -582,21 +664,6 @@ class ThreadSafeText(Tk.Text, OTClient):
 
         return
 
-    def find_starting_bracket(self, index, left_bracket, right_bracket):
-        """ Finds the opening bracket to the closing bracket at line, column co-ords.
-            Returns None if not found. """
-        text = self.read()
-        nests = 0
-        for i in range(index, -1, -1):
-            if text[i] == left_bracket:
-                if nests > 0:
-                    nests -= 1
-                else:
-                    return i
-            elif text[i] == right_bracket:
-                nests += 1
-        return
-
     # Housekeeping
     # ============
 
@@ -630,30 +697,25 @@ class ThreadSafeText(Tk.Text, OTClient):
 
         return
 
+    @profiled("ThreadSafeText.reset_view")
     def reset_view(self):
         """ Sets the view to the last position stored"""
 
-        # Move to top
+        # Find the row that should be at the top of the view and scroll directly to it
 
-        self.yview('move', 0.0)
-        
-        # Scroll until the scroll-distance is the same as previous (or the end)
-
-        for n in range(self.get_num_lines()):
-
-            if self.parent.is_active():
+        if self.parent.is_active():
 
-                if (self.get_visible_row_top() - self.get_marker_row()) >= self.scroll_distance:
+            top_row = self.get_marker_row() + self.scroll_distance
 
-                    break
+        else:
 
-            else:
+            top_row = self.scroll_distance
 
-                if self.get_visible_row_top() >= self.scroll_distance:
+        top_row = max(1, min(top_row, self.get_num_lines()))
 
-                    break
+        if top_row != self.get_visible_row_top():
 
-            self.yview('scroll', 1, 'units')
+            self.yview("{}.0".format(top_row))
 
         return
 
@@ -675,34 +737,27 @@ class ThreadSafeText(Tk.Text, OTClient):
         """ Takes a tcl index e.g. '1.0' and returns the single number it represents if the
             text contents were a single list """
         row, col = [int(val) for val in self.index(index).split(".")]
-        return sum([len(line) + 1 for line in self.read().split("\n")[:row-1]]) + col
-
+        return self.lines.offset(row, col)
 
     def number_index_to_tcl(self, number):
         """ Takes an integer number and returns the tcl index in the from 'row.col' """
-        if number <= 0:
-            return "1.0"
-        text = self.read()
-        # Count columns until a newline, then reset and add 1 to row
-        count = 0; row = 1; col = 0
-        for i in range(1, len(text)+1):
-            char = text[i-1]
-            if char == "\n":
-                row += 1
-                col = 0
-            else:
-                col += 1
-            if i >= number:
-                break
-        return "{}.{}".format(row, col)
+        return self.lines.tcl_index(number)
 
     def get_num_lines(self):
-        return int(self.index(Tk.END).split(".")[0]) - 1
+        """ Returns the number of lines in the document """
+        return len(self.lines)
+
+    def get_rows(self, start, end):
+        """ Returns the contents of the rows from `start` up to (not including) `end`
+            from the document, without calling Tk. Like `text.get("start.0", "end.0")`
+            the text ends with the newline of the last row. """
+        if start > len(self.lines) or end <= start:
+            return ""
+        return self.document[self.lines.line_start(start):self.lines.line_end(end - 1)] + "\n"
 
     def number_index_to_row_col(self, number):
         """ Takes an integer number and returns the row and column as integers """
-        tcl_index = self.number_index_to_tcl(number)
-        return tuple(int(x) for x in tcl_index.split("."))
+        return self.lines.row_col(number)
 
     def get_line_contents(self, line):
         """ Returns the contents of a line specified by an integer """
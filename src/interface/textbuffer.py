@@ -10,6 +10,7 @@ from .mouse import Mouse
 from ..config import *
 from ..utils import *
 from ..network.message import *
+from ..network.forwarding import ConsoleForwarder
 from ..interpreter import DEFAULT_INTERPRETERS
 
 import string
@@ -55,7 +56,7 @@ class BufferTab(Tk.LabelFrame):
         self.scroll = Tk.Scrollbar(self)
         self.scroll.grid(row=0, column=2, sticky=Tk.NSEW)
         self.scroll.config(command=self.text.yview)
-        self.text.config(yscrollcommand=self.scroll.set)
+        self.text.config(yscrollcommand=self.on_text_scroll)
 
         # Drag is a small line that changes the size of the console
         self.drag = Dragbar(self, bg="white", height=2  )
@@ -126,6 +127,10 @@ class BufferTab(Tk.LabelFrame):
 
         self.text.bind("<{}-m>".format(CtrlKey), self.root.menu.toggle)
 
+        # Show the interface profiler (Ctrl+Shift+P)
+
+        self.text.bind("<{}-P>".format(CtrlKey), self.root.menu.show_profile)
+
         # Key bindings to handle select
         self.text.bind("<Shift-Left>",  self.select_left)
         self.text.bind("<Shift-Right>", self.select_right)
@@ -195,6 +200,10 @@ class BufferTab(Tk.LabelFrame):
         self.sel_start = "0.0"
         self.sel_end   = "0.0"
 
+        # Output from the interpreter sent to other users in batches
+
+        self.console_forwarder = ConsoleForwarder(self.send_console_batch)
+
         # Startup interpreter -- give interpreter information about this widget - i.e. console
 
         self.lang.start(out=self.console, lang_choices=self.root.client.get_lang_choices())
@@ -231,10 +240,16 @@ class BufferTab(Tk.LabelFrame):
         # Only send if the "language leader"
         if self.root.local_peer is not None:
             if self.root.local_peer.is_language_leader(self.id):
-                message = MSG_CONSOLE(self.root.local_peer.id, response)
-                self.send_message(message)
+                self.console_forwarder.write(response)
         return 
 
+    def send_console_batch(self, text):
+        """ Called by `self.console_forwarder` with the output collected since its last message """
+        if self.root.local_peer is not None:
+            message = MSG_CONSOLE(self.root.local_peer.id, text)
+            self.send_message(message)
+        return
+
     def soft_reset(self):
         """ Sets the revision number to 0 and sets the document contents """
         self.text.revision = 0
@@ -689,8 +704,8 @@ class BufferTab(Tk.LabelFrame):
         self.send_set_mark_msg()
         self.send_select_msg()
 
-        # Update colours
-        self.text.update_colours()
+        # Update highlights
+        self.text.schedule("highlights", self.text.refresh_highlights)
 
         return
 
@@ -778,9 +793,8 @@ class BufferTab(Tk.LabelFrame):
         else:
 
             row, _ = self.text.number_index_to_row_col(self.root.local_peer.get_index_num())
-            a, b   = "{}.0".format(row), "{}.end".format(row)
 
-            if self.text.get(a, b).lstrip() != "":
+            if self.text.get_rows(row, row + 1).lstrip() != "":
 
                 self.send_message( MSG_EVALUATE_BLOCK(self.root.local_peer.id, row, row) )
 
@@ -799,9 +813,7 @@ class BufferTab(Tk.LabelFrame):
 
             lines = self.get_current_block()
 
-            a, b = ("%d.0" % n for n in lines)
-
-            string = self.text.get( a , b ).lstrip()
+            string = self.text.get_rows(*lines).lstrip()
 
             if string != "":
 
@@ -921,14 +933,14 @@ class BufferTab(Tk.LabelFrame):
 
     def undo(self, event=None):
         ''' Triggers an undo event '''
-        if len(self.text.undo_stack):
+        if self.text.history.has_undo():
             op = self.text.get_undo_operation()
             self.apply_operation(self.new_operation(*op.ops), index=get_operation_index(op.ops), undo=True)
         return "break"
 
     def redo(self, event=None):
         ''' Re-applies the last undo event '''
-        if len(self.text.redo_stack):
+        if self.text.history.has_redo():
             op = self.text.get_redo_operation()
             self.apply_operation(self.new_operation(*op.ops), index=get_operation_index(op.ops), redo=True)
         return "break"
@@ -1028,10 +1040,16 @@ class BufferTab(Tk.LabelFrame):
         self.send_message(MSG_SELECT(self.root.local_peer.id, self.root.local_peer.select_start(), self.root.local_peer.select_end(), reply=0))
         return
 
+    def on_text_scroll(self, *args):
+        """ Updates the scroll bar and highlights any lines scrolled into view """
+        self.scroll.set(*args)
+        self.text.schedule("syntax", self.text.highlighter.update)
+        return
+
     def redraw(self):
         """ Calls any redraw method e.g. line numbers """
         # if self.frame_count == self.frame_reset:
-        self.line_numbers.redraw()
+        self.text.schedule("line_numbers", self.line_numbers.redraw)
         # self.frame_count = 0
         # self.frame_count += 1
         return
@@ -0,0 +1,138 @@
+from __future__ import absolute_import, print_function
+
+from .tkimport import Tk
+
+from ..utils import LatencyStats
+
+import os
+import threading
+
+class TkWaker:
+    """ Lets other threads wake the Tk main loop to call `callback` as soon as there is
+        work to do. On POSIX systems this writes a byte to a pipe that is registered
+        as a Tk file handler. Where Tk file handlers are unavailable (e.g. Windows)
+        it falls back to checking every `poll_ms` milliseconds whether `wake` has
+        been called. `root` can be any Tk widget. """
+    def __init__(self, root, callback, poll_ms=10):
+        self.root     = root
+        self.callback = callback
+        self.poll_ms  = poll_ms
+
+        self.lock     = threading.Lock()
+        self.signalled = False
+        self.closed    = False
+
+        self.read_fd  = None
+        self.write_fd = None
+
+        try:
+
+            self.read_fd, self.write_fd = os.pipe()
+
+            self.root.tk.createfilehandler(self.read_fd, Tk.READABLE, self.on_readable)
+
+        except (AttributeError, OSError, Tk.TclError):
+
+            self.close_pipe()
+
+            self.poll()
+
+    def is_polling(self):
+        """ Returns True if the main loop is polled instead of woken """
+        return self.write_fd is None
+
+    def wake(self):
+        """ Called from any thread to schedule `callback` in the Tk main loop """
+
+        with self.lock:
+
+            if self.signalled or self.closed:
+
+                return
+
+            self.signalled = True
+
+        if self.is_polling():
+
+            return
+
+        try:
+
+            os.write(self.write_fd, b"x")
+
+        except OSError:
+
+            pass
+
+        return
+
+    def on_readable(self, *args):
+        """ Tk file handler: clears the pipe and calls the callback """
+
+        with self.lock:
+
+            try:
+
+                os.read(self.read_fd, 512)
+
+            except OSError:
+
+                pass
+
+            self.signalled = False
+
+        self.callback()
+
+        return
+
+    def poll(self):
+        """ Fallback for systems without Tk file handlers """
+
+        if self.closed:
+
+            return
+
+        # Only call the callback if woken since the last poll
+
+        with self.lock:
+
+            signalled, self.signalled = self.signalled, False
+
+        if signalled:
+
+            self.callback()
+
+        self.root.after(self.poll_ms, self.poll)
+
+        return
+
+    def close_pipe(self):
+        for fd in (self.read_fd, self.write_fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self.read_fd = self.write_fd = None
+        return
+
+    def close(self):
+        """ Stops waking the main loop """
+
+        with self.lock:
+
+            self.closed = True
+
+        if not self.is_polling():
+
+            try:
+
+                self.root.tk.deletefilehandler(self.read_fd)
+
+            except Tk.TclError:
+
+                pass
+
+            self.close_pipe()
+
+        return
@@ -8,17 +8,26 @@
 """
 from __future__ import absolute_import
 from .config import *
+from .utils import LatencyStats
+from .document import blank_line_block, bracket_block
 
 from subprocess import Popen, TimeoutExpired
 from subprocess import PIPE, STDOUT
 from datetime import datetime
 
-# Import OSC library depending on Python version
-
-if PY_VERSION == 2:
-    from . import OSC
-else:
-    from . import OSC3 as OSC
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+def import_osc():
+    """ Returns the OSC library for this Python version. It is large and only used
+        by OSC interpreters, so it is imported the first time one is created """
+    if PY_VERSION == 2:
+        from . import OSC
+    else:
+        from . import OSC3 as OSC
+    return OSC
 
 try:
     broken_pipe_exception = BrokenPipeError
@@ -32,7 +41,7 @@ import re
 import time
 import threading
 import shlex
-import tempfile
+import codecs
 import os, os.path
 
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
@@ -52,6 +61,8 @@ def colour_format(text, colour):
 class DummyInterpreter:
     stop_sound = ""
     lang = None
+    comment = None # String that starts a comment
+    quotes = "'\"" # Characters that start and end a string
     def __init__(self, *args, **kwargs):
         self.re={}
 
@@ -59,35 +70,11 @@ class DummyInterpreter:
         return repr(self.__class__.__name__)
 
     def get_block_of_code(self, text, index):
-        """ Returns the start and end line numbers of the text to evaluate when pressing Ctrl+Return. """
-
-        # Get start and end of the buffer
-        start, end = "1.0", text.index("end")
-        lastline   = int(end.split('.')[0]) + 1
-
-        # Indicies of block to execute
-        block = [0,0]        
-        
-        # 1. Get position of cursor
-        cur_x, cur_y = index.split(".")
-        cur_x, cur_y = int(cur_x), int(cur_y)
-        
-        # 2. Go through line by line (back) and see what it's value is
-        
-        for line in range(cur_x, 0, -1):
-            if not text.get("%d.0" % line, "%d.end" % line).strip():
-                break
-
-        block[0] = line
-
-        # 3. Iterate forwards until we get two \n\n or index==END
-        for line in range(cur_x, lastline):
-            if not text.get("%d.0" % line, "%d.end" % line).strip():
-                break
-
-        block[1] = line
-
-        return block
+        """ Returns the start and end line numbers of the text to evaluate when pressing Ctrl+Return.
+            `text` is a ThreadSafeText, or anything with the same `document` and `lines` attributes,
+            and `index` is a Tk index e.g. "1.0" """
+        row = int(index.split(".")[0])
+        return blank_line_block(text.document, text.lines, row)
 
     def is_active(self):
         """ Returns true if not using a dummy interpreter """
@@ -150,8 +137,18 @@ class Interpreter(DummyInterpreter):
     comment_regex = compile_regex([])
     stdout   = None
     stdout_thread = None
+    output_thread = None
+    writer_thread = None
+    boot_thread = None
     filetype = ".txt"
     bootstrap = None
+    cwd      = None # Working directory for the process
+    ready_pattern = None # Regex found in the output once the language is ready, None when ready on launch
+    ready_timeout = 30 # Seconds to wait for `ready_pattern` before sending code anyway
+    read_size = 4096 # Most bytes read from the process at once
+    output_buffer_size = 256 # Chunks of output held before the process has to wait for them to be shown
+    partial_line_delay = 0.05 # Seconds to wait before showing a line with no newline, e.g. a prompt
+    newline = re.compile(r"\r\n|\r|\n") # Line endings in the output of the process
     def __init__(self, path, args=""):
 
         self.re = {"tag_bold": self.find_keyword, "tag_italic": self.find_comment}
@@ -160,11 +157,24 @@ class Interpreter(DummyInterpreter):
 
         self.args = self._get_args(args)
 
-        self.f_out = tempfile.TemporaryFile("w+", 1) # buffering = 1
         self.is_alive = True
 
         self.console = sys.stdout # can be overwritten
-        self.is_reading_from_stdout = False
+
+        # Chunks of bytes read from the process, None at the end of its output
+
+        self.output = queue.Queue(maxsize=self.output_buffer_size)
+
+        # Code to evaluate waits here with the time it was queued, None stops the writer. Nothing
+        # is written until the language is ready.
+
+        self.ready  = threading.Event()
+        self.writes = queue.Queue()
+        self.boot_time = None
+
+        # Time from evaluating code to it being written to the process
+
+        self.write_latency = LatencyStats(noun="evaluations")
 
         self.setup()
 
@@ -185,108 +195,327 @@ class Interpreter(DummyInterpreter):
         return
 
     def start(self, *args, **kwargs):
-        """ Opens the process with the interpreter language """
+        """ Boots the interpreter language in a background thread and returns straight away.
+            Code evaluated before it is ready is sent once it is. """
 
         DummyInterpreter.start(self, *args, **kwargs)
 
+        self.boot_thread = threading.Thread(target=self.boot, kwargs=kwargs)
+        self.boot_thread.daemon = True
+        self.boot_thread.start()
+
+        self.writer_thread = threading.Thread(target=self.write_queued)
+        self.writer_thread.daemon = True
+        self.writer_thread.start()
+
+        return self
+
+    def boot(self, **kwargs):
+        """ Opens the process with the interpreter language, loads the bootstrap and
+            waits until the language is ready. Runs in `self.boot_thread`. """
+
+        started = time.time()
+
+        try:
+
+            self.launch(**kwargs)
+
+        except ExecutableNotFoundError as e:
+
+            self.is_alive = False
+
+            self.console.write("Unable to start {}: {}".format(self, e))
+
+            return
+
+        if not self.ready.wait(self.ready_timeout) and self.is_alive:
+
+            self.console.write("{} has not said it is ready after {}s, sending code anyway".format(self, self.ready_timeout))
+
+        self.boot_time = time.time() - started
+
+        self.ready.set()
+
+        return
+
+    def launch(self, **kwargs):
+        """ Opens the process and writes the bootstrap code to it """
+
         try:
         
-            self.lang = Popen(self.path + self.args, shell=False, universal_newlines=True, bufsize=1,
-                              stdin=PIPE,
-                              stdout=self.f_out,
-                              stderr=self.f_out,
-    						  creationflags=CREATE_NO_WINDOW)
+            # The pipes are binary: `read_pipe` reads raw bytes and `stdout` decodes them
 
-            self.stdout_thread = threading.Thread(target=self.stdout)
-            self.stdout_thread.start()
+            self.lang = Popen(self.path + self.args, shell=False,
+                              stdin=PIPE,
+                              stdout=PIPE,
+                              stderr=STDOUT,
+                              cwd=self.cwd,
+                              creationflags=CREATE_NO_WINDOW)
 
-        except FileNotFoundError:
+        except (OSError, IOError):
 
             raise ExecutableNotFoundError(self.get_path_as_string())
 
+        # One thread reads the pipe as fast as possible, another shows what it reads
+
+        self.stdout_thread = threading.Thread(target=self.read_pipe)
+        self.stdout_thread.daemon = True
+        self.stdout_thread.start()
+
+        self.output_thread = threading.Thread(target=self.stdout)
+        self.output_thread.daemon = True
+        self.output_thread.start()
+
         # Load bootfile
 
         if self.bootstrap is not None:
 
-            for line in self.bootstrap.split("\n"):
+            bootstrap = "\n".join(line.rstrip() for line in self.bootstrap.split("\n")) + "\n"
 
-                self.lang.stdin.write(line.rstrip() + "\n")
-                self.lang.stdin.flush()
+            self.lang.stdin.write(bootstrap.encode("utf-8"))
+            self.lang.stdin.flush()
 
-        return self
+        if self.ready_pattern is None:
+
+            self.ready.set()
+
+        return
+
+    def check_ready(self, text):
+        """ Marks the language as ready if `text`, output from the process, matches `ready_pattern` """
+        if not self.ready.is_set() and self.ready_pattern is not None and self.ready_pattern.search(text):
+            self.ready.set()
+        return
+
+    def is_ready(self):
+        """ Returns True once the language has started and code is sent straight to it """
+        return self.ready.is_set()
+
+    def is_active(self):
+        """ Returns True once the language has been started, even if it is not ready yet """
+        return self.boot_thread is not None and self.is_alive
 
     def get_path_as_string(self):
         """ Returns the executable input as a string """
         return " ".join(self.path)
 
     def find_keyword(self, string):
-        return [(match.start(), match.end()) for match in self.keyword_regex.finditer(string)]
+        # Ignore empty matches, e.g. from a regex with no keywords
+        return [(match.start(), match.end()) for match in self.keyword_regex.finditer(string) if match.end() > match.start()]
 
     def find_comment(self, string):
-        return [(match.start(), match.end()) for match in self.comment_regex.finditer(string)]
+        return [(match.start(), match.end()) for match in self.comment_regex.finditer(string) if match.end() > match.start()]
 
     def write_stdout(self, string):
         """ Write text to the language process stdin """
-        if self.is_alive:
-            self.lang.stdin.write(self.format(string))
+        if self.is_alive and self.lang is not None:
+            self.lang.stdin.write(self.format(string).encode("utf-8"))
             self.lang.stdin.flush()
         return
 
     def evaluate(self, string, *args, **kwargs):
-        """ Sends a string to the stdin and prints the text to the console """
+        """ Prints the text to the console and queues it to be sent to the stdin. Stopping
+            all sound drops any code still waiting to be sent. """
         # Print to console
         self.print_stdin(string, *args, **kwargs)
-        # Pipe to the subprocess
-        self.write_stdout(string)
-        # Read from subprocess after 0.1 sec
-        # def read():
-        #     time.sleep(0.05)
-        #     self.read_from_stdout()
-        # threading.Thread(target=read).start()
+        # Queue for the writer thread
+        stop_sound = self.get_stop_sound()
+        if stop_sound and string.strip() == stop_sound:
+            self.clear_queue()
+        self.writes.put((time.time(), string))
         return
 
-    def stdout(self, text=""):
-        """ Continually reads the stdout from the self.lang process """
-        while self.is_alive:
-            if self.lang.poll():
-                self.is_alive = False
-                break
+    def clear_queue(self):
+        """ Drops any code waiting to be written to the process and returns how much there was """
+        dropped = 0
+        try:
+            while True:
+                item = self.writes.get_nowait()
+                if item is None:
+                    self.writes.put(None) # Still stop the writer
+                    break
+                dropped += 1
+        except queue.Empty:
+            pass
+        return dropped
+
+    def queue_depth(self):
+        """ Returns the number of evaluations waiting to be written to the process """
+        return self.writes.qsize()
+
+    def write_queued(self):
+        """ Writes queued code to the process in order once it is ready, so that a busy
+            process with a full pipe only holds up this thread. Runs in `self.writer_thread`. """
+
+        self.ready.wait()
+
+        while True:
+
+            item = self.writes.get()
+
+            if item is None:
+
+                return
+
+            queued, string = item
+
             try:
-                response = self.read_from_stdout()
-                # Send the response
-                if response:
-                    self.console.root.send_console_message(response)
-                time.sleep(0.1)
-            except ValueError as e:
-                print(e)
+
+                self.write_stdout(string)
+
+            except (broken_pipe_exception, ValueError, OSError) as e:
+
+                if self.is_alive:
+
+                    self.console.write("Unable to send code to {}: {}".format(self, e))
+
                 return
+
+            self.write_latency.add(time.time() - queued)
+
+    def stop_writer(self, timeout=1):
+        """ Lets the writer thread send what is already queued, waiting at most `timeout` seconds """
+        self.ready.set()
+        self.writes.put(None)
+        if self.writer_thread is not None and self.writer_thread is not threading.current_thread():
+            self.writer_thread.join(timeout)
         return
 
-    def read_from_stdout(self):
-        if self.is_reading_from_stdout is False:
-            self.is_reading_from_stdout = True
-            # Store the text response
-            response = []
-            # Check contents of file
-            self.f_out.seek(0)
-            for stdout_line in iter(self.f_out.readline, ""):
-                response.append( stdout_line.rstrip() )
-                self.console.write(response[-1]) 
-            # clear tmpfile
-            self.f_out.truncate(0)
-            self.is_reading_from_stdout = False
-        return "\n".join(response)
+    def read_pipe(self):
+        """ Reads the stdout and stderr of the self.lang process into `self.output` as it arrives.
+            The queue is bounded, so a process writing faster than the console can show its
+            output waits rather than having its output dropped. """
+        fd = self.lang.stdout.fileno()
+        while True:
+            try:
+                chunk = os.read(fd, self.read_size)
+            except (IOError, OSError):
+                chunk = b""
+            if not chunk:
+                self.output.put(None)
+                return
+            self.output.put(chunk)
+
+    def stdout(self, text=""):
+        """ Shows the output of the self.lang process a batch of lines at a time. Output
+            without a newline at the end, such as a prompt, is shown once the process
+            has paused for `partial_line_delay` seconds. Lines can end with "\n", "\r\n"
+            or "\r", as with a pipe opened with universal newlines. """
+
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+        partial = ""
+
+        # True when a partial line ending in "\r" was shown, so a "\n" that follows it
+        # ends the same line
+
+        skip_newline = False
+
+        while True:
+
+            # Wait for output, or briefly for the rest of an incomplete line
+
+            try:
+
+                chunks = [self.output.get(timeout=self.partial_line_delay if partial else None)]
+
+            except queue.Empty:
+
+                self.handle_output([partial])
+
+                skip_newline = partial.endswith("\r")
+
+                partial = ""
+
+                continue
+
+            # Take everything else that has arrived as one batch
+
+            try:
+
+                while chunks[-1] is not None:
+
+                    chunks.append(self.output.get_nowait())
+
+            except queue.Empty:
+
+                pass
+
+            finished = chunks[-1] is None
+
+            text = partial + "".join(decoder.decode(chunk) for chunk in chunks if chunk is not None)
+
+            if finished:
+
+                text += decoder.decode(b"", True)
+
+            if skip_newline and text.startswith("\n"):
+
+                text = text[1:]
+
+            skip_newline = False
+
+            # A "\r" at the end may be the first half of a "\r\n" split between reads
+
+            cut = len(text) - 1 if text.endswith("\r") and not finished else len(text)
+
+            lines = self.newline.split(text[:cut])
+
+            partial = lines.pop() + text[cut:]
+
+            if finished and partial:
+
+                lines.append(partial)
+
+            if lines:
+
+                self.handle_output(lines)
+
+            if finished:
+
+                self.is_alive = False
+
+                return
+
+    def handle_output(self, lines):
+        """ Writes lines of output to the console and sends them on to other users """
+
+        if not self.is_alive:
+
+            return
+
+        lines = [line.rstrip() for line in lines]
+
+        for line in lines:
+
+            self.console.write(line)
+
+        response = "\n".join(lines)
+
+        self.check_ready(response)
+
+        if response.strip():
+
+            self.console.root.send_console_message(response)
+
+        return
 
     def kill(self):
         """ Stops communicating with the subprocess """
-        # End process if not done so already
+        # Send anything still queued, e.g. code to stop the sound, and end process if not done so already
+        self.stop_writer()
         self.is_alive = False
-        if self.lang.poll() is None:
+        if self.lang is not None and self.lang.poll() is None:
+            # Closing stdin ends most interpreters, and the reader threads finish with the output
             try:
-                self.lang.communicate(timeout=3)
+                self.lang.stdin.close()
+            except (IOError, OSError):
+                pass
+            try:
+                self.lang.wait(timeout=3)
             except TimeoutExpired:
                 self.lang.kill()
-                self.lang.communicate()
+                self.lang.wait()
 
 class BuiltinInterpreter(Interpreter):
     def __init__(self):
@@ -296,6 +525,7 @@ class FoxDotInterpreter(BuiltinInterpreter):
     name = "FoxDot"
     stop_sound = "Clock.clear()"
     filetype=".py"
+    comment = "#"
     path = "{} -u -m FoxDot --pipe".format(PYTHON_EXECUTABLE)
     id = 0
 
@@ -341,8 +571,12 @@ class TidalInterpreter(BuiltinInterpreter):
     name = "TidalCycles"
     path = 'ghci'
     filetype = ".tidal"
+    comment = "--"
+    quotes = "\"" # Haskell uses ' in names
     stop_sound = "hush"
     id = 1
+    ready_pattern = re.compile(r"tidal>") # Prompt set at the end of the bootstrap
+    ready_timeout = 60
 
     def start(self, *args, **kwargs):
 
@@ -352,6 +586,14 @@ class TidalInterpreter(BuiltinInterpreter):
 
         self.bootstrap = bootstrap
 
+        # Start
+
+        Interpreter.start(self, *args, **kwargs)
+        
+        return self
+
+    def setup(self):
+
         # Set any keywords e.g. d1 and $
 
         self.keywords  = ["d{}".format(n) for n in range(1,17)] # update
@@ -359,12 +601,6 @@ class TidalInterpreter(BuiltinInterpreter):
 
         self.keyword_regex = compile_regex(self.keywords)
 
-        # Start
-
-        Interpreter.start(self, *args, **kwargs)
-        
-        return self
-
     def __repr__(self):
         return "TidalCycles"
 
@@ -403,7 +639,8 @@ class OSCInterpreter(Interpreter):
     """ Class for sending messages via OSC instead of using a subprocess """
     def __init__(self):
         self.re = {"tag_bold": self.find_keyword, "tag_italic": self.find_comment}
-        self.client = OSC.OSCClient()
+        self.OSC = import_osc()
+        self.client = self.OSC.OSCClient()
         self.client.connect((self.host, self.port))
 
     # Overload to not activate a server
@@ -432,6 +669,7 @@ class _SuperColliderInterpreter(OSCInterpreter):
     name = "SuperCollider"
     stop_sound = "s.freeAll"
     filetype = ".scd"
+    comment = "//"
     host = 'localhost'
     port = 57120
     id = 2
@@ -441,7 +679,7 @@ class _SuperColliderInterpreter(OSCInterpreter):
 
     def new_osc_message(self, string):
         """ Returns OSC message for Troop Quark """
-        msg = OSC.OSCMessage("/troop")
+        msg = self.OSC.OSCMessage("/troop")
         msg.append([string])
         return msg
 
@@ -463,97 +701,15 @@ class _SuperColliderInterpreter(OSCInterpreter):
                     instring = True
                     instring_char = char
             elif char == "/":
-                if not instring and i < len(string) and string[i + 1] == "/":
+                if not instring and (i + 1) < len(string) and string[i + 1] == "/":
                     return [(i, len(string))]
         return []
 
     def get_block_of_code(self, text, index):
-        """ Returns the start and end line numbers of the text to evaluate when pressing Ctrl+Return. """
-
-        # Get start and end of the buffer
-        start, end = "1.0", text.index("end")
-        lastline   = int(end.split('.')[0]) + 1
-
-        # Indicies of block to execute
-        block = [0,0]        
-        
-        # 1. Get position of cursor
-        cur_y, cur_x = index.split(".")
-        cur_y, cur_x = int(cur_y), int(cur_x)
-
-        left_cur_y, left_cur_x   = cur_y, cur_x
-        right_cur_y, right_cur_x = cur_y, cur_x
-
-        # Go back to find a left bracket
-
-        while True:
-
-            new_left_cur_y,  new_left_cur_x  = self.get_left_bracket(text, left_cur_y, left_cur_x)
-            new_right_cur_y, new_right_cur_x = self.get_right_bracket(text, right_cur_y, right_cur_x)
-
-            if new_left_cur_y is None or new_right_cur_y is None:
-
-                block = [left_cur_y, right_cur_y + 1]
-
-                break
-
-            else:
-
-                left_cur_y,  left_cur_x  = new_left_cur_y,  new_left_cur_x
-                right_cur_y, right_cur_x = new_right_cur_y, new_right_cur_x
-
-        return block
-
-    def get_left_bracket(self, text, cur_y, cur_x):
-        count = 0
-        line_text = text.get("{}.{}".format(cur_y, 0), "{}.{}".format(cur_y, "end"))
-        for line_num in range(cur_y, 0, -1):
-            # Only check line if it has text
-            if len(line_text) > 0:
-                for char_num in range(cur_x - 1, -1, -1):
-                    
-                    try:
-                        char = line_text[char_num] 
-                    except IndexError as e:
-                        print("left bracket, string is {}, index is {}".format(line_text, char_num))
-                        raise(e)
-
-                    if char == ")":
-                        count += 1
-                    elif char == "(":
-                        if count == 0:
-                            return line_num, char_num
-                        else:
-                            count -= 1
-            line_text = text.get("{}.{}".format(line_num - 1, 0), "{}.{}".format(line_num - 1, "end"))
-            cur_x     = len(line_text)
-        return None, None
-
-    def get_right_bracket(self, text, cur_y, cur_x):
-        num_lines = int(text.index("end").split(".")[0]) + 1
-        count = 0
-        for line_num in range(cur_y, num_lines):
-            line_text = text.get("{}.{}".format(line_num, 0), "{}.{}".format(line_num, "end"))
-            # Only check line if it has text
-            if len(line_text) > 0:
-                for char_num in range(cur_x, len(line_text)):
-                    
-                    try:
-                        char = line_text[char_num] 
-                    except IndexError as e:
-                        print("right bracket, string is {}, index is {}".format(line_text, char_num))
-                        raise(e)
-
-                    if char == "(":
-                        count += 1
-                    if char == ")":
-                        if count == 0:
-                            return line_num, char_num + 1
-                        else:
-                            count -= 1
-            cur_x = 0
-        else:
-            return None, None
+        """ Returns the start and end line numbers of the text to evaluate when pressing Ctrl+Return.
+            This is the outermost pair of round brackets around the cursor, or its line. """
+        row, col = (int(n) for n in index.split("."))
+        return bracket_block(text.brackets, row, col)
 
 # Work in progress sc interpreter            
 
@@ -562,9 +718,11 @@ class SuperColliderInterpreter(BuiltinInterpreter, OSCInterpreter):
     path = ""
     stop_sound = "s.freeAll"
     filetype = ".scd"
+    comment = "//"
     host = 'localhost'
     port = 57120
     id = 2
+    ready_pattern = re.compile(r"Troop") # Printed by the Troop quark when it starts listening
     def __init__(self, *args, **kwargs):
         BuiltinInterpreter.__init__(self, *args, **kwargs)
         OSCInterpreter.__init__(self, *args, **kwargs)
@@ -573,9 +731,20 @@ class SuperColliderInterpreter(BuiltinInterpreter, OSCInterpreter):
         return "SuperCollider"
 
     def start(self, *args, **kwargs):
-        """ Need to find the path for sclang and give it a startup file """
+        """ Boots sclang in the background and sends code to it over OSC """
+
+        # Listen from the process
+
+        BuiltinInterpreter.start(self, *args, **kwargs)
+
+        # Send messages to the OSC
+
+        OSCInterpreter.start(self, *args, **kwargs)
+
+        return self
 
-        # Boot supercollider and read from it
+    def launch(self, **kwargs):
+        """ Need to find the path for sclang and give it a startup file """
 
         from .boot import supercollider
 
@@ -583,28 +752,37 @@ class SuperColliderInterpreter(BuiltinInterpreter, OSCInterpreter):
 
         fn_path = supercollider.get_startup_file(*kwargs.get("lang_choices", [0, 0, 1])[:2]) # update with FoxDot and Tidal information
 
-        os.chdir(os.path.dirname(sc_path))
+        # Run sclang from its own directory
 
-        self.path = [sc_path, fn_path]
+        self.cwd = os.path.dirname(sc_path) or None
 
-        # Listen from the process
+        self.path = [sc_path, fn_path]
 
-        BuiltinInterpreter.start(self, *args, **kwargs)
+        return BuiltinInterpreter.launch(self, **kwargs)
 
-        # Send messages to the OSC
+    def evaluate(self, string, *args, **kwargs):
+        """ Prints the code and sends it to the Troop quark once sclang is ready """
+        return Interpreter.evaluate(self, string, *args, **kwargs)
 
-        OSCInterpreter.start(self, *args, **kwargs)
+    def write_stdout(self, string):
+        """ Sends code to the Troop quark over OSC """
+        if self.is_alive:
+            self.client.send(self.new_osc_message(string))
+        return
 
     def kill(self):
         """ Force SC to kill - hangs on communicate """
-        self.lang.kill()
+        self.stop_writer()
+        self.is_alive = False
+        if self.lang is not None:
+            self.lang.kill()
         # BuiltinInterpreter.kill(self)
         # OSCInterpreter.kill(self)
         return
 
     def new_osc_message(self, string):
         """ Returns OSC message for Troop Quark """
-        msg = OSC.OSCMessage("/troop")
+        msg = self.OSC.OSCMessage("/troop")
         msg.append([string])
         return msg
 
@@ -626,97 +804,15 @@ class SuperColliderInterpreter(BuiltinInterpreter, OSCInterpreter):
                     instring = True
                     instring_char = char
             elif char == "/":
-                if not instring and i < len(string) and string[i + 1] == "/":
+                if not instring and (i + 1) < len(string) and string[i + 1] == "/":
                     return [(i, len(string))]
         return []
 
     def get_block_of_code(self, text, index):
-        """ Returns the start and end line numbers of the text to evaluate when pressing Ctrl+Return. """
-
-        # Get start and end of the buffer
-        start, end = "1.0", text.index("end")
-        lastline   = int(end.split('.')[0]) + 1
-
-        # Indicies of block to execute
-        block = [0,0]        
-        
-        # 1. Get position of cursor
-        cur_y, cur_x = index.split(".")
-        cur_y, cur_x = int(cur_y), int(cur_x)
-
-        left_cur_y, left_cur_x   = cur_y, cur_x
-        right_cur_y, right_cur_x = cur_y, cur_x
-
-        # Go back to find a left bracket
-
-        while True:
-
-            new_left_cur_y,  new_left_cur_x  = self.get_left_bracket(text, left_cur_y, left_cur_x)
-            new_right_cur_y, new_right_cur_x = self.get_right_bracket(text, right_cur_y, right_cur_x)
-
-            if new_left_cur_y is None or new_right_cur_y is None:
-
-                block = [left_cur_y, right_cur_y + 1]
-
-                break
-
-            else:
-
-                left_cur_y,  left_cur_x  = new_left_cur_y,  new_left_cur_x
-                right_cur_y, right_cur_x = new_right_cur_y, new_right_cur_x
-
-        return block
-
-    def get_left_bracket(self, text, cur_y, cur_x):
-        count = 0
-        line_text = text.get("{}.{}".format(cur_y, 0), "{}.{}".format(cur_y, "end"))
-        for line_num in range(cur_y, 0, -1):
-            # Only check line if it has text
-            if len(line_text) > 0:
-                for char_num in range(cur_x - 1, -1, -1):
-                    
-                    try:
-                        char = line_text[char_num] 
-                    except IndexError as e:
-                        print("left bracket, string is {}, index is {}".format(line_text, char_num))
-                        raise(e)
-
-                    if char == ")":
-                        count += 1
-                    elif char == "(":
-                        if count == 0:
-                            return line_num, char_num
-                        else:
-                            count -= 1
-            line_text = text.get("{}.{}".format(line_num - 1, 0), "{}.{}".format(line_num - 1, "end"))
-            cur_x     = len(line_text)
-        return None, None
-
-    def get_right_bracket(self, text, cur_y, cur_x):
-        num_lines = int(text.index("end").split(".")[0]) + 1
-        count = 0
-        for line_num in range(cur_y, num_lines):
-            line_text = text.get("{}.{}".format(line_num, 0), "{}.{}".format(line_num, "end"))
-            # Only check line if it has text
-            if len(line_text) > 0:
-                for char_num in range(cur_x, len(line_text)):
-                    
-                    try:
-                        char = line_text[char_num] 
-                    except IndexError as e:
-                        print("right bracket, string is {}, index is {}".format(line_text, char_num))
-                        raise(e)
-
-                    if char == "(":
-                        count += 1
-                    if char == ")":
-                        if count == 0:
-                            return line_num, char_num + 1
-                        else:
-                            count -= 1
-            cur_x = 0
-        else:
-            return None, None
+        """ Returns the start and end line numbers of the text to evaluate when pressing Ctrl+Return.
+            This is the outermost pair of round brackets around the cursor, or its line. """
+        row, col = (int(n) for n in index.split("."))
+        return bracket_block(text.brackets, row, col)
         
 
 # langtypes = { FOXDOT        : FoxDotInterpreter,
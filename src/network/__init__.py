@@ -1,4 +1,7 @@
 from __future__ import absolute_import
 
+# Only the Tk-free modules are imported here so that running a server does not
+# load the interface. The GUI client is imported from `src.network.client`.
+
 from .server import *
-from .client import *
\ No newline at end of file
+from .headless import *
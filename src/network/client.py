@@ -11,11 +11,6 @@ from .message import *
 from time import sleep, time
 from hashlib import md5
 
-try:
-    import queue
-except ImportError:
-    import Queue as queue
-
 import sys
 
 class Client:
@@ -63,7 +58,7 @@ class Client:
 
                 self.input.print_message("Password accepted")
 
-                self.send_queue = queue.Queue()
+                self.send_queue = self.send.queue
 
         # Quit with error output if we cannot connect
             
@@ -101,12 +96,16 @@ class Client:
 
         # Send information about this client to the server
 
-        self.send( MSG_CONNECT(self.id, self.name, self.send.hostname, self.send.port, self.get_lang_choices()) )
+        self.send_queue.put( MSG_CONNECT(self.id, self.name, self.send.hostname, self.send.port, self.get_lang_choices() + CLIENT_FEATURES) )
 
         # Give the recv / send a reference to the user-interface
         self.recv.ui = self.ui
         self.send.ui = self.ui
 
+        # Start sending messages from the queue
+
+        self.send.start()
+
         self.ui.run()
 
     @staticmethod
@@ -125,32 +124,6 @@ class Client:
         """ Returns a list of which languages are being used denoted by 1 (chosen) and 0 """
         return [int(lang[0].is_true_lang()) for lang in self.lang.values()]
 
-    def update_send(self):
-        """ Continually polls the queue and sends any messages to the server """
-        try:
-            while self.send.connected:
-                
-                try:
-                    
-                    msg = self.send_queue.get_nowait()
-
-                    self.send( msg )
-
-                except ConnectionError as e:
-                    
-                    return print(e)
-                
-                self.ui.root.update_idletasks()
-                
-        # Break when the queue is empty
-        except queue.Empty:
-            pass
-            
-        # Recursive call
-        self.ui.root.after(30, self.update_send)
-        
-        return
-            
     def kill(self):
         """ Kills the connection sockets and UI correctly """
 
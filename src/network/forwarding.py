@@ -0,0 +1,160 @@
+"""
+    Network/forwarding.py
+    ---------------------
+
+    The user running a language (its "language leader") sends the output
+    of the interpreter to everyone else. Output can arrive many times a
+    second, e.g. from a SuperCollider post window or an error in a FoxDot
+    loop, so it is collected and sent at most once every `interval`
+    seconds. Repeated lines, and output repeated in consecutive writes
+    such as the same error each time round a loop, are sent once with a
+    count. Lines beyond `max_lines` in one interval are dropped with a
+    note of how many.
+
+"""
+
+from __future__ import absolute_import
+
+from ..config import CONSOLE_SEND_INTERVAL, CONSOLE_SEND_MAX_LINES
+
+from threading import Lock, Timer
+from time import time
+
+__all__ = ["ConsoleForwarder"]
+
+class ConsoleForwarder:
+    """ Collects console output written from any thread and calls `send` with it
+        as a single string, no more than once every `interval` seconds """
+    def __init__(self, send, interval=CONSOLE_SEND_INTERVAL, max_lines=CONSOLE_SEND_MAX_LINES):
+        self.send      = send
+        self.interval  = interval
+        self.max_lines = max_lines
+
+        self.lock    = Lock()
+        self.blocks  = [] # [tuple of (line, times repeated), times the block is repeated]
+        self.num_lines = 0
+        self.dropped = 0
+        self.timer   = None
+        self.last_sent = 0
+        self.closed  = False
+
+        # Counters for output received vs messages sent
+
+        self.lines_written = 0
+        self.messages_sent = 0
+
+    def write(self, response):
+        """ Adds output to the next message and schedules it to be sent """
+
+        with self.lock:
+
+            if self.closed:
+
+                return
+
+            block = []
+
+            for line in response.split("\n"):
+
+                self.lines_written += 1
+
+                if len(block) and block[-1][0] == line:
+
+                    block[-1] = (line, block[-1][1] + 1)
+
+                else:
+
+                    block.append((line, 1))
+
+            block = tuple(block)
+
+            if len(self.blocks) and self.blocks[-1][0] == block:
+
+                self.blocks[-1][1] += 1
+
+            else:
+
+                # Keep as many lines as there is room for and drop the rest
+
+                kept = block[:max(0, self.max_lines - self.num_lines)]
+
+                if len(kept):
+
+                    self.blocks.append([kept, 1])
+
+                    self.num_lines += len(kept)
+
+                self.dropped += len(block) - len(kept)
+
+            if self.timer is None:
+
+                delay = max(0, self.interval - (time() - self.last_sent))
+
+                self.timer = Timer(delay, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+        return
+
+    def flush(self):
+        """ Sends the output collected since the last message """
+
+        with self.lock:
+
+            self.timer = None
+
+            blocks, self.blocks = self.blocks, []
+
+            dropped, self.dropped = self.dropped, 0
+
+            self.num_lines = 0
+
+            if self.closed or not (blocks or dropped):
+
+                return
+
+            self.last_sent = time()
+
+            self.messages_sent += 1
+
+        text = []
+
+        for block, repeats in blocks:
+
+            text.extend(self.format(line, count) for line, count in block)
+
+            if repeats > 1:
+
+                if len(block) == 1:
+
+                    text[-1] = self.format(block[0][0], block[0][1] * repeats)
+
+                else:
+
+                    text.append(u"\u00d7{} (the {} lines above)".format(repeats, len(block)))
+
+        if dropped:
+
+            text.append("... {} more lines not sent".format(dropped))
+
+        self.send("\n".join(text))
+
+        return
+
+    @staticmethod
+    def format(line, count):
+        """ Returns a line of output followed by the number of times it was repeated, if more than once """
+        return line if count == 1 else u"{} \u00d7{}".format(line, count)
+
+    def close(self):
+        """ Stops sending output """
+
+        with self.lock:
+
+            self.closed = True
+
+            if self.timer is not None:
+
+                self.timer.cancel()
+
+        return
@@ -0,0 +1,573 @@
+"""
+    Client/Headless.py
+    ------------------
+
+    A client that connects to a Polyglot server without a user interface,
+    for bots, recording clients and performance tests. It uses the same
+    Sender, Receiver and OT client as the Tk client but keeps each buffer
+    as a plain document with line, bracket and cursor indices, so it does
+    not need a display and many can run in one process.
+
+        client = HeadlessClient("localhost", 57890, "bot", password="")
+        client.wait_until(client.is_synchronised)
+        client.insert("p1 >> pluck()")
+        client.evaluate()
+        client.kill()
+
+    Messages from the server are handled in the Receiver's thread. The
+    methods used to edit the document are safe to call from any thread.
+
+"""
+
+from __future__ import absolute_import, print_function
+
+from ..config import *
+from ..utils import *
+from ..interpreter import DummyInterpreter, DEFAULT_INTERPRETERS
+from ..ot.client import Client as OTClient
+from ..ot.text_operation import TextOperation
+from ..document import AuthorshipIndex, CursorIndex, LineIndex, BracketIndex
+
+from .sender import *
+from .receiver import *
+from .message import *
+from .forwarding import ConsoleForwarder
+
+from collections import deque
+from threading import RLock, Condition
+from time import time
+
+__all__ = ["HeadlessClient", "HeadlessBuffer", "HeadlessPeer", "HeadlessConsole"]
+
+class HeadlessPeer:
+    """ The location of a connected user in a HeadlessClient """
+    def __init__(self, id_num, name, buf_id=0, index=0):
+        self.id        = id_num
+        self.name      = name
+        self.buf_id    = buf_id
+        self.index     = index
+        self.selection = (0, 0)
+        self.connected = True
+
+    def __repr__(self):
+        return "<Peer {} '{}' - {}:{}>".format(self.id, self.name, self.buf_id, self.index)
+
+    def __str__(self):
+        return str(self.name)
+
+class HeadlessConsole:
+    """ Stores the most recent lines written by an interpreter instead of displaying them """
+    def __init__(self, buf, size=1000):
+        self.root  = buf # Interpreters send console messages with `console.root`
+        self.lines = deque(maxlen=size)
+
+    def write(self, string):
+        if string != "\n":
+            self.lines.append(string.rstrip())
+        return
+
+    def flush(self, *args, **kwargs):
+        return
+
+class HeadlessBuffer(OTClient):
+    """ A document shared with the server and the indices used to edit it """
+    def __init__(self, client, buf_id, lang):
+        OTClient.__init__(self, 0)
+
+        self.client = client
+        self.id     = buf_id
+        self.lang   = lang
+
+        self.document  = ""
+        self.lines     = LineIndex()
+        self.brackets  = BracketIndex(comment=lang.comment, quotes=lang.quotes)
+        self.peer_tags = AuthorshipIndex()
+        self.cursors   = CursorIndex()
+
+        self.console = HeadlessConsole(self)
+
+        self.console_forwarder = ConsoleForwarder(self.send_console_batch)
+
+        self.active_peer = None
+
+    def __repr__(self):
+        return "<HeadlessBuffer {} - {}>".format(self.id, self.lang)
+
+    def read(self):
+        return self.document
+
+    def get_rows(self, start, end):
+        """ Returns the contents of the rows from `start` up to (not including) `end`,
+            ending with the newline of the last row as in the Tk client """
+        if start > len(self.lines) or end <= start:
+            return ""
+        return self.document[self.lines.line_start(start):self.lines.line_end(end - 1)] + "\n"
+
+    # Operational Transformation
+    # ==========================
+
+    def send_operation(self, revision, operation):
+        """ Called by the OT client to send an operation to the server """
+        return self.client.send_message(MSG_OPERATION(self.client.id, operation.ops, revision), self.id)
+
+    def apply_operation(self, operation, peer=None):
+        """ Applies an operation to the document and updates the indices """
+
+        if peer is None:
+
+            peer = self.active_peer
+
+        self.document = operation(self.document)
+
+        # Rebuild the indices if the operation replaced most of the document
+
+        if is_bulk_operation(operation.ops, len(self.document)):
+            self.lines.set_text(self.document)
+            self.brackets.set_text(self.document)
+        else:
+            self.lines.apply(operation.ops)
+            self.brackets.apply(operation.ops, self.document)
+
+        self.peer_tags.apply(operation.ops, peer.id)
+
+        return
+
+    def adjust_peer_locations(self, peer, ops):
+        """ Moves the peers after an operation by the number of characters it added """
+
+        shift = get_operation_size(ops)
+        index = get_operation_index(ops) - shift
+
+        for other_id, location in self.cursors.shift(index, shift, exclude=peer.id):
+
+            self.client.peers[other_id].index = location
+
+        return
+
+    def move_peer(self, peer, index):
+        """ Moves a peer to `index` in this buffer """
+
+        if peer.buf_id != self.id:
+
+            self.client.buffers[peer.buf_id].cursors.remove(peer.id)
+
+        peer.buf_id = self.id
+        peer.index  = min(max(index, 0), len(self.document))
+
+        self.cursors.set(peer.id, peer.index)
+
+        return
+
+    def apply_local_operation(self, ops, index):
+        """ Applies a list of ops made by the local peer, moves it to `index` and sends
+            the operation to the server """
+
+        peer = self.client.local_peer
+
+        operation = TextOperation(ops)
+
+        self.apply_operation(operation, peer)
+
+        self.adjust_peer_locations(peer, ops)
+
+        self.move_peer(peer, index)
+
+        self.apply_client(operation)
+
+        return
+
+    # Handle methods
+    # ==============
+
+    def handle_operation(self, message):
+        """ Acknowledges the local peer's operations or applies a remote peer's operation """
+
+        if message["src_id"] == self.client.id:
+
+            self.server_ack()
+
+        else:
+
+            self.active_peer = self.client.get_peer(message)
+
+            self.apply_server(TextOperation(message["operation"]))
+
+            if get_operation_size(message["operation"]) != 0:
+
+                self.adjust_peer_locations(self.active_peer, message["operation"])
+
+            self.move_peer(self.active_peer, get_operation_index(message["operation"]))
+
+        return
+
+    def handle_set_all(self, document, peer_tag_loc):
+        """ Sets the contents of the document """
+
+        self.reset() # inherited from OTClient
+
+        self.document = document
+        self.lines.set_text(document)
+        self.brackets.set_text(document)
+        self.peer_tags = AuthorshipIndex.from_snapshot(peer_tag_loc)
+
+        return
+
+    def handle_evaluate(self, message):
+        """ Evaluates the rows given in the message """
+
+        peer = self.client.get_peer(message)
+
+        start, end = message["start"], message["end"]
+
+        string = self.get_rows(start, end + 1 if start == end else end)
+
+        self.lang.evaluate(string, name=str(peer))
+
+        return
+
+    def send_console_message(self, response):
+        """ Sends the output of a running interpreter to the other users if the local
+            user is the language leader """
+        with self.client.lock:
+            if self.client.lang_leader_info[self.id]:
+                self.console_forwarder.write(response)
+        return
+
+    def send_console_batch(self, text):
+        """ Called by `self.console_forwarder` with the output collected since its last message """
+        with self.client.lock:
+            self.client.send_message(MSG_CONSOLE(self.client.id, text), self.id)
+        return
+
+class HeadlessClient:
+    """ Connects to a Polyglot server without a user interface. `lang` is a dictionary
+        of buffer id to interpreter class; buffers use a DummyInterpreter by default, which
+        records the code evaluated in `buffer.console` instead of running it. `on_message`
+        is called with each message received after it has been handled. """
+
+    def __init__(self, host="localhost", port=57890, name="headless", password="", lang=None, ipv6=False, on_message=None):
+
+        self.is_alive = True
+
+        self.hostname = str(host)
+        self.port     = int(port)
+        self.name     = str(name)
+        self.id       = None
+        self.error    = None
+
+        self.on_message = on_message
+
+        self.lock    = RLock()
+        self.updated = Condition(self.lock)
+
+        self.msg_id = 0
+        self.block_messages = False
+        self.received = 0
+
+        if lang is None:
+
+            lang = dict((buf_id, DummyInterpreter) for buf_id in DEFAULT_INTERPRETERS)
+
+        self.lang = lang
+
+        self.lang_leader_info = [0 for _ in DEFAULT_INTERPRETERS]
+
+        # Connect to the server
+
+        self.send = Sender(self).connect(self.hostname, self.port, self.name, ipv6, password)
+
+        if not self.send.connected:
+
+            raise ConnectionError(self.send.error_message())
+
+        self.id = self.send.conn_id
+
+        self.send_queue = self.send.queue
+
+        # Create the buffers and the local peer
+
+        self.buffers = {}
+
+        for buf_id, interpreter in self.lang.items():
+
+            self.buffers[buf_id] = HeadlessBuffer(self, buf_id, interpreter())
+
+            self.buffers[buf_id].lang.start(out=self.buffers[buf_id].console)
+
+        self.peers = {}
+
+        self.local_peer = self.add_peer(self.id, self.name)
+
+        # Start sending and receiving
+
+        self.handles = {
+            MSG_CONNECT.type         : self.handle_connect,
+            MSG_OPERATION.type       : self.handle_operation,
+            MSG_SET_MARK.type        : self.handle_set_mark,
+            MSG_SELECT.type          : self.handle_select,
+            MSG_EVALUATE_BLOCK.type  : self.handle_evaluate,
+            MSG_EVALUATE_STRING.type : self.handle_evaluate_str,
+            MSG_REMOVE.type          : self.handle_remove,
+            MSG_KILL.type            : self.handle_kill,
+            MSG_SET_ALL.type         : self.handle_set_all,
+            MSG_RESET.type           : self.handle_set_all,
+            MSG_REQUEST_ACK.type     : self.handle_request_ack,
+            MSG_CONSOLE.type         : self.handle_console_message,
+            MSG_LANG_LEADER.type     : self.handle_update_lang_leader,
+        }
+
+        self.recv = Receiver(self, self.send.conn)
+
+        self.recv.ui = self
+        self.send.ui = self
+
+        self.send_message(MSG_CONNECT(self.id, self.name, self.send.hostname, self.send.port, self.get_lang_choices() + CLIENT_FEATURES))
+
+        self.recv.start()
+        self.send.start()
+
+    def __repr__(self):
+        return "<HeadlessClient {} '{}' - {}:{}>".format(self.id, self.name, self.hostname, self.port)
+
+    def get_lang_choices(self):
+        """ Returns a list of which languages are being used denoted by 1 (chosen) and 0 """
+        return [int(interpreter.is_true_lang()) for interpreter in self.lang.values()]
+
+    # Peers
+    # =====
+
+    def add_peer(self, peer_id, name):
+        """ Adds a peer at the start of the first buffer """
+        peer = self.peers[peer_id] = HeadlessPeer(peer_id, name)
+        self.buffers[peer.buf_id].move_peer(peer, 0)
+        return peer
+
+    def get_peer(self, message):
+        """ Returns the peer that sent `message`, adding it if it is new """
+        if message["src_id"] not in self.peers:
+            return self.add_peer(message["src_id"], "Peer {}".format(message["src_id"]))
+        return self.peers[message["src_id"]]
+
+    # Receiving messages
+    # ==================
+
+    def put(self, message):
+        """ Called by the Receiver (or Sender, on an error) with each message """
+
+        with self.lock:
+
+            try:
+
+                self.handles.get(message.type, lambda message: None)(message)
+
+            except Exception as e:
+
+                print("Exception occurred in message {!r}: {!r} {!r}".format(message.__class__.__name__, type(e), e))
+
+            self.received += 1
+
+            self.updated.notify_all()
+
+        if self.on_message is not None:
+
+            self.on_message(self, message)
+
+        return
+
+    def wait_until(self, predicate, timeout=5.0):
+        """ Blocks until `predicate()` returns True, checking after each message is
+            handled. Returns False if `timeout` seconds pass first. """
+        end = time() + timeout
+        with self.updated:
+            while not predicate():
+                remaining = end - time()
+                if remaining <= 0 or not self.is_alive:
+                    return False
+                self.updated.wait(remaining)
+        return True
+
+    def is_synchronised(self):
+        """ Returns True if the server has acknowledged all of the local peer's operations """
+        return all(buf.state.__class__.__name__ == "Synchronized" for buf in self.buffers.values())
+
+    def handle_connect(self, message):
+        if message["src_id"] != self.id:
+            if message["src_id"] in self.peers:
+                self.peers[message["src_id"]].name = message["name"]
+                self.peers[message["src_id"]].connected = True
+            else:
+                self.add_peer(message["src_id"], message["name"])
+        return
+
+    def handle_operation(self, message):
+        self.buffers[message["buf_id"]].handle_operation(message)
+        return
+
+    def handle_set_mark(self, message):
+        self.buffers[message["buf_id"]].move_peer(self.get_peer(message), message["index"])
+        return
+
+    def handle_select(self, message):
+        self.get_peer(message).selection = (message["start"], message["end"])
+        return
+
+    def handle_evaluate(self, message):
+        self.buffers[message["buf_id"]].handle_evaluate(message)
+        return
+
+    def handle_evaluate_str(self, message):
+        self.buffers[message["buf_id"]].lang.evaluate(message["string"], name=str(self.get_peer(message)))
+        return
+
+    def handle_remove(self, message):
+        peer = self.get_peer(message)
+        peer.connected = False
+        self.buffers[peer.buf_id].cursors.remove(peer.id)
+        return
+
+    def handle_kill(self, message):
+        self.error = message["string"]
+        self.kill()
+        return
+
+    def handle_set_all(self, message):
+        for buf_id, documents in message["buffers"].items():
+            self.buffers[int(buf_id)].handle_set_all(*documents)
+        for peer_id, location in message["peers"].items():
+            peer_id = int(peer_id)
+            if peer_id in self.peers:
+                buf_id, index = location
+                self.buffers[int(buf_id)].move_peer(self.peers[peer_id], index)
+        return
+
+    def handle_request_ack(self, message):
+        if message["flag"] == 1:
+            self.block_messages = True
+            self.send_message(MSG_CONNECT_ACK(self.id))
+        elif message["flag"] == 0:
+            self.block_messages = False
+        return
+
+    def handle_console_message(self, message):
+        buf = self.buffers[message["buf_id"]]
+        if not buf.lang.is_active():
+            buf.console.write(message["text"])
+        return
+
+    def handle_update_lang_leader(self, message):
+        self.lang_leader_info = list(message["flags"])
+        return
+
+    # Sending messages
+    # ================
+
+    def send_message(self, message, buf_id=None):
+        """ Adds a message to the send queue, unless messages are blocked while a new
+            user connects. Returns True if the message was queued. """
+
+        if self.block_messages and not isinstance(message, MSG_CONNECT_ACK):
+
+            return False
+
+        if buf_id is not None:
+
+            message.set_buf_id(buf_id)
+
+        self.msg_id += 1
+
+        message.set_msg_id(self.msg_id)
+
+        self.send_queue.put(message)
+
+        return True
+
+    def get_buffer(self, buf_id=None):
+        """ Returns the buffer with id `buf_id`, or the one the local peer is in """
+        return self.buffers[self.local_peer.buf_id if buf_id is None else buf_id]
+
+    def edit(self, ops, index, buf_id=None):
+        """ Applies a list of text operation ops to a buffer, sends them to the server and
+            moves the local peer to `index`. Returns False if editing is blocked. """
+
+        with self.lock:
+
+            if self.block_messages:
+
+                return False
+
+            buf = self.get_buffer(buf_id)
+
+            if not empty_operation(ops):
+
+                buf.apply_local_operation(ops, index)
+
+        return True
+
+    def insert(self, string, index=None, buf_id=None):
+        """ Inserts `string` at `index`, or at the local peer's location """
+        with self.lock:
+            buf = self.get_buffer(buf_id)
+            if index is None:
+                index = self.local_peer.index
+            return self.edit(new_operation(index, string, len(buf.document)), index + len(string), buf.id)
+
+    def delete(self, length=1, index=None, buf_id=None):
+        """ Deletes `length` characters after `index`, or before the local peer's location
+            if `index` is not given, like pressing backspace """
+        with self.lock:
+            buf = self.get_buffer(buf_id)
+            if index is None:
+                length = min(length, self.local_peer.index)
+                index  = self.local_peer.index - length
+            length = min(length, len(buf.document) - index)
+            return self.edit(new_operation(index, -length, len(buf.document)), index, buf.id)
+
+    def move(self, index, buf_id=None):
+        """ Moves the local peer to `index` """
+        with self.lock:
+            buf = self.get_buffer(buf_id)
+            buf.move_peer(self.local_peer, index)
+            return self.send_message(MSG_SET_MARK(self.id, self.local_peer.index), buf.id)
+
+    def select(self, start, end, buf_id=None):
+        """ Selects the text between `start` and `end` """
+        with self.lock:
+            self.local_peer.selection = (start, end)
+            return self.send_message(MSG_SELECT(self.id, start, end), self.get_buffer(buf_id).id)
+
+    def evaluate(self, buf_id=None):
+        """ Evaluates the block of code around the local peer, as Ctrl+Return does """
+        with self.lock:
+            buf = self.get_buffer(buf_id)
+            start, end = buf.lang.get_block_of_code(buf, buf.lines.tcl_index(self.local_peer.index))
+            if buf.get_rows(start, end).strip() == "":
+                return False
+            return self.send_message(MSG_EVALUATE_BLOCK(self.id, start, end), buf.id)
+
+    def evaluate_string(self, string, buf_id=None):
+        """ Evaluates a string of code for every user """
+        return self.send_message(MSG_EVALUATE_STRING(self.id, string), self.get_buffer(buf_id).id)
+
+    def kill(self):
+        """ Closes the connection and stops any interpreters """
+
+        with self.lock:
+
+            if not self.is_alive:
+
+                return
+
+            self.is_alive = False
+
+            self.updated.notify_all()
+
+        for buf in self.buffers.values():
+
+            buf.lang.kill()
+
+            buf.console_forwarder.close()
+
+        self.recv.kill()
+        self.send.kill()
+
+        return
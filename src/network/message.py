@@ -9,9 +9,19 @@
 
 from __future__ import absolute_import
 
-import re
-import inspect
 import json
+import codecs
+import itertools
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    from inspect import getfullargspec as getargspec
+except ImportError:
+    from inspect import getargspec
 
 def escape_chars(s):
     return s.replace(">", "\>").replace("<", "\<")
@@ -19,44 +29,81 @@ def escape_chars(s):
 def unescape_chars(s):
     return s.replace("\>", ">").replace("\<", "<")
 
+# Optional features a client supports. They are sent after the language choices in
+# MSG_CONNECT, which servers that don't know about them ignore.
+
+FEATURE_AUTHORSHIP_RUNS = "authorship-runs" # MSG_SET_ALL / MSG_RESET authorship as (peer_id, length) runs
+
+CLIENT_FEATURES = [FEATURE_AUTHORSHIP_RUNS]
+
+def split_lang_choices(values):
+    """ Returns the language choices and the features declared in the `lang_choices` of a MSG_CONNECT """
+    return [value for value in values if isinstance(value, int)], [value for value in values if not isinstance(value, int)]
+
 class NetworkMessageReader:
     def __init__(self):
         self.string = ""
-        self.re_msg = re.compile(r"<(.*?>?)>(?=<|$)", re.DOTALL)
 
-    def findall(self, string):
-        """ Returns all values in a message as a list """
-        return self.re_msg.findall(string)
+        # Values that have been read but do not yet make up a whole message, and
+        # how much of the incomplete value in `self.string` has been searched
+
+        self.values  = []
+        self.scanned = 0
+
+        # Multi-byte characters can be split across socket reads when large
+        # amounts of text are sent, so decode incrementally
+
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
 
     def convert_to_json(self, string):
         """ Un-escapes special characters and converts a string to a json object """
         return json.loads(unescape_chars(string))
 
+    def read_values(self):
+        """ Moves any complete <values> from the stored string into `self.values`. Each
+            value ends at the first ">" that has not been escaped. Only text that has
+            not been searched before is scanned, so large messages arriving over
+            many reads are not re-read each time. """
+
+        string, pos = self.string, 0
+
+        end = string.find(">", self.scanned)
+
+        while end != -1:
+
+            if string[end - 1] != "\\":
+
+                self.values.append(string[pos + 1:end])
+
+                pos = end + 1
+
+            end = string.find(">", end + 1)
+
+        self.string  = string[pos:]
+        self.scanned = len(self.string)
+
+        return
+
     def feed(self, data):
         """ Adds text (read from server connection) and returns the complete messages within. Any
             text un-processed is stored and used the next time `feed` is called. """
 
-        # Most data is read from the server, which is bytes in Python3 and str in Python2, so make
-        # sure it is properly decoded to a string.
-
-        string = data.decode() if type(data) is bytes else data
-
-        if string == "":
+        if len(data) == 0:
 
             raise EmptyMessageError()
 
-        # Join with any existing text
-        full_message = self.string + string
+        # Most data is read from the server, which is bytes in Python3 and str in Python2, so make
+        # sure it is properly decoded to a string.
+
+        self.string += self.decoder.decode(data) if type(data) is bytes else data
 
-        # Identify message tags
-        data = self.findall(full_message)
+        self.read_values()
 
         # i is the data, pkg  is the list of messages
-        i, pkg = 0, []
+        i, pkg, errors = 0, [], []
+
+        data = self.values
 
-        # length is the size of the string processed
-        length = 0
-        
         while i < len(data):
 
             # Find out which message type it is
@@ -67,6 +114,12 @@ class NetworkMessageReader:
 
             j = len(cls.header())
 
+            # If there aren't enough arguments, return what we have so far
+
+            if i + j > len(data):
+
+                break
+
             try:
 
                 # Collect the arguments
@@ -80,28 +133,21 @@ class NetworkMessageReader:
                 pkg[-1].set_msg_id(msg_id)
                 pkg[-1].set_buf_id(buf_id)
 
-                # Keep track of how much of the string we have processed
-
-                length += len(str(pkg[-1]))
+            except (TypeError, ValueError) as e:
 
-            except IndexError:
+                # Skip the message and report it once the rest have been read
 
-                # If there aren't enough arguments, return what we have so far
+                errors.append("{}: {}".format(cls.__name__, e))
 
-                break
-
-            except TypeError as e:
-
-                # Debug info
+            i += j
 
-                print( cls.__name__, e )
-                print( string )
+        # Keep any values for messages that are not complete yet
 
-            i += j
+        self.values = data[i:]
 
-        # If we process the whole string, reset the stored string
+        if len(errors):
 
-        self.string = full_message[length:]
+            raise InvalidMessageError(errors, pkg)
 
         return pkg
 
@@ -111,6 +157,7 @@ class MESSAGE(object):
     data = {}
     keys = []
     type = None
+    priority = 0 # Messages with a higher number wait for the others in a MessageQueue
     def __init__(self, src_id, msg_id=0, buf_id=0):
         self.data = {'src_id' : int(src_id), "type" : self.type, "msg_id": msg_id, "buf_id": buf_id}
         self.keys = ['type', 'msg_id', 'buf_id', 'src_id']
@@ -183,7 +230,7 @@ class MESSAGE(object):
 
     @classmethod
     def header(cls):
-        return ['type', 'msg_id', 'buf_id'] + inspect.getargspec(cls.__init__).args[1:]
+        return ['type', 'msg_id', 'buf_id'] + getargspec(cls.__init__).args[1:]
 
 # Define types of message
         
@@ -254,7 +301,8 @@ class MSG_SET_ALL(MESSAGE):
     type = 9
     def __init__(self, src_id, buffers, peers):
         MESSAGE.__init__(self, src_id)
-        self['buffers'] = buffers # dict of buf_id to (doc, peer_tag_doc)
+        self['buffers'] = buffers # dict of buf_id to (doc, list of (peer_id, length)), or (doc, string of peer chars)
+                                  # for clients that don't declare FEATURE_AUTHORSHIP_RUNS and from older servers
         self['peers']   = peers   # dict of client_id to (buf_id, index)
 
 class MSG_SELECT(MESSAGE):
@@ -289,6 +337,7 @@ class MSG_REQUEST_ACK(MESSAGE):
 
 class MSG_CONSOLE(MESSAGE):
     type = 15
+    priority = 1 # Console output waits for operations, so editing stays responsive
     def __init__(self, src_id, text):
         MESSAGE.__init__(self, src_id)
         self['text'] = str(text)
@@ -299,6 +348,21 @@ class MSG_LANG_LEADER(MESSAGE):
         MESSAGE.__init__(self, src_id)
         self['flags'] = list(flags)
  
+class MessageQueue(queue.PriorityQueue):
+    """ Queue of messages waiting to be sent. Messages are taken in order of their
+        `priority` then in the order they were added. Anything that is not a
+        message, e.g. None to stop a thread, comes after every message. """
+    def __init__(self, maxsize=0):
+        queue.PriorityQueue.__init__(self, maxsize)
+        self.count = itertools.count()
+
+    def put(self, message, block=True, timeout=None):
+        priority = message.priority if isinstance(message, MESSAGE) else float("inf")
+        return queue.PriorityQueue.put(self, (priority, next(self.count), message), block, timeout)
+
+    def get(self, block=True, timeout=None):
+        return queue.PriorityQueue.get(self, block, timeout)[-1]
+
 # Create a dictionary of message type to message class 
 
 MESSAGE_TYPE = {msg.type : msg for msg in [
@@ -330,6 +394,15 @@ class EmptyMessageError(Exception):
     def __str__(self):
         return repr(self.value)
 
+class InvalidMessageError(Exception):
+    """ Raised by NetworkMessageReader.feed when messages could not be read. `messages`
+        holds the messages that were read successfully. """
+    def __init__(self, errors, messages):
+        self.errors   = errors
+        self.messages = messages
+    def __str__(self):
+        return "Could not read {} message(s): {}".format(len(self.errors), "; ".join(self.errors))
+
 class ConnectionError(Exception):
     def __init__(self, value):
         self.value = value
@@ -9,6 +9,7 @@ from ..utils import *
 
 from ..ot.server import Server, MemoryBackend
 from ..ot.text_operation import TextOperation, IncompatibleOperationError as OTError
+from ..document import AuthorshipIndex
 
 class ThreadedServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
     pass
@@ -20,8 +21,8 @@ class TextHandler(Server):
         # self.backend = MemoryBackend()
         Server.__init__(self, "", MemoryBackend())
 
-        # Document relating to peer chars
-        self.peer_tag_doc = ""
+        # Runs of text written by each peer
+        self.peer_tags = AuthorshipIndex()
 
 
     def receive_message(self, message):
@@ -51,33 +52,20 @@ class TextHandler(Server):
 
         # Apply to peer tags
 
-        peer_op = TextOperation([get_peer_char(message["src_id"]) * len(val) if isinstance(val, str) else val for val in op.ops])
-        self.peer_tag_doc = peer_op(self.peer_tag_doc)
+        self.peer_tags.apply(op.ops, message["src_id"])
 
         return message
 
-    def get_contents(self):
-        # return [self.document, self.get_client_ranges()]
-        return (self.document, self.peer_tag_doc)
+    def get_contents(self, runs=True):
+        """ Returns the document and its authorship as a list of (peer_id, length) pairs, or
+            as a string of peer chars for clients that can't read runs if `runs` is False """
+        if runs:
+            return (self.document, self.get_client_ranges())
+        return (self.document, "".join(get_peer_char(peer_id) * length for peer_id, length in self.get_client_ranges()))
 
     def get_client_ranges(self):
-        """ Converts the peer_tag_doc into pairs of tuples to be reconstructed by the client """
-        if len(self.peer_tag_doc) == 0:
-            return []
-        else:
-            data = []
-            p_char = self.peer_tag_doc[0]
-            count = 1
-            for char in self.peer_tag_doc[1:]:
-                if char != p_char:
-                    data.append((get_peer_id_from_char(p_char), int(count)))
-                    p_char = char
-                    count = 1
-                else:
-                    count += 1
-            if count > 0:
-                data.append((get_peer_id_from_char(p_char), int(count)))
-            return data
+        """ Returns the peer tags as a list of (peer_id, length) pairs to be reconstructed by the client """
+        return self.peer_tags.runs()
 
     def clear_history(self):
         self.backend = MemoryBackend()
\ No newline at end of file
@@ -13,7 +13,7 @@ from .message import *
 
 import socket
 from threading import Thread
-from time import sleep
+from time import sleep, time
 
 class Receiver:
     """
@@ -32,7 +32,7 @@ class Receiver:
         self.thread = Thread(target=self.handle)
         self.thread.daemon = True
         self.running = False
-        self.bytes = 2048
+        self.bytes = 65536
 
         self.reader = NetworkMessageReader()
 
@@ -69,7 +69,11 @@ class Receiver:
 
             try:
 
-                packet = self.reader.feed(self.sock.recv(self.bytes))
+                data = self.sock.recv(self.bytes)
+
+                time_received = time()
+
+                packet = self.reader.feed(data)
 
                 # We get None if there was a socket error
 
@@ -89,6 +93,14 @@ class Receiver:
 
                 break
 
+            # Report messages that could not be read and handle the rest
+
+            except InvalidMessageError as e:
+
+                print(e)
+
+                packet = e.messages
+
             # Ignore empty message errors if we are no longer running
 
             except EmptyMessageError as e:
@@ -103,6 +115,10 @@ class Receiver:
 
             for msg in packet:
 
+                # Used to measure how long it takes for a message to be displayed
+
+                msg.time_received = time_received
+
                 # Create a new client node if it is a connect message
 
                 if isinstance(msg, MSG_CONNECT):
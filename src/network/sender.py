@@ -14,10 +14,17 @@ from ..utils import *
 
 import socket
 from hashlib import md5
+from threading import Thread
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 
 class Sender:
     """
-        Sends messages to the Server
+        Sends messages to the Server. Messages put in `self.queue` are written to the
+        socket by a separate thread so that the interface never waits on the network.
 
     """
     def __init__(self, client):
@@ -40,6 +47,17 @@ class Sender:
 
         self.ui        = None
 
+        # Messages waiting to be sent and the thread that sends them
+
+        self.queue   = MessageQueue()
+        self.thread  = Thread(target=self.handle)
+        self.thread.daemon = True
+        self.running = False
+
+        # Maximum number of queued messages written to the socket at once
+
+        self.batch_size = 64
+
     def connect(self, hostname, port=57890, username="", using_ipv6=False, password=""):
         """ Connects to the master Troop server and
             start a listening instance on this machine """
@@ -111,6 +129,74 @@ class Sender:
         
         return
 
+    def start(self):
+        """ Starts sending messages from the queue """
+        self.running = True
+        self.thread.start()
+        return
+
+    def handle(self):
+        """ Waits for messages to be added to the queue and sends them along with any
+            others that are waiting, in a single write """
+
+        while self.running:
+
+            msg = self.queue.get()
+
+            # `kill` adds None to stop the thread waiting
+
+            if msg is None:
+
+                break
+
+            batch = [msg]
+
+            try:
+
+                while len(batch) < self.batch_size:
+
+                    msg = self.queue.get_nowait()
+
+                    if msg is None:
+
+                        self.running = False
+
+                        break
+
+                    batch.append(msg)
+
+            except queue.Empty:
+
+                pass
+
+            try:
+
+                self.conn.sendall(b"".join(msg.bytes() for msg in batch))
+
+            except (OSError, socket.error) as e:
+
+                # Don't report errors if we have already killed the client
+
+                if self.running and self.client.is_alive:
+
+                    self.report_error("Lost connection to server: {}".format(e))
+
+                break
+
+        self.running = False
+
+        return
+
+    def report_error(self, string):
+        """ Passes an error to the interface, which handles it in the Tk thread """
+        if self.ui is not None:
+            self.ui.put(MSG_KILL(-1, string))
+        else:
+            print(string)
+        return
+
     def kill(self):
+        self.running = False
+        self.queue.put(None)
         self.conn.close()
         return
\ No newline at end of file
@@ -35,7 +35,7 @@ class PolyServer(ThreadedServer):
         network connect to it and send their keypress information
         to the server, which then sends it on to the others
     """
-    bytes  = 2048
+    bytes  = 65536
     def __init__(self, password="", port=57890, log=False, debug=False):
 
         # Dict of IDs to OTServer instances
@@ -92,8 +92,8 @@ class PolyServer(ThreadedServer):
 
             sys.exit("Exited")
 
-        # Set up a char queue
-        self.msg_queue = queue.Queue()
+        # Set up a char queue, console output waits for any other messages
+        self.msg_queue = MessageQueue()
         self.msg_queue_thread = Thread(target=self.update_send)
 
         # Set up log for logging a performance
@@ -139,23 +139,22 @@ class PolyServer(ThreadedServer):
     # def get_text_constraint(self):
     #     return self.text_constraint
 
-    def get_contents(self):
+    def get_contents(self, client=None):
         """ Returns a list with 2 items: dict of buffer index and contents (doc and peer_doc), and
-            dict of client index and buf_id/index """
-        return [{int(index): buf.get_contents() for index, buf in self.buffers.items()}, self.get_client_locs()]
+            dict of client index and buf_id/index. Authorship is sent in the form `client` can read. """
+        runs = client is None or FEATURE_AUTHORSHIP_RUNS in client.features
+        return [{int(index): buf.get_contents(runs) for index, buf in self.buffers.items()}, self.get_client_locs()]
 
     def update_all_clients(self):
         """ Sends a reset message with the contents from the server to make sure new user starts the  same  """
 
-        msg = MSG_RESET(-1, *self.get_contents())
-
         for client in list(self.clients.values()):
 
             # Tell other clients about the new connection
 
             if client.connected:
 
-                client.send(msg)
+                client.send(MSG_RESET(-1, *self.get_contents(client)))
                 # client.send(self.get_text_constraint())
 
         return
@@ -258,7 +257,7 @@ class PolyServer(ThreadedServer):
         """ Removes revision history - make sure clients' revision numbers reset """
         for buf in self.buffers.values():
             buf.clear_history()
-        self.msg_queue = queue.Queue()
+        self.msg_queue = MessageQueue()
         return
 
     def wait_for_ack(self, flag):
@@ -514,7 +513,11 @@ class RequestHandler(socketserver.BaseRequestHandler):
 
     def get_message(self):
         data = self.request.recv(self.server.bytes)
-        data = self.reader.feed(data)
+        try:
+            data = self.reader.feed(data)
+        except InvalidMessageError as e:
+            stdout("Error from client '{}' @ {}: {}".format(self.client_name, self.client_address[0], e))
+            data = e.messages
         return data
 
     def handle_client_lost(self, verbose=True):
@@ -532,7 +535,9 @@ class RequestHandler(socketserver.BaseRequestHandler):
 
         if self.client_address not in list(self.server.clients.values()):
 
-            new_client = Client(self, name=msg['name'], lang_choices=msg['lang_choices']) # decide leader? TODO
+            lang_choices, features = split_lang_choices(msg['lang_choices'])
+
+            new_client = Client(self, name=msg['name'], lang_choices=lang_choices, features=features) # decide leader? TODO
 
             self.server.update_language_leaders(new_client)
 
@@ -674,7 +679,7 @@ class RequestHandler(socketserver.BaseRequestHandler):
         """ Send all the previous operations to the client to keep it up to date """
 
         client = self.client()
-        client.send(MSG_SET_ALL(-1, *self.server.get_contents()))
+        client.send(MSG_SET_ALL(-1, *self.server.get_contents(client)))
         # client.send(self.server.get_text_constraint())
 
         return
@@ -683,7 +688,7 @@ class RequestHandler(socketserver.BaseRequestHandler):
 
 class Client:
     bytes = PolyServer.bytes
-    def __init__(self, handler, name, lang_choices):
+    def __init__(self, handler, name, lang_choices, features=()):
 
         self.handler = handler
 
@@ -708,6 +713,10 @@ class Client:
 
         self.lang_choices = lang_choices
 
+        # Optional features of the protocol the client supports
+
+        self.features = list(features)
+
         # A list of messages to process
 
         self.messages = []
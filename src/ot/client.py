@@ -1,6 +1,8 @@
 # I have adopted the naming convention from Daniel Spiewak's CCCP:
 # https://github.com/djspiewak/cccp/blob/master/agent/src/main/scala/com/codecommit/cccp/agent/state.scala
 
+from .profile import record_transition
+
 
 class Client(object):
     """Handles the client part of the OT synchronization protocol. Transforms
@@ -18,19 +20,25 @@ class Client(object):
 
     def apply_client(self, operation):
         """Call this method when the user (!) changes the document."""
+        old_state = self.state
         self.state = self.state.apply_client(self, operation)
+        record_transition("apply_client", old_state, self.state)
 
     def apply_server(self, operation):
         """Call this method with a new operation from the server."""
         self.revision += 1
+        old_state = self.state
         self.state = self.state.apply_server(self, operation)
+        record_transition("apply_server", old_state, self.state)
 
     def server_ack(self):
         """Call this method when the server acknowledges an operation send by
         the current user (via the send_operation method)
         """
         self.revision += 1
+        old_state = self.state
         self.state = self.state.server_ack(self)
+        record_transition("server_ack", old_state, self.state)
 
     def send_operation(self, revision, operation):
         """Should send an operation and its revision number to the server."""
@@ -0,0 +1,196 @@
+"""Opt-in counters and timings for the OT engine.
+
+Profiling is off by default and costs a single attribute check per call when
+disabled. Enable it from code with `profiler.enable()` or by setting the
+POLYGLOT_OT_PROFILE environment variable before starting the client or
+server. If the variable is set to a file name ending in ".json", the trace is
+written to that file when the process exits; otherwise a summary is printed.
+
+    >>> from src.ot.profile import profiler
+    >>> profiler.enable()
+    >>> ...
+    >>> print(profiler.summary())
+    >>> profiler.dump("ot-trace.json")
+"""
+
+import atexit
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+__all__ = ["profiler", "profiled", "record_transition"]
+
+clock = getattr(time, "perf_counter", time.time)
+
+
+class CallStats(object):
+    """Running totals for one profiled function."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.op_length = 0
+        self.doc_size = 0
+
+    def add(self, duration, op_length, doc_size):
+        self.count += 1
+        self.total += duration
+        self.worst = max(self.worst, duration)
+        self.op_length = max(self.op_length, op_length)
+        self.doc_size = max(self.doc_size, doc_size)
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": (self.total / self.count) * 1000 if self.count else 0.0,
+            "worst_ms": self.worst * 1000,
+            "max_op_length": self.op_length,
+            "max_doc_size": self.doc_size,
+        }
+
+
+class Profiler(object):
+    """Collects per-call statistics, a bounded trace of recent calls and the
+    state transitions of OT clients.
+    """
+
+    def __init__(self, trace_size=10000):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.trace_size = trace_size
+        self.reset()
+
+    def reset(self):
+        """Discards everything recorded so far."""
+        with self.lock:
+            self.stats = collections.defaultdict(CallStats)
+            self.transitions = collections.Counter()
+            self.trace = collections.deque(maxlen=self.trace_size)
+            self.start_time = clock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def record(self, name, start, duration, op_length=0, doc_size=0):
+        """Adds a single timed call to the statistics and trace."""
+        with self.lock:
+            self.stats[name].add(duration, op_length, doc_size)
+            self.trace.append({
+                "name": name,
+                "start_ms": (start - self.start_time) * 1000,
+                "duration_ms": duration * 1000,
+                "op_length": op_length,
+                "doc_size": doc_size,
+            })
+
+    def record_transition(self, event, old_state, new_state):
+        """Records a client state machine transition, e.g. Synchronized to
+        AwaitingConfirm on `apply_client`.
+        """
+        old_name = old_state.__class__.__name__
+        new_name = new_state.__class__.__name__
+        with self.lock:
+            self.transitions[(old_name, event, new_name)] += 1
+            self.trace.append({
+                "name": "client." + event,
+                "start_ms": (clock() - self.start_time) * 1000,
+                "from": old_name,
+                "to": new_name,
+            })
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                "calls": dict((name, stats.as_dict()) for name, stats in self.stats.items()),
+                "transitions": [
+                    {"from": old, "event": event, "to": new, "count": count}
+                    for (old, event, new), count in sorted(self.transitions.items())
+                ],
+                "trace": list(self.trace),
+            }
+
+    def summary(self):
+        """Returns a table of the recorded calls and transitions as a string."""
+        data = self.as_dict()
+        lines = ["{:<24} {:>8} {:>10} {:>10} {:>10} {:>8} {:>10}".format(
+            "call", "count", "total ms", "mean ms", "worst ms", "op len", "doc size")]
+        for name, stats in sorted(data["calls"].items()):
+            lines.append("{:<24} {count:>8} {total_ms:>10.3f} {mean_ms:>10.3f} {worst_ms:>10.3f} "
+                         "{max_op_length:>8} {max_doc_size:>10}".format(name, **stats))
+        if data["transitions"]:
+            lines.append("")
+            for item in data["transitions"]:
+                lines.append("{from} --{event}--> {to}: {count}".format(**item))
+        return "\n".join(lines)
+
+    def dump(self, filename):
+        """Writes the statistics, transitions and trace to a JSON file."""
+        with open(filename, "w") as f:
+            json.dump(self.as_dict(), f, indent=1)
+
+
+profiler = Profiler()
+
+
+def _base_length(ops):
+    return sum(op if op > 0 else -op for op in ops if isinstance(op, int))
+
+
+def profiled(name, doc_arg=None):
+    """Decorates a function so its calls are timed while the profiler is
+    enabled. The op length is the longest list of ops among the arguments. The
+    document size is the length of the positional argument at `doc_arg` or, if
+    not given, the length of the document the first operation applies to.
+    """
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                duration = clock() - start
+                operations = [arg.ops for arg in args if hasattr(arg, "ops")]
+                op_length = max([len(ops) for ops in operations] or [0])
+                if doc_arg is not None and len(args) > doc_arg:
+                    doc_size = len(args[doc_arg])
+                elif operations:
+                    doc_size = _base_length(operations[0])
+                else:
+                    doc_size = 0
+                profiler.record(name, start, duration, op_length, doc_size)
+
+        return wrapper
+
+    return decorator
+
+
+def record_transition(event, old_state, new_state):
+    if profiler.enabled:
+        profiler.record_transition(event, old_state, new_state)
+
+
+def _report_at_exit(target):
+    if target.endswith(".json"):
+        profiler.dump(target)
+    else:
+        print(profiler.summary())
+
+
+_env = os.environ.get("POLYGLOT_OT_PROFILE", "")
+
+if _env and _env != "0":
+    profiler.enable()
+    atexit.register(_report_at_exit, _env)
@@ -1,3 +1,6 @@
+from .profile import profiled
+
+
 class MemoryBackend(object):
     """Simple backend that saves all operations in the server's memory. This
     causes the processe's heap to grow indefinitely.
@@ -30,6 +33,7 @@ class Server(object):
         self.document = document
         self.backend = backend
 
+    @profiled("Server.receive_operation")
     def receive_operation(self, user_id, revision, operation):
         """Transforms an operation coming from a client against all concurrent
         operation, applies it to the current document and returns the operation
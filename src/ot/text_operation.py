@@ -6,6 +6,8 @@
 #   Represented by positive ints.
 # * Delete ops: Delete the next n characters. Represented by negative ints.
 
+from .profile import profiled
+
 
 def _is_retain(op):
     return isinstance(op, int) and op > 0
@@ -123,6 +125,7 @@ class TextOperation(object):
             self.ops.append(d)
         return self
 
+    @profiled("TextOperation.__call__", doc_arg=1)
     def __call__(self, doc):
         """Apply this operation to a string, returning a new string."""
 
@@ -147,6 +150,7 @@ class TextOperation(object):
 
         return ''.join(parts)
 
+    @profiled("TextOperation.invert", doc_arg=1)
     def invert(self, doc):
         """Make an operation that does the opposite. When you apply an operation
         to a string and then the operation generated by this operation, you
@@ -169,6 +173,7 @@ class TextOperation(object):
 
         return inverse
 
+    @profiled("TextOperation.compose")
     def compose(self, other):
         """Combine two consecutive operations into one that has the same effect
         when applied to a document.
@@ -220,6 +225,7 @@ class TextOperation(object):
         return operation
 
     @staticmethod
+    @profiled("TextOperation.transform")
     def transform(operation_a, operation_b):
         """Transform two operations a and b to a' and b' such that b' applied
         after a yields the same result as a' applied after b. Try to preserve
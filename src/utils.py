@@ -86,6 +86,25 @@ def get_operation_size(ops):
             count += op
     return count
 
+def get_edit_size(ops):
+    """ Returns the number of characters inserted plus the number deleted by an operation """
+    count = 0
+    for op in ops:
+        if isinstance(op, str):
+            count += len(op)
+        elif isinstance(op, int) and op < 0:
+            count -= op
+    return count
+
+from .config import BULK_EDIT_SIZE
+def is_bulk_operation(ops, doc_size):
+    """ Returns True if an operation edits at least `BULK_EDIT_SIZE` characters and at least
+        half as many as are in the document it produces, `doc_size`, e.g. opening a file
+        or pasting into a short document. Rebuilding the document's indices from the new
+        text is then faster than applying the operation to them. """
+    size = get_edit_size(ops)
+    return size >= BULK_EDIT_SIZE and 2 * size >= doc_size
+
 def empty_operation(ops):
     """ Returns True if the operation is an empty list or only contains positive integers """
     return (ops == [] or all([isinstance(x, int) and (x > 0) for x in ops]))
@@ -141,4 +160,37 @@ from .config import COLOURS
 def PeerFormatting(index):
     i = index % len(COLOURS["Peers"])
     c = COLOURS["Peers"][i]
-    return c, "Black"
\ No newline at end of file
+    return c, "Black"
+
+from collections import deque
+
+class LatencyStats:
+    """ Records how long things took, e.g. messages between being received from the
+        network and being displayed, in milliseconds """
+    def __init__(self, size=1000, noun="messages"):
+        self.noun    = noun
+        self.recent  = deque(maxlen=size)
+        self.count   = 0
+        self.total   = 0.0
+        self.worst   = 0.0
+
+    def add(self, seconds):
+        ms = seconds * 1000.0
+        self.count += 1
+        self.total += ms
+        self.worst  = max(self.worst, ms)
+        self.recent.append(ms)
+        return
+
+    def percentile(self, value):
+        """ Returns the given percentile (0-100) of the recent latencies """
+        if not self.recent:
+            return 0.0
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(len(values) * value / 100.0))]
+
+    def summary(self):
+        """ Returns the statistics as a string """
+        mean = (self.total / self.count) if self.count else 0.0
+        return "{} {}, mean {:.2f} ms, median {:.2f} ms, 95th percentile {:.2f} ms, worst {:.2f} ms".format(
+            self.count, self.noun, mean, self.percentile(50), self.percentile(95), self.worst)
@@ -0,0 +1,42 @@
+"""
+    Random documents and text operations for the document index tests
+"""
+
+from __future__ import absolute_import
+
+from src.ot.text_operation import TextOperation
+
+def random_text(rnd, chars, size):
+    """ Returns a string of up to `size` characters chosen from `chars` """
+    return "".join(rnd.choice(chars) for _ in range(rnd.randint(0, size)))
+
+def random_operation(rnd, text, chars="ab(\n"):
+    """ Returns a TextOperation of several inserts and deletes spread over `text` """
+    op, pos = TextOperation(), 0
+    while pos < len(text):
+        step = rnd.randint(0, min(10, len(text) - pos))
+        op.retain(step)
+        pos += step
+        if rnd.random() < 0.3 and pos < len(text):
+            size = rnd.randint(1, min(8, len(text) - pos))
+            op.delete(size)
+            pos += size
+        if rnd.random() < 0.3:
+            op.insert("".join(rnd.choice(chars) for _ in range(rnd.randint(1, 8))))
+    if rnd.random() < 0.5:
+        op.insert("\nend")
+    return op
+
+def random_edit(rnd, text, chars="ab(\n"):
+    """ Returns a TextOperation that inserts or deletes a few characters at one position,
+        as typing does """
+    op, pos = TextOperation(), rnd.randint(0, len(text))
+    op.retain(pos)
+    if rnd.random() < 0.5 and pos < len(text):
+        size = rnd.randint(1, min(3, len(text) - pos))
+        op.delete(size)
+    else:
+        size = 0
+        op.insert("".join(rnd.choice(chars) for _ in range(rnd.randint(1, 3))))
+    op.retain(len(text) - pos - size)
+    return op
@@ -0,0 +1,85 @@
+from __future__ import absolute_import
+
+import random
+import unittest
+
+from itertools import groupby
+
+from src.document import AuthorshipIndex
+from src.utils import get_peer_char
+
+from random_edits import random_text, random_operation
+
+def naive_runs(authors):
+    """ Returns the (peer_id, start, end) runs of a list with the author of each character """
+    runs, start = [], 0
+    for author, chars in groupby(authors):
+        length = len(list(chars))
+        runs.append((author, start, start + length))
+        start += length
+    return runs
+
+def apply_naive(authors, ops, author):
+    """ Applies text operation ops to a list with the author of each character """
+    result, pos = [], 0
+    for op in ops:
+        if isinstance(op, int) and op > 0:
+            result.extend(authors[pos:pos + op])
+            pos += op
+        elif isinstance(op, int):
+            pos -= op
+        else:
+            result.extend([author] * len(op))
+    result.extend(authors[pos:])
+    return result
+
+class TestAuthorshipIndex(unittest.TestCase):
+
+    def assertMatchesAuthors(self, index, authors, rnd):
+        """ Checks the queries against a list with the author of each character """
+        runs = naive_runs(authors)
+        self.assertEqual(list(index), runs)
+        self.assertEqual(index.runs(), [(author, end - start) for author, start, end in runs])
+        self.assertEqual(len(index), len(authors))
+        self.assertEqual(index.authors(), set(authors))
+        for author in range(5):
+            self.assertEqual(index.count(author), authors.count(author))
+            self.assertEqual(index.ranges(author), [(start, end) for a, start, end in runs if a == author])
+        for pos in range(len(authors)):
+            self.assertEqual(index.author_at(pos), authors[pos])
+        for _ in range(5):
+            start = rnd.randint(0, len(authors))
+            end = rnd.randint(start, len(authors))
+            expected = [(a, max(s, start), min(e, end)) for a, s, e in runs if s < end and e > start]
+            self.assertEqual(list(index.runs_in(start, end)), expected)
+
+    def test_random_operations(self):
+        """ The run-length index matches a list of authors after random operations """
+        rnd = random.Random(0)
+        for _ in range(100):
+            text = random_text(rnd, "ab\n", 40)
+            authors = [rnd.randint(0, 4) for _ in text]
+            index = AuthorshipIndex.from_runs((a, e - s) for a, s, e in naive_runs(authors))
+            self.assertMatchesAuthors(index, authors, rnd)
+            for _ in range(20):
+                op = random_operation(rnd, text)
+                author = rnd.randint(0, 4)
+                text = op(text)
+                index.apply(op.ops, author)
+                authors = apply_naive(authors, op.ops, author)
+                self.assertEqual(len(authors), len(text))
+                self.assertMatchesAuthors(index, authors, rnd)
+
+    def test_author_out_of_range(self):
+        index = AuthorshipIndex.from_runs([(1, 3)])
+        self.assertRaises(IndexError, index.author_at, 3)
+
+    def test_from_snapshot(self):
+        """ Both the run-length and the per-character snapshot formats are read """
+        runs = [(1, 3), (2, 1), (1, 2)]
+        chars = "".join(get_peer_char(author) * length for author, length in runs)
+        self.assertEqual(AuthorshipIndex.from_snapshot(runs).runs(), runs)
+        self.assertEqual(AuthorshipIndex.from_snapshot(chars).runs(), runs)
+
+if __name__ == "__main__":
+    unittest.main()
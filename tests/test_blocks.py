@@ -0,0 +1,139 @@
+from __future__ import absolute_import
+
+import random
+import unittest
+
+from src.document import LineIndex, BracketIndex, blank_line_block, bracket_block, brackets
+from src.ot.text_operation import TextOperation
+
+from random_edits import random_operation
+
+CHUNKS = [
+    "(\nSynthDef(\\sine, { |freq=440|\n    Out.ar(0, SinOsc.ar(freq))\n}).add;\n)\n\n",
+    "(\nPbind(\\dur, 0.25).play;\n)\n\n",
+    "x.play;\n\n",
+    "  \n",
+]
+
+# The searches get_block_of_code made through the Tk text widget, reading rows of a list
+
+def old_blank_line_block(rows, row):
+    lastline = len(rows) + 2
+    block = [0, 0]
+    for line in range(row, 0, -1):
+        if not get_row(rows, line).strip():
+            break
+    block[0] = line
+    for line in range(row, lastline):
+        if not get_row(rows, line).strip():
+            break
+    block[1] = line
+    return block
+
+def old_left_bracket(rows, cur_y, cur_x):
+    count = 0
+    line_text = get_row(rows, cur_y)
+    for line_num in range(cur_y, 0, -1):
+        for char_num in range(cur_x - 1, -1, -1):
+            char = line_text[char_num]
+            if char == ")":
+                count += 1
+            elif char == "(":
+                if count == 0:
+                    return line_num, char_num
+                else:
+                    count -= 1
+        line_text = get_row(rows, line_num - 1)
+        cur_x     = len(line_text)
+    return None, None
+
+def old_right_bracket(rows, cur_y, cur_x):
+    count = 0
+    for line_num in range(cur_y, len(rows) + 2):
+        line_text = get_row(rows, line_num)
+        for char_num in range(cur_x, len(line_text)):
+            char = line_text[char_num]
+            if char == "(":
+                count += 1
+            if char == ")":
+                if count == 0:
+                    return line_num, char_num + 1
+                else:
+                    count -= 1
+        cur_x = 0
+    return None, None
+
+def old_bracket_block(rows, row, col):
+    left, right = (row, col), (row, col)
+    while True:
+        new_left  = old_left_bracket(rows, *left)
+        new_right = old_right_bracket(rows, *right)
+        if new_left[0] is None or new_right[0] is None:
+            return [left[0], right[0] + 1]
+        left, right = new_left, new_right
+
+def get_row(rows, row):
+    return rows[row - 1] if 0 < row <= len(rows) else ""
+
+class TestBlocks(unittest.TestCase):
+
+    def test_blank_line_block(self):
+        """ Matches the old search after random operations that add blank lines """
+        rnd = random.Random(0)
+        for _ in range(100):
+            text = "".join(rnd.choice(CHUNKS) for _ in range(5))
+            lines = LineIndex(text)
+            for _ in range(10):
+                op = random_operation(rnd, text, "ab \n\n")
+                text = op(text)
+                lines.apply(op.ops)
+                rows = text.split("\n")
+                for row in range(1, len(rows) + 1):
+                    self.assertEqual(blank_line_block(text, lines, row), old_blank_line_block(rows, row))
+
+    def check_bracket_block(self, seed):
+        """ Adds and removes whole blocks of balanced code, so that the old search, which
+            does not skip strings or comments, finds the same brackets """
+        rnd = random.Random(seed)
+        parts = [rnd.choice(CHUNKS) for _ in range(30)]
+        text  = "".join(parts)
+        index = BracketIndex(text, comment="//")
+        for _ in range(30):
+            op, new_parts = TextOperation(), []
+            for part in parts:
+                if rnd.random() < 0.1:
+                    op.delete(len(part))
+                else:
+                    op.retain(len(part))
+                    new_parts.append(part)
+                if rnd.random() < 0.1:
+                    part = rnd.choice(CHUNKS) * rnd.randint(1, 3)
+                    op.insert(part)
+                    new_parts.append(part)
+            parts = new_parts
+            text = op(text)
+            index.apply(op.ops, text)
+            rows = text.split("\n")
+            for _ in range(40):
+                row = rnd.randint(1, len(rows))
+                col = rnd.randint(0, len(rows[row - 1]))
+                self.assertEqual(bracket_block(index, row, col), old_bracket_block(rows, row, col))
+
+    def test_bracket_block(self):
+        self.check_bracket_block(0)
+
+    def test_bracket_block_small_blocks(self):
+        default, brackets.BLOCK = brackets.BLOCK, 4
+        try:
+            self.check_bracket_block(1)
+        finally:
+            brackets.BLOCK = default
+
+    def test_outside_brackets(self):
+        text = "x.play;\n(\n  y\n)"
+        index = BracketIndex(text, comment="//")
+        self.assertEqual(bracket_block(index, 1, 3), [1, 2])
+        self.assertEqual(bracket_block(index, 3, 1), [2, 5])
+
+if __name__ == "__main__":
+    unittest.main()
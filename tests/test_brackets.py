@@ -0,0 +1,94 @@
+from __future__ import absolute_import
+
+import random
+import unittest
+
+from src.document import BracketIndex, brackets
+
+from random_edits import random_text, random_operation
+
+CHARS = "ab (){}[]\n'\"#"
+
+PAIRS = {"(": ")", "[": "]", "{": "}"}
+
+def scan_line(line, comment="#", quotes="'\""):
+    """ Returns (column, bracket) for the brackets in a line that are not in a string or comment """
+    found, i = [], 0
+    while i < len(line):
+        char = line[i]
+        if char in quotes:
+            end = line.find(char, i + 1)
+            i = len(line) if end == -1 else end + 1
+            continue
+        if line.startswith(comment, i):
+            break
+        if char in "()[]{}":
+            found.append((i, char))
+        i += 1
+    return tuple(found)
+
+def scan_pairs(text):
+    """ Returns a dictionary of the offsets of each matched bracket and the one it matches,
+        and a list of (start, end, kind) for each pair, by scanning the whole document """
+    partner, pairs, stacks, offset = {}, [], dict((kind, []) for kind in PAIRS), 0
+    for line in text.split("\n"):
+        for col, char in scan_line(line):
+            if char in PAIRS:
+                stacks[char].append(offset + col)
+            else:
+                kind = [left for left, right in PAIRS.items() if right == char][0]
+                if stacks[kind]:
+                    start = stacks[kind].pop()
+                    partner[start], partner[offset + col] = offset + col, start
+                    pairs.append((start, offset + col, kind))
+        offset += len(line) + 1
+    return partner, pairs
+
+class TestBracketIndex(unittest.TestCase):
+
+    def assertMatchesScan(self, index, text):
+        """ Checks each query against a scan of the whole document """
+        rows = text.split("\n")
+        self.assertEqual(len(index), len(rows))
+        for row, line in enumerate(rows, 1):
+            self.assertEqual(index.row(row), scan_line(line))
+        partner, pairs = scan_pairs(text)
+        for offset in range(len(text) + 1):
+            if offset < len(text):
+                self.assertEqual(index.match(offset), partner.get(offset))
+            for kinds in ("([{", "("):
+                around = [(start, end) for start, end, kind in pairs if kind in kinds and start < offset <= end]
+                self.assertEqual(index.enclosing(offset, kinds), max(around) if around else None)
+
+    def check_random_operations(self, seed):
+        rnd = random.Random(seed)
+        for _ in range(40):
+            text = random_text(rnd, CHARS, 80)
+            index = BracketIndex(text, comment="#")
+            self.assertMatchesScan(index, text)
+            for _ in range(15):
+                op = random_operation(rnd, text, CHARS + "\n\n")
+                text = op(text)
+                index.apply(op.ops, text)
+                self.assertMatchesScan(index, text)
+
+    def test_random_operations(self):
+        """ The index updated from operations finds the same brackets as a scan """
+        self.check_random_operations(0)
+
+    def test_small_blocks(self):
+        """ Blocks of a few lines are split, joined and searched through the tree """
+        default, brackets.BLOCK = brackets.BLOCK, 2
+        try:
+            self.check_random_operations(1)
+        finally:
+            brackets.BLOCK = default
+
+    def test_strings_and_comments(self):
+        index = BracketIndex("f('(', x) # )\n[\"]\"]", comment="#")
+        self.assertEqual(index.row(1), ((1, "("), (8, ")")))
+        self.assertEqual(index.match(1), 8)
+        self.assertEqual(index.match(14), 18)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+from __future__ import absolute_import
+
+import random
+import unittest
+
+from src.document import LineIndex, widget_edits
+from src.ot.text_operation import TextOperation
+
+from random_edits import random_operation
+
+def tk_offset(text, row, col):
+    """ Returns the offset of the Tk index "row.col" in `text` """
+    lines = text.split("\n")
+    return sum(len(line) + 1 for line in lines[:row - 1]) + min(col, len(lines[row - 1]))
+
+class TestWidgetEdits(unittest.TestCase):
+
+    def test_random_operations(self):
+        """ Making the edits at Tk indices turns the old document into the new one """
+        rnd = random.Random(0)
+        for _ in range(500):
+            text = "".join(rnd.choice("xy ()\n") for _ in range(rnd.randint(0, 80)))
+            op = random_operation(rnd, text)
+            new = op(text)
+            widget = text
+            for kind, row, col, string in widget_edits(op.ops, text, LineIndex(new)):
+                start = tk_offset(widget, row, col)
+                if kind == "insert":
+                    widget = widget[:start] + string + widget[start:]
+                else:
+                    self.assertEqual(widget[start:start + len(string)], string)
+                    widget = widget[:start] + widget[start + len(string):]
+            self.assertEqual(widget, new)
+
+    def test_delete_across_lines(self):
+        text = "one\ntwo\nthree"
+        op = TextOperation().retain(2).delete(6).retain(5)
+        self.assertEqual(widget_edits(op.ops, text, LineIndex(op(text))), [("delete", 1, 2, "e\ntwo\n")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+from __future__ import absolute_import
+
+import random
+import unittest
+
+from src.document import LineIndex
+
+from random_edits import random_text, random_operation
+
+class TestLineIndex(unittest.TestCase):
+
+    def assertMatchesText(self, lines, text):
+        """ Checks every conversion against one made by splitting the text """
+        rows = text.split("\n")
+        self.assertEqual(len(lines), len(rows))
+        offset = 0
+        for row, line in enumerate(rows, 1):
+            self.assertEqual(lines.line_start(row), offset)
+            self.assertEqual(lines.line_end(row), offset + len(line))
+            for col in range(len(line) + 1):
+                self.assertEqual(lines.row_col(offset + col), (row, col))
+                self.assertEqual(lines.offset(row, col), offset + col)
+                self.assertEqual(lines.tcl_index(offset + col), "{}.{}".format(row, col))
+            # Columns past the end of a line are clamped, as in Tk
+            self.assertEqual(lines.offset(row, len(line) + 5), offset + len(line))
+            offset += len(line) + 1
+        self.assertEqual(lines.offset(len(rows) + 1, 0), len(text))
+        self.assertEqual(lines.row_col(len(text) + 5), (len(rows), len(rows[-1])))
+
+    def test_random_operations(self):
+        """ The index updated from operations matches the document """
+        rnd = random.Random(0)
+        for _ in range(100):
+            text = random_text(rnd, "ab\n", 60)
+            lines = LineIndex(text)
+            for _ in range(20):
+                op = random_operation(rnd, text, "ab\n\n")
+                text = op(text)
+                lines.apply(op.ops)
+                self.assertMatchesText(lines, text)
+                self.assertEqual(lines.starts, LineIndex(text).starts)
+
+    def test_set_text(self):
+        lines = LineIndex("one\ntwo")
+        lines.set_text("\n\nthree\n")
+        self.assertMatchesText(lines, "\n\nthree\n")
+
+    def test_empty(self):
+        lines = LineIndex()
+        self.assertMatchesText(lines, "")
+        self.assertEqual(lines.line_end(2), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+from __future__ import absolute_import
+
+import random
+import unittest
+
+from collections import deque
+
+from src.document import UndoHistory
+from src.ot.text_operation import TextOperation, IncompatibleOperationError
+from src.utils import new_operation
+
+from random_edits import random_edit
+
+def resize(operation, text):
+    """ Returns an undo / redo operation with the final retain it may leave out """
+    return TextOperation(new_operation(*(list(operation.ops) + [len(text)])))
+
+class EagerHistory:
+    """ Transforms every undo / redo entry as soon as a remote operation arrives """
+    def __init__(self, max_size):
+        self.undo_stack = deque(maxlen=max_size)
+        self.redo_stack = deque(maxlen=max_size)
+
+    def add_remote(self, operation, doc_size):
+        for stack in (self.undo_stack, self.redo_stack):
+            for i, entry in enumerate(stack):
+                stack[i] = UndoHistory.transform(entry, operation, doc_size)
+        return
+
+class TestUndoHistory(unittest.TestCase):
+
+    def check_session(self, seed, max_log):
+        """ Local edits, undos and redos mixed with remote operations """
+        rnd = random.Random(seed)
+        history, eager = UndoHistory(max_size=20, max_log=max_log), EagerHistory(20)
+        text = "hello world\n"
+        for _ in range(300):
+            action = rnd.random()
+            if action < 0.3:
+                op = random_edit(rnd, text)
+                if len(op.ops):
+                    eager.undo_stack.append(op.invert(text))
+                    eager.redo_stack.clear()
+                history.push_undo(op.invert(text))
+                history.clear_redo()
+                text = op(text)
+            elif action < 0.45 and history.has_undo():
+                op, expected = history.pop_undo(), eager.undo_stack.pop()
+                self.assertEqual(op.ops, expected.ops)
+                # Entries below the top of a stack are transformed against remote operations
+                # on a later document, so they may no longer fit. Both histories drop them.
+                try:
+                    undone = resize(op, text)(text)
+                except IncompatibleOperationError:
+                    continue
+                history.push_redo(resize(op, text).invert(text))
+                eager.redo_stack.append(history.redo_stack[-1][0])
+                text = undone
+            elif action < 0.55 and history.has_redo():
+                op, expected = history.pop_redo(), eager.redo_stack.pop()
+                self.assertEqual(op.ops, expected.ops)
+                try:
+                    redone = resize(op, text)(text)
+                except IncompatibleOperationError:
+                    continue
+                history.push_undo(resize(op, text).invert(text))
+                eager.undo_stack.append(history.undo_stack[-1][0])
+                text = redone
+            else:
+                op = random_edit(rnd, text)
+                history.add_remote(op, len(text))
+                eager.add_remote(op, len(text))
+                text = op(text)
+            self.assertEqual(len(history), len(eager.undo_stack))
+            self.assertLessEqual(len(history.log), max_log)
+
+    def test_matches_eager_transform(self):
+        """ Rebasing entries only when they are used gives the same operations """
+        for seed in range(20):
+            self.check_session(seed, 1000)
+
+    def test_small_log(self):
+        """ Old entries are rebased early so the start of the log can be removed """
+        for seed in range(20):
+            self.check_session(seed, 4)
+
+    def test_empty_operation(self):
+        history = UndoHistory()
+        history.push_undo(TextOperation())
+        self.assertFalse(history.has_undo())
+
+    def test_log_cleared_without_entries(self):
+        history = UndoHistory()
+        for _ in range(5):
+            history.add_remote(TextOperation().insert("x"), 0)
+        self.assertEqual(history.log, [])
+        self.assertEqual(history.revision(), 5)
+
+if __name__ == "__main__":
+    unittest.main()